@@ -64,6 +64,13 @@ class FLBrowser:
             ui.previewBrowserMenuItem()
         return browser_item_name
 
+    @staticmethod
+    def jogBrowserNodes(count: int, preview: bool = True) -> str:
+        # Moves count nodes, negative moves up, with one ui.jog and previews only the node it lands on.
+        if count == 0:
+            return ui.getFocusedNodeCaption()
+        return FLBrowser.jogBrowserNode(count, preview)
+
     @staticmethod
     def nextBrowserTab() -> str:
         FLBrowser.focus()
@@ -0,0 +1,6 @@
+"""
+Benchmarks of the framework hot paths: MIDI dispatch, UI state polling, mode switching and LED output.
+They run against the offline FL Studio modules, outside of FL Studio. Run them from the directory that contains the framework package:
+
+    python -m fl_controller_framework.benchmarks
+"""
@@ -0,0 +1,33 @@
+import argparse
+import json
+from ..offline import install
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m fl_controller_framework.benchmarks', description='Benchmarks the framework against the offline FL Studio modules.')
+    parser.add_argument('--messages', type=int, default=200000, help='MIDI messages dispatched by the HandleMidiMsg benchmark.')
+    parser.add_argument('--ticks', type=int, default=2000, help='Idle ticks run by the HandleState benchmark.')
+    parser.add_argument('--switches', type=int, default=200, help='Mode switches run by the mode switch benchmark.')
+    parser.add_argument('--replay', metavar='SESSION', help='Replay a recorded session log instead of running the benchmarks.')
+    parser.add_argument('--surface', metavar='MODULE:CLASS', help='ControlSurface class the session is replayed against. Defaults to the benchmark surface.')
+    parser.add_argument('--realtime', action='store_true', help='Replay the session in real time instead of at full speed.')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+    args = parser.parse_args()
+
+    project = install()
+    # The framework imports the FL modules, so it is imported once the stand-ins are installed.
+    if args.replay:
+        from .suite import replay
+        results = replay(project, args.replay, args.surface, args.realtime)
+    else:
+        from .suite import run
+        results = run(project, args.messages, args.ticks, args.switches)
+    if args.json:
+        print(json.dumps({result.name: {'value': result.value, 'unit': result.unit} for result in results}, indent=2))
+    else:
+        for result in results:
+            print(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""suite.py: Benchmarks of the framework hot paths, run against the offline FL Studio modules.
+Importing this module imports the framework, so fl_controller_framework.offline.install() must be called first.
+"""
+import time
+import importlib
+from ..offline import OfflineProject, OfflineMidiMsg
+from ..control_surface import ControlSurface
+from ..components.component import Component
+from ..components.modes import ModesComponent, Mode
+from ..controls.button import ButtonControl
+from ..controls.knob import KnobControl
+from ..controls.pad_control import PadsControl
+from ..core.skin import SkinColor, RGBSysexPadEncoder
+from ..core.event import RefreshFlags
+from ..core.state import state_event_id
+from ..core.session import SessionReplay
+from ..util.midi import MIDI_STATUS
+
+
+class BenchmarkResult(object):
+    """One measured value of a benchmark."""
+    def __init__(self, name: str, value: float, unit: str):
+        self.name: str = name
+        self.value: float = value
+        self.unit: str = unit
+
+    def __str__(self) -> str:
+        return '{:<40} {:>14.2f} {}'.format(self.name, self.value, self.unit)
+
+
+class NoteColor(SkinColor):
+    """Draws a control by sending a note on message with a fixed velocity."""
+    def __init__(self, velocity: int):
+        self.velocity: int = velocity
+
+    def draw(self, control) -> None:
+        control.device.midiOutMsg(MIDI_STATUS.NOTE_ON_STATUS, control.channel, control.identifier, self.velocity)
+
+
+class BenchSkin:
+    DEFAULT = Default = NoteColor(1)
+    ON = NoteColor(127)
+    OFF = Off = NoteColor(0)
+
+
+class BenchComponent(Component):
+    """Subscribes to the pressed event of every button, like a typical component does."""
+    def __init__(self, name: str, buttons: list[ButtonControl], knobs: list[KnobControl] = (), pads: PadsControl = None, *a, **k):
+        super().__init__(name, auto_active=False, *a, **k)
+        self.presses: int = 0
+        for button in buttons:
+            setattr(self, button.name, button)
+            self.subscribe_control(button.name, 'pressed', lambda pressed: self._on_pressed(pressed))
+        for knob in knobs:
+            setattr(self, knob.name, knob)
+        if pads is not None:
+            self.pads = pads
+
+    def _on_pressed(self, pressed: bool):
+        self.presses += 1
+
+    def after_activate(self):
+        for control in self._get_controls().values():
+            if isinstance(control, ButtonControl):
+                control.set_light('ON')
+
+
+class BenchSurface(ControlSurface):
+    """An MPC style surface of about 200 controls. A transport is shared by two modes, pads and knobs are handed between them, and each mode has its own bank of buttons.
+        Mode banks are on notes 0 - 83 of channels 0 and 1, the transport on notes 100 - 107 of channel 0, pads on notes 36 - 51 of channel 2, knobs on CC 0 - 7 and the mode buttons on channel 3.
+    """
+    def __init__(self, buttons_per_mode: int = 84):
+        super().__init__('bench_surface')
+        def button(name, channel, identifier):
+            return ButtonControl(name, channel, identifier, skin=BenchSkin)
+        transport = [button('bench_transport_{}'.format(i), 0, 100 + i) for i in range(8)]
+        self.pads = PadsControl('bench_pads', 2, {36 + i: i for i in range(16)}, encoder=RGBSysexPadEncoder(b'\xF0\x47\x7F\x40\x65'))
+        knobs = [KnobControl('bench_knob_{}'.format(i), 0, i, skin=BenchSkin) for i in range(8)]
+        bank_a = [button('bench_a_{}'.format(i), 0, i) for i in range(buttons_per_mode)]
+        bank_b = [button('bench_b_{}'.format(i), 1, i) for i in range(buttons_per_mode)]
+
+        self.transport = BenchComponent('bench_transport', transport)
+        self.drums = BenchComponent('bench_drums', bank_a, knobs, self.pads)
+        self.notes = BenchComponent('bench_notes', bank_b, knobs, self.pads)
+        self.modes = ModesComponent('bench_modes', default_mode='drums')
+        self.modes.add_mode(Mode('drums', [self.transport, self.drums]))
+        self.modes.add_mode(Mode('notes', [self.transport, self.notes]))
+        self.modes.add_control('drums', button('bench_mode_drums', 3, 0))
+        self.modes.add_control('notes', button('bench_mode_notes', 3, 1))
+        self.control_count: int = len(transport) + 16 + len(knobs) + len(bank_a) + len(bank_b) + 2
+
+
+def _sent(project: OfflineProject) -> int:
+    return len(project.midi_out) + len(project.sysex_out)
+
+
+def bench_handle_midi_msg(surface: BenchSurface, project: OfflineProject, messages: int) -> list[BenchmarkResult]:
+    """ControlRegistry.HandleMidiMsg throughput for buttons, pads and knobs, without flushing the output."""
+    events = []
+    for i in range(84):
+        events.append(OfflineMidiMsg(MIDI_STATUS.NOTE_ON_STATUS, i, 127))
+        events.append(OfflineMidiMsg(MIDI_STATUS.NOTE_ON_STATUS, i, 0))
+    for i in range(16):
+        events.append(OfflineMidiMsg(MIDI_STATUS.NOTE_ON_STATUS | 2, 36 + i, 100))
+        events.append(OfflineMidiMsg(MIDI_STATUS.NOTE_OFF_STATUS | 2, 36 + i, 0))
+    for i in range(8):
+        events.append(OfflineMidiMsg(MIDI_STATUS.CC_STATUS, i, 64 + i))
+        events.append(OfflineMidiMsg(MIDI_STATUS.CC_STATUS, i, 60 - i))
+    handle = surface.control_registry.HandleMidiMsg
+    count = len(events)
+    start = time.perf_counter_ns()
+    for n in range(messages):
+        handle(events[n % count])
+    elapsed = time.perf_counter_ns() - start
+    surface.midi_output.flush(0)
+    return [BenchmarkResult('HandleMidiMsg', messages / (elapsed / 1e9), 'msgs/s')]
+
+
+def bench_handle_state(surface: BenchSurface, project: OfflineProject, ticks: int) -> list[BenchmarkResult]:
+    """UIState.HandleState cost per idle tick, with 8 mixer strips of watched getters and a few volatile getters."""
+    listeners = []
+    def listener(*a):
+        pass
+    for track in range(1, 9):
+        for getter in ('getTrackVolume', 'getTrackPan', 'isTrackMuted', 'isTrackSolo', 'getTrackName'):
+            listeners.append(state_event_id('mixer.{}'.format(getter), track))
+    listeners += ['transport.isPlaying', 'mixer.getSongTickPos', 'playlist.getVisTimeBar', 'channels.selectedChannel']
+    for event_id in listeners:
+        surface.global_event_object.subscribe(event_id, listener)
+    surface.OnIdle()
+    project.reset_counters()
+    start = time.perf_counter_ns()
+    for tick in range(ticks):
+        surface.ui_state.HandleState()
+    elapsed = time.perf_counter_ns() - start
+    calls = sum(project.api_calls.values())
+    project.reset_counters()
+    refresh_start = time.perf_counter_ns()
+    surface.OnRefresh(RefreshFlags.HW_Dirty_Mixer_Controls)
+    refresh_elapsed = time.perf_counter_ns() - refresh_start
+    refresh_calls = sum(project.api_calls.values())
+    for event_id in listeners:
+        surface.global_event_object.unsubscribe(event_id, listener)
+    return [
+        BenchmarkResult('HandleState per idle', elapsed / ticks / 1000, 'us'),
+        BenchmarkResult('HandleState API calls per idle', calls / ticks, 'calls'),
+        BenchmarkResult('OnRefresh mixer controls', refresh_elapsed / 1000, 'us'),
+        BenchmarkResult('OnRefresh mixer controls API calls', refresh_calls, 'calls'),
+    ]
+
+
+def bench_mode_switch(surface: BenchSurface, project: OfflineProject, switches: int) -> list[BenchmarkResult]:
+    """Latency of switching between the two modes, and the LED messages each switch sends after the output is flushed."""
+    modes = ('notes', 'drums')
+    surface.midi_output.flush(0)
+    project.reset_counters()
+    elapsed = 0
+    sent = 0
+    for n in range(switches):
+        start = time.perf_counter_ns()
+        surface.modes.set_active_mode(modes[n % 2])
+        elapsed += time.perf_counter_ns() - start
+        surface.midi_output.flush(0)
+        sent += _sent(project)
+        project.reset_counters()
+    return [
+        BenchmarkResult('Mode switch ({} controls)'.format(surface.control_count), elapsed / switches / 1e6, 'ms'),
+        BenchmarkResult('Mode switch LED messages', sent / switches, 'msgs'),
+    ]
+
+
+def bench_led_scenarios(surface: BenchSurface, project: OfflineProject) -> list[BenchmarkResult]:
+    """LED messages sent for common scenarios. Each scenario ends with a flush, like the following idle call would."""
+    results = []
+    def scenario(name, action):
+        surface.midi_output.flush(0)
+        project.reset_counters()
+        action()
+        surface.midi_output.flush(0)
+        results.append(BenchmarkResult('LED messages: {}'.format(name), _sent(project), 'msgs'))
+
+    def press_all_pads():
+        for i in range(16):
+            surface.OnMidiMsg(OfflineMidiMsg(MIDI_STATUS.NOTE_ON_STATUS | 2, 36 + i, 100))
+        for i in range(16):
+            surface.OnMidiMsg(OfflineMidiMsg(MIDI_STATUS.NOTE_OFF_STATUS | 2, 36 + i, 0))
+
+    def recolor_pads():
+        for i in range(16):
+            surface.pads.set_pad_color(i, (i * 8, 127 - i * 8, 64))
+
+    def press_transport():
+        surface.OnMidiMsg(OfflineMidiMsg(MIDI_STATUS.NOTE_ON_STATUS, 100, 127))
+        surface.OnMidiMsg(OfflineMidiMsg(MIDI_STATUS.NOTE_ON_STATUS, 100, 0))
+
+    scenario('pad press and release x16', press_all_pads)
+    scenario('recolor 16 pads', recolor_pads)
+    scenario('transport button press', press_transport)
+    scenario('mode switch', lambda: surface.modes.set_active_mode('notes' if surface.modes.getValue('active_mode') == 'drums' else 'drums'))
+    return results
+
+
+def run(project: OfflineProject, messages: int = 200000, ticks: int = 2000, switches: int = 200) -> list[BenchmarkResult]:
+    """Builds the benchmark surface on project, initializes it and runs every benchmark."""
+    surface = BenchSurface()
+    project.reset_counters()
+    surface.OnInit()
+    results = [BenchmarkResult('LED messages: OnInit', _sent(project), 'msgs')]
+    results += bench_handle_midi_msg(surface, project, messages)
+    results += bench_handle_state(surface, project, ticks)
+    results += bench_mode_switch(surface, project, switches)
+    results += bench_led_scenarios(surface, project)
+    project.reset_counters()
+    surface.OnDeInit()
+    results.append(BenchmarkResult('LED messages: OnDeInit', _sent(project), 'msgs'))
+    return results
+
+
+def replay(project: OfflineProject, path: str, surface_path: str = None, realtime: bool = False) -> list[BenchmarkResult]:
+    """Replays a session log against a surface and reports the replay throughput and the messages sent to the device.
+
+    Args:
+        surface_path (str, optional): "module:Class" of the ControlSurface to replay against. The class is called without arguments. Defaults to BenchSurface.
+    """
+    if surface_path:
+        module_name, class_name = surface_path.split(':', 1)
+        surface = getattr(importlib.import_module(module_name), class_name)()
+    else:
+        surface = BenchSurface()
+    surface.OnInit()
+    session = SessionReplay.load(path)
+    project.reset_counters()
+    counts = session.replay(surface, realtime)
+    elapsed = counts.pop('elapsed_ms')
+    midi = counts['MIDI']
+    results = [BenchmarkResult('Replay: {} records'.format(kind), count, 'records') for kind, count in counts.items() if count]
+    results.append(BenchmarkResult('Replay time', elapsed, 'ms'))
+    if midi and elapsed:
+        results.append(BenchmarkResult('Replay MIDI throughput', midi / (elapsed / 1000), 'msgs/s'))
+    results.append(BenchmarkResult('Replay MIDI messages out', len(project.midi_out), 'msgs'))
+    results.append(BenchmarkResult('Replay SysEx messages out', len(project.sysex_out), 'msgs'))
+    results.append(BenchmarkResult('Replay API calls', sum(project.api_calls.values()), 'calls'))
+    return results
@@ -98,13 +98,14 @@ class BrowserComponent(Component):
         FLBrowser.selectNode()
 
     @Component.subscribe("jog_browser_node_control", "inc")
-    def _on_jog_browser_node_control_inc(self, _):
-        browser_item_name: str = FLBrowser.nextBrowserNode()
+    def _on_jog_browser_node_control_inc(self, count):
+        # count is True for a single detent, or the number of detents of a tick when the control accumulates.
+        browser_item_name: str = FLBrowser.jogBrowserNodes(int(count))
         self.show_modal("Browser", browser_item_name)
 
     @Component.subscribe("jog_browser_node_control", "dec")
-    def _on_jog_browser_node_control_dec(self, _):
-        browser_item_name: str = FLBrowser.prevBrowserNode()
+    def _on_jog_browser_node_control_dec(self, count):
+        browser_item_name: str = FLBrowser.jogBrowserNodes(-int(count))
         self.show_modal("Browser", browser_item_name)
 
     def activate(self):
@@ -1,7 +1,77 @@
 from ..controls.control import Control, ControlBase
-from ..core.event import GlobalEventObject, EventObject
+from ..core.event import GlobalEventObject, EventObject, EventHandle, RefreshDispatcher
 from ..core.state import StateBase
 from ..api.fl_class import _fl
+from ..util.functions import safe_getattr
+
+
+class ComponentMembers(object):
+    """Attribute index of one Component instance. It is updated when an attribute is assigned, so activation never has to reflect over the component with dir().
+        It also caches the wiring plan, the list of (event_id, function) pairs that activation subscribes, until a control, component or decorated function is assigned, or an attribute hides a decorated method or member of the class.
+    """
+    __slots__ = ('controls', 'components', 'control_wiring', 'observer_wiring', 'refresh_wiring', 'plan', 'wired_names')
+
+    def __init__(self, wired_names: frozenset = frozenset()) -> None:
+        self.controls: dict[str, ControlBase] = dict()
+        """Attribute name -> Control assigned to the component."""
+        self.components: dict[str, 'Component'] = dict()
+        """Attribute name -> Component assigned to the component."""
+        self.control_wiring: dict[str, tuple[str, str]] = dict()
+        """Attribute name -> (control_name, control_event) of functions added on the instance with subscribe_control()."""
+        self.observer_wiring: dict[str, str] = dict()
+        """Attribute name -> event_path of functions added on the instance with listens_event()."""
+        self.refresh_wiring: dict[str, int] = dict()
+        """Attribute name -> OnRefresh mask of functions added on the instance with listens_refresh_event()."""
+        self.plan: tuple = None
+        self.wired_names: frozenset = wired_names
+        """Names of the decorated methods and members of the class. An instance attribute of one of these names hides it from the plan."""
+
+    def index(self, name: str, value: any):
+        """Updates the index for an attribute assignment. Assigning anything else to a control or component attribute removes it from the index."""
+        if name in self.wired_names:
+            self.plan = None
+        if isinstance(value, ControlBase):
+            if self.controls.get(name) is not value:
+                self.discard(name)
+                self.controls[name] = value
+                self.plan = None
+        elif isinstance(value, Component):
+            if self.components.get(name) is not value:
+                self.discard(name)
+                self.components[name] = value
+                self.plan = None
+        else:
+            self.discard(name)
+            if callable(value) and not isinstance(value, type):
+                control_name = getattr(value, 'control_name', None)
+                control_event = getattr(value, 'control_event', None)
+                if control_name is not None and control_event is not None:
+                    self.control_wiring[name] = (control_name, control_event)
+                    self.plan = None
+                event_path = getattr(value, 'event_path', None)
+                if event_path is not None:
+                    self.observer_wiring[name] = event_path
+                    self.plan = None
+                refresh_mask = getattr(value, 'refresh_mask', None)
+                if refresh_mask is not None:
+                    self.refresh_wiring[name] = refresh_mask
+                    self.plan = None
+
+    def discard(self, name: str):
+        """Removes an attribute from the index."""
+        if name in self.wired_names:
+            self.plan = None
+        if self.controls.pop(name, None) is not None:
+            self.plan = None
+        if self.components.pop(name, None) is not None:
+            self.plan = None
+        if self.control_wiring.pop(name, None) is not None:
+            self.plan = None
+        if self.observer_wiring.pop(name, None) is not None:
+            self.plan = None
+        if self.refresh_wiring.pop(name, None) is not None:
+            self.plan = None
+
 
 class Component(StateBase, EventObject):
     """A base class that is used to group controls together to provide functionality. For example, you would create a TransportComponent by inheriting from this class.
@@ -10,6 +80,70 @@ class Component(StateBase, EventObject):
         When inheriting from this class, create as many controls as necessary as instance objects, use the Component.subscribe(), and Component.listens() decorators to react to those controls and FL events, and program you login in various methods.
     """
     component_registry = dict()
+    _control_wiring: dict[str, tuple[str, str]] = dict()
+    """Attribute name -> (control_name, control_event) of every method decorated with Component.subscribe(). Collected once per class in __init_subclass__."""
+    _observer_wiring: dict[str, str] = dict()
+    """Attribute name -> event_path of every method decorated with Component.listens(). Collected once per class in __init_subclass__."""
+    _refresh_wiring: dict[str, int] = dict()
+    """Attribute name -> OnRefresh mask of every method decorated with Component.listens_refresh(). Collected once per class in __init_subclass__."""
+    _class_members: dict[str, any] = dict()
+    """Attribute name -> Control or Component declared as a class attribute. Collected once per class in __init_subclass__."""
+    _member_properties: tuple = ()
+    _wired_names: frozenset = frozenset()
+    """Names in the wiring tables and class members above. Collected once per class in __init_subclass__."""
+    """Names of the properties of the class. They are read on every lookup, and the ones that return a Control or Component are used like attributes."""
+    retained_controls: frozenset = frozenset()
+    """Controls that stay active when this component deactivates, because another component takes them over. Set by Mode.switch_to() during a mode switch."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        control_wiring = dict()
+        observer_wiring = dict()
+        refresh_wiring = dict()
+        class_members = dict()
+        member_properties = dict()
+        # Walk from the base classes down, so a method overridden without the decorator drops the wiring of the base method.
+        for klass in reversed(cls.__mro__):
+            for attr, value in vars(klass).items():
+                control_wiring.pop(attr, None)
+                observer_wiring.pop(attr, None)
+                refresh_wiring.pop(attr, None)
+                class_members.pop(attr, None)
+                member_properties.pop(attr, None)
+                if isinstance(value, (ControlBase, Component)):
+                    class_members[attr] = value
+                    continue
+                if isinstance(value, property):
+                    member_properties[attr] = None
+                    continue
+                if not callable(value) or isinstance(value, type):
+                    continue
+                if hasattr(value, 'control_event') and hasattr(value, 'control_name'):
+                    control_wiring[attr] = (value.control_name, value.control_event)
+                if hasattr(value, 'event_path'):
+                    observer_wiring[attr] = value.event_path
+                if hasattr(value, 'refresh_mask'):
+                    refresh_wiring[attr] = value.refresh_mask
+        cls._control_wiring = control_wiring
+        cls._observer_wiring = observer_wiring
+        cls._refresh_wiring = refresh_wiring
+        cls._class_members = class_members
+        cls._member_properties = tuple(member_properties)
+        cls._wired_names = frozenset().union(control_wiring, observer_wiring, refresh_wiring, class_members)
+
+    def __new__(cls, *a, **k):
+        instance = super(Component, cls).__new__(cls)
+        object.__setattr__(instance, '_members', ComponentMembers(cls._wired_names))
+        return instance
+
+    def __setattr__(self, name: str, value: any):
+        super(Component, self).__setattr__(name, value)
+        self._members.index(name, value)
+
+    def __delattr__(self, name: str):
+        super(Component, self).__delattr__(name)
+        self._members.discard(name)
+
     @staticmethod
     def listens(event_path: str):
         """A static method the is used to listen to FL studio event and react to them by the function they are decorating. Upon component activation, each function that is decorated with Component.listens() will be registered in the global event object.
@@ -30,6 +164,16 @@ class Component(StateBase, EventObject):
             return func
         return dec
 
+    @staticmethod
+    def listens_refresh(mask: int):
+        """A static method that is used to react to OnRefresh flags. Upon component activation, each function decorated with Component.listens_refresh() is subscribed to the RefreshDispatcher.
+            The function is called once per refresh that has any of the flags in mask, with the subset of mask that is set.
+            Example: Component.listens_refresh(RefreshFlags.HW_Dirty_Mixer_Controls | RefreshFlags.HW_Dirty_Colors)"""
+        def dec(func):
+            func.refresh_mask = mask
+            return func
+        return dec
+
     def __init__(self, name: str, auto_active: bool = True, *a, **k):
         super(Component, self).__init__(*a, **k)
         self.name: str = name
@@ -42,69 +186,104 @@ class Component(StateBase, EventObject):
         self.auto_active: bool = auto_active
         "Whether or not to automatically activate this component upon declaration"
         self.fl: _fl = _fl
-        """FL Studio modules object: This object hold a reference to all Fl Studio modules and functions."""\
-        
+        """FL Studio modules object: This object hold a reference to all Fl Studio modules and functions."""
+        self._event_handles: dict = dict()
+
     def __del__(self):
         del Component.component_registry[self.name]
 
     def notify(self, event_name: str, *a, **k):
         """Helper method to publish event sourced form this component. The event_id is component_name.event. This is useful for communication between components if you need."""
-        self.global_event_object.notify_listeners(
-            '{}.{}'.format(self.name, event_name), *a, **k)
+        self.event_handle(event_name).emit(*a, **k)
 
-    def _control_subscribe(self):
-        """Finds each function with the Decorator @Component.subscribe(control_name: str, event_id: str). Once found it binds the function to the control event specified in the decorator.
-        It does this with the global event object. This is called at Component activation at Component.activate()"""
-        for attr in dir(self):
+    def event_handle(self, event_name: str) -> EventHandle:
+        """Returns the EventHandle for an event published by this component. The handle is created once and cached on the component."""
+        handle = self._event_handles.get(event_name)
+        if handle is None:
+            handle = self.global_event_object.handle('{}.{}'.format(self.name, event_name))
+            self._event_handles[event_name] = handle
+        return handle
+
+    def _wiring_plan(self) -> tuple:
+        """Returns the (control subscriptions, observers, refresh handlers) this component binds on activation.
+        Control subscriptions is a list of (event_id, function) pairs, observers is a dict of event_path -> functions and refresh handlers a list of (mask, function) pairs. The plan is built from the class and instance wiring, and cached until the index of the component changes, see ComponentMembers."""
+        members = self._members
+        if members.plan is not None:
+            return members.plan
+        instance_attrs = self.__dict__
+        control_wiring = {attr: wiring for attr, wiring in self._control_wiring.items() if attr not in instance_attrs}
+        control_wiring.update(members.control_wiring)
+        observer_wiring = {attr: path for attr, path in self._observer_wiring.items() if attr not in instance_attrs}
+        observer_wiring.update(members.observer_wiring)
+        refresh_wiring = {attr: mask for attr, mask in self._refresh_wiring.items() if attr not in instance_attrs}
+        refresh_wiring.update(members.refresh_wiring)
+
+        subscriptions = []
+        controls = self._get_controls()
+        for attr, (control_name, control_event) in control_wiring.items():
+            # Get the control that was passed into the Component instance, and subscribe to it's events
+            control = controls.get(control_name)
+            if control is not None:
+                subscriptions.append(('{}.{}'.format(control.name, control_event), getattr(self, attr)))
+
+        observers = dict()
+        for attr, event_path in observer_wiring.items():
+            funcs = observers.setdefault(event_path, [])
             func = getattr(self, attr)
-            if hasattr(func, 'control_event') and hasattr(func, 'control_name'):
-                control_event = func.control_event
-                instance_control_name = func.control_name
+            if func not in funcs:
+                funcs.append(func)
+
+        refresh_handlers = [(mask, getattr(self, attr)) for attr, mask in refresh_wiring.items()]
+
+        plan = (subscriptions, observers, refresh_handlers)
+        # A property can return another control on every read, so its plan is not cached.
+        if not self._member_properties:
+            members.plan = plan
+        return plan
 
-                # Get the control that was passed into the Component instance, and subscribe to it's events
-                if hasattr(self, instance_control_name) and isinstance(getattr(self, func.control_name), ControlBase):
-                    control: ControlBase = getattr(self, func.control_name)
-                    if control is not None:
-                        self.global_event_object.subscribe('{}.{}'.format(control.name, control_event), func)
+    def _control_subscribe(self):
+        """Binds each function decorated with @Component.subscribe(control_name: str, event_id: str) to the control event specified in the decorator.
+        It does this with the global event object. This is called at Component activation at Component.activate()"""
+        for event_id, func in self._wiring_plan()[0]:
+            self.global_event_object.subscribe(event_id, func)
 
     def _control_unsubscribe(self):
-        """Finds each function with the Decorator @Component.subscribe(control_name: str, event_id: str). Once found it unsubscribes the function to the control event specified in the decorator.
+        """Unbinds each function decorated with @Component.subscribe(control_name: str, event_id: str) from the control event specified in the decorator.
         It does on the global event object. This is called at deactivation with Component.deactivate()"""
-        for attr in dir(self):
-            func = getattr(self, attr)
-            if hasattr(func, 'control_event') and hasattr(func, 'control_name'):
-                control_event = func.control_event
-                instance_control_name = func.control_name
-
-                # Get the control that was passed into the Component instance, and unsubscribe to it's events
-                if hasattr(self, instance_control_name) and isinstance(getattr(self, func.control_name), ControlBase):
-                    control: ControlBase = getattr(self, func.control_name)
-                    if control is not None:
-                        self.global_event_object.unsubscribe('{}.{}'.format(control.name, control_event), func)
+        for event_id, func in self._wiring_plan()[0]:
+            self.global_event_object.unsubscribe(event_id, func)
 
     def _get_observers(self):
         """Get all functions on this Component instance that are decorated with @Component.listens(). """
-        local_scope_observers = dict()
-        for attr in dir(self):
-            func = getattr(self, attr)
-            if hasattr(func, 'event_path'):
-                event_path = func.event_path
-                if local_scope_observers.get(event_path) == None:
-                    local_scope_observers[event_path] = []
-                    local_scope_observers[event_path].append(func)
-                else:
-                    if func not in local_scope_observers[event_path]:
-                        local_scope_observers[event_path].append(func)
-        return local_scope_observers
+        return self._wiring_plan()[1]
 
     def _get_controls(self):
-        """Gets all controls on this Component instance"""
+        """Gets all controls on this Component instance, including class attributes and properties. The returned dict may be the live index, do not modify it."""
+        if not self._class_members and not self._member_properties:
+            return self._members.controls
+        return self._collect_members()[0]
+
+    def _get_components(self):
+        """Gets all components on this Component instance, including class attributes and properties. The returned dict may be the live index, do not modify it."""
+        if not self._class_members and not self._member_properties:
+            return self._members.components
+        return self._collect_members()[1]
+
+    def _collect_members(self) -> tuple:
+        """Returns (controls, components) of the class attributes, properties and instance attributes. Instance attributes hide class attributes of the same name."""
         controls = dict()
-        for attr in dir(self):
-            control = getattr(self, attr)
-            if isinstance(control, ControlBase):
-                controls[attr] = control
-        return controls
+        components = dict()
+        instance_attrs = self.__dict__
+        members = [(attr, value) for attr, value in self._class_members.items() if attr not in instance_attrs]
+        members.extend((attr, safe_getattr(self, attr)) for attr in self._member_properties)
+        for attr, value in members:
+            if isinstance(value, ControlBase):
+                controls[attr] = value
+            elif isinstance(value, Component):
+                components[attr] = value
+        controls.update(self._members.controls)
+        components.update(self._members.components)
+        return controls, components
 
     def add_control_subscribe(self, control_name: str,  control: ControlBase, control_event: str, func):
         """Add a control and subscribe to a control event in one method call. This is useful if you want to add controls and functionality to a Component outside of the Component class.
@@ -142,6 +321,14 @@ class Component(StateBase, EventObject):
         setattr(func, "event_path", event_path)
         setattr(self, func_name, func)
 
+    def listens_refresh_event(self, mask: int, func):
+        """Listen to OnRefresh flags outside of the Component class. See Component.listens_refresh().
+        If a lambda function is passed, it is attached to the component as "on_refresh_{mask}". Otherwise, the function name will be used.
+        """
+        func_name: str = f"on_refresh_{mask}" if func.__name__ == "<lambda>" else func.__name__
+        setattr(func, "refresh_mask", mask)
+        setattr(self, func_name, func)
+
     def activate(self):
         """Activate this Component and all its controls. This method also subscribes to all control events listed in the Component.subscribe(decorator, and register all functions decorated with Component.listens()) """
         if self.isChanged('active', True):
@@ -161,6 +348,8 @@ class Component(StateBase, EventObject):
             for event_path in observers:
                 for func in observers[event_path]:
                     self.global_event_object.subscribe(event_path, func)
+            for mask, func in self._wiring_plan()[2]:
+                RefreshDispatcher().subscribe(mask, func)
 
             # Activation Hook
             self.after_activate()
@@ -174,9 +363,10 @@ class Component(StateBase, EventObject):
             self.before_deactivate()
             self._control_unsubscribe()
             controls: list[Control] = self._get_controls()
+            retained = self.retained_controls
             for control_key in controls:
                 control: ControlBase = controls[control_key]
-                if control is not None:
+                if control is not None and control not in retained:
                     control.deactivate()
 
             # Unbind listener functions from event_path
@@ -184,6 +374,8 @@ class Component(StateBase, EventObject):
             for event_path in observers:
                 for func in observers[event_path]:
                     self.global_event_object.unsubscribe(event_path, func)
+            for mask, func in self._wiring_plan()[2]:
+                RefreshDispatcher().unsubscribe(func)
             
             # Deactivation Hook 
             self.after_deactivate()
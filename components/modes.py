@@ -29,6 +29,29 @@ class Mode(EventObject, StateBase):
             for component in self.components:
                 component.deactivate()
 
+    def switch_to(self, mode: 'Mode'):
+        """Switches from this mode to mode, touching only what differs between them. Components in both modes stay active and are not repainted.
+            Components only in this mode are deactivated, but controls that an active component of the next mode still owns are not reset or released.
+            Those controls are repainted once, by the component that takes them over."""
+        if not self.getValue('active'):
+            mode.activate()
+            return
+        leaving = [component for component in self.components if component not in mode.components]
+        kept_controls = set()
+        for component in mode.components:
+            kept_controls.update(component._get_controls().values())
+        self.isChanged('active', False)
+        for component in leaving:
+            component.retained_controls = kept_controls
+            try:
+                component.deactivate()
+            finally:
+                del component.retained_controls
+        # Components shared by both modes are already active, so activate() does nothing for them.
+        if mode.isChanged('active', True):
+            for component in mode.components:
+                component.activate()
+
 class ModesComponent(Component):
     """This class houses many Modes. It is used to implement different Modes for your controller. Use this along with Mode class and Components class to create different modes."""
     def __init__(self, name: str, cycle_control: Control = None, default_mode: str =None, *a, **k):
@@ -46,18 +69,10 @@ class ModesComponent(Component):
         """A dictionary of str, Mode. This attaches each mode to a string. The string can then be used to activate the mode."""
 
         self._controls = dict()
+        self._mode_callbacks = dict()
         self._active_mode: Mode = None
         self._previous_mode: Mode = None
 
-    def _get_components(self):
-        """Gets all controls on this Component instance"""
-        member_components = dict()
-        for attr in dir(self):
-            member_component = getattr(self, attr)
-            if isinstance(member_component, Component):
-                member_components[attr] = member_component
-        return member_components
-
     def add_mode(self, mode: Mode, behavior: str ='default'):
         """Add a mode to the collection"""
         self.modes[mode.name] = mode
@@ -76,9 +91,9 @@ class ModesComponent(Component):
         """Sets the active mode using the mode_name arg."""
         if self.isChanged('active_mode', mode_name):
             if self._active_mode:
-                self.__deactivate_current_mode()
-                self._previous_mode = self._active_mode
-            self.__activate_mode(mode_name)
+                self.__switch_mode(mode_name)
+            else:
+                self.__activate_mode(mode_name)
             self.fl.ui.setHintMsg('Active Mode: {}'.format(mode_name))
             self.notify('mode_changed', mode_name)
         else:
@@ -92,15 +107,24 @@ class ModesComponent(Component):
         if control is not None:
             control.set_light(self._active_mode.active_color)
 
-    def __deactivate_current_mode(self) -> None:
-        self._active_mode.deactivate()
-        control: Control = self._get_ctrl_from_mode_name(self._active_mode.name)
+    def __switch_mode(self, mode_name: str) -> None:
+        self._previous_mode = self._active_mode
+        self._active_mode = self.modes[mode_name]
+        self._previous_mode.switch_to(self._active_mode)
+        control: Control = self._get_ctrl_from_mode_name(self._previous_mode.name)
         if control is not None:
-            control.set_light(self._active_mode.inactive_color)
+            control.set_light(self._previous_mode.inactive_color)
+        control = self._get_ctrl_from_mode_name(mode_name)
+        if control is not None:
+            control.set_light(self._active_mode.active_color)
 
     def _generate_mode_name(self, mode_name: str):
-        def call_mode(*a, **k):
-            self._on_control_event(mode_name)
+        """Returns the control callback for mode_name. The callback is created once, so the same function is unsubscribed on deactivate."""
+        call_mode = self._mode_callbacks.get(mode_name)
+        if call_mode is None:
+            def call_mode(*a, **k):
+                self._on_control_event(mode_name)
+            self._mode_callbacks[mode_name] = call_mode
         return call_mode
 
     def activate(self) -> None:
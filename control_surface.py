@@ -1,34 +1,73 @@
-from .core.event import GlobalEventObject
+from .core.event import GlobalEventObject, RefreshFlags, RefreshDispatcher
 from .components.component import Component
 from .core.control_registry import ControlRegistry
 from .core.state import UIState
+from .core.output import MidiOutput
+from .core.timer import TimerWheel
+from .core.dirty import DirtyIndexes
+from .core.instrumentation import Instrumentation
+from .core.session import SessionRecorder
 from .api.fl_class import _fl
 
 class ControlSurface(Component):
-    def __init__(self, name: str,  meters: bool = False, *a, **k):
+    def __init__(self, name: str,  meters: bool = False, instrument: bool = False, *a, **k):
         super().__init__(name, *a, **k)
         self.meters = meters
         self.fl = _fl
         self.global_event_object = GlobalEventObject()
         self.control_registry = ControlRegistry()
         self.ui_state = UIState(self.global_event_object)
+        self.refresh_dispatcher = RefreshDispatcher()
+        """Calls the handlers subscribed to OnRefresh flags with a bitmask. See Component.listens_refresh()."""
+        self.refresh_dispatcher.bridge(self.global_event_object)
+        self.dirty_indexes = DirtyIndexes()
+        """Collects the dirty mixer tracks and channels until the refresh that follows them. See DirtyIndexes."""
+        self.midi_output = MidiOutput()
+        self.timers = TimerWheel()
+        self.instrumentation = Instrumentation()
+        """Records event and listener latencies when enabled. Pass instrument=True, or call self.instrumentation.enable(). The report is printed on OnDeInit."""
+        if instrument:
+            self.instrumentation.enable()
+        self.session_recorder: SessionRecorder = None
 
     def OnInit(self):
         self.activate()
+        self.midi_output.flush()
 
     def OnMidiMsg(self, event):
         self.control_registry.HandleMidiMsg(event)
 
     def OnIdle(self):
+        self.timers.advance()
         self.ui_state.HandleState()
+        self.midi_output.flush()
 
     def OnUpdateBeatIndicator(self, event):
         self.global_event_object.notify_listeners('beat', event)
         self.global_event_object.notify_listeners("OnUpdateBeatIndicator", event)
+        self.midi_output.flush()
 
     def OnDeInit(self):
         self.deactivate()
         self._blackout()
+        # There is no idle call after OnDeInit, so send everything now.
+        self.midi_output.flush(0)
+        if self.instrumentation.enabled:
+            self.instrumentation.dump()
+        self.stop_recording()
+
+    def start_recording(self, path: str, capacity: int = 4096) -> SessionRecorder:
+        """Records every MIDI message, refresh, full refresh, idle tick, beat, dirty track/channel and the OnDeInit this surface receives to a session log at path. Recording stops on OnDeInit.
+            Replay the log with core.session.SessionReplay."""
+        self.stop_recording()
+        self.session_recorder = SessionRecorder(path, capacity)
+        self.session_recorder.attach(self)
+        return self.session_recorder
+
+    def stop_recording(self) -> None:
+        if self.session_recorder is not None:
+            self.session_recorder.detach()
+            self.session_recorder = None
 
     def _blackout(self):
         components = self._get_components()
@@ -39,33 +78,8 @@ class ControlSurface(Component):
             controls[control].blackout()
         
     def OnRefresh(self, event):
-        on_refresh_event_flags :dict[int:str] = {
-            1: "HW_Dirty_Mixer_Sel",
-            2: "HW_Dirty_Mixer_Display",
-            4: "HW_Dirty_Mixer_Controls",
-            16: "HW_Dirty_RemoteLinks",
-            32: "HW_Dirty_FocusedWindow",
-            64: "HW_Dirty_Performance",
-            256: "HW_Dirty_LEDs",
-            512: "HW_Dirty_RemoteLinkValues",
-            1024: "HW_Dirty_Patterns",
-            2048: "HW_Dirty_Tracks",
-            4096: "HW_Dirty_ControlValues",
-            8192: "HW_Dirty_Colors",
-            16384: "HW_Dirty_Names",
-            32768: "HW_Dirty_ChannelRackGroup",
-            65536: "HW_ChannelEvent",
-        }
-        events: list[str] = []
-        for i in range(16):
-            bit_position = 1 << i
-            event_flag = event & bit_position
-            event_name = on_refresh_event_flags.get(event_flag)
-            if event_name is not None:
-                events.append(event_name)
-        for event_name in events:
-            self.global_event_object.notify_listeners(event_name, event)
-        self.global_event_object.notify_listeners('OnRefresh', event)
+        self.refresh_dispatcher.dispatch(event)
+        self.ui_state.HandleRefresh(event)
 
     def OnUpdateMeters(self):
         self.global_event_object.notify_listeners('OnUpdateMeters')
@@ -75,6 +89,8 @@ class ControlSurface(Component):
 
     def OnDoFullRefresh(self):
         self.global_event_object.notify_listeners("OnDoFullRefresh")
+        self.refresh_dispatcher.dispatch(RefreshFlags.ALL)
+        self.ui_state.HandleRefresh(RefreshFlags.ALL)
 
     def OnDisplayZone(self):
         self.global_event_object.notify_listeners("OnDisplayZone")
@@ -83,9 +99,11 @@ class ControlSurface(Component):
         self.global_event_object.notify_listeners("OnUpdateLiveMode", lastTrack)
 
     def OnDirtyMixerTrack(self, index: int):
+        self.dirty_indexes.mixer_tracks.mark(index)
         self.global_event_object.notify_listeners("OnDirtyMixerTrack", index)
 
     def OnDirtyChannel(self, index: int, flag: int):
+        self.dirty_indexes.channels.mark(index, flag)
         self.global_event_object.notify_listeners("OnDirtyChannel", index, flag)
 
     def OnFirstConnect(self):
@@ -97,14 +115,6 @@ class ControlSurface(Component):
     def OnSendTempMsg(self, message: str, duration: int):
         self.global_event_object.notify_listeners("OnSendTempMsg", message, duration)
 
-    def _get_components(self) -> dict[str, Component]:
-        components : dict[str, Component] = dict()
-        for attr in dir(self):
-            component = getattr(self, attr)
-            if isinstance(component, Component):
-                components[attr] = component
-        return components
-
     def activate(self) -> None:
         """Activates this control surface and all member components of this control surface where component.auto_active = True"""
         super().activate()
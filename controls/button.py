@@ -1,6 +1,7 @@
 # from ..util.midi import MIDI_STATUS
 from ..util.midi import MIDI_STATUS
 from ..api.fl_class import flMidiMsg
+from ..core.timer import TimerWheel, Timer
 from .control import Control
 
 class ButtonControl(Control):
@@ -18,7 +19,7 @@ class ButtonControl(Control):
         default_color (str, optional): The default color of the button control. Defaults to 'Default'.
         blackout_color (str, optional): The blackout color of the button control. Defaults to 'Off'.
         skin (any, optional): The skin of the button control. Defaults to None.
-        hold_time (int, optional): The hold time in milliseconds for the button control. Defaults to 10.
+        hold_time (int, optional): The hold time in milliseconds for the button control. Defaults to 500.
 
     Attributes:
         isToggled (bool): Whether the button control is toggled.
@@ -26,6 +27,8 @@ class ButtonControl(Control):
         isPressed (bool): Whether the button control is currently pressed.
 
     """
+    __slots__ = ('on_color', 'default_feedback', '_toggled', '_pressed', '_released', '_hold', '_hold_timer', 'hold_time', 'timers')
+
     class Events:
         """
         Represents the events generated by the Button control.
@@ -81,7 +84,7 @@ class ButtonControl(Control):
         default_color='DEFAULT', 
         blackout_color='OFF', 
         skin=None,
-        hold_time=10, *a, **k):
+        hold_time=500, *a, **k):
         """
         Initializes a new instance of the ButtonControl class.
 
@@ -96,7 +99,7 @@ class ButtonControl(Control):
             default_color (str, optional): The default color of the button control. Defaults to 'Default'.
             blackout_color (str, optional): The blackout color of the button control. Defaults to 'Off'.
             skin (any, optional): The skin of the button control. Defaults to None.
-            hold_time (int, optional): The hold time in milliseconds for the button control. Defaults to 10.
+            hold_time (int, optional): The hold time in milliseconds for the button control. Defaults to 500.
 
         """
         super().__init__(name, channel, identifier, playable, status,
@@ -106,8 +109,9 @@ class ButtonControl(Control):
         self._toggled = False
         self._pressed = False
         self._hold = False
-        self._hold_counter = 0
+        self._hold_timer: Timer = None
         self.hold_time = hold_time
+        self.timers: TimerWheel = TimerWheel()
 
     @property
     def isToggled(self):
@@ -116,19 +120,27 @@ class ButtonControl(Control):
         """
         return self._toggled
 
-    def _on_idle(self):
+    def _arm_hold(self, pressed: bool):
+        """
+        Arms the hold timer on press. On release the timer is cancelled, and hold is reset if it had fired.
+
+        Args:
+            pressed (bool): Whether the button control is pressed.
+
         """
-        Handles the idle event of the button control.
+        self.timers.cancel(self._hold_timer)
+        self._hold_timer = None
+        if pressed:
+            self._hold_timer = self.timers.call_later(self.hold_time, self._on_hold_timer)
+        elif self._hold:
+            self._set_hold(False)
+
+    def _on_hold_timer(self):
+        """
+        Called by the timer wheel when the button control has been pressed for hold_time milliseconds.
         """
-        if self._pressed:
-            self.hold_counter += 1
-            if self.hold_counter > self.hold_time:
-                if self.isChanged('_hold', True):
-                    self._set_hold(True)
-        else:
-            self.hold_counter = 0
-            if self.isChanged('_hold', False):
-                self._set_hold(False)
+        self._hold_timer = None
+        self._set_hold(True)
 
     def _set_hold(self, hold):
         """
@@ -148,16 +160,13 @@ class ButtonControl(Control):
         """
         return self._hold
 
-    def activate(self):
+    def deactivate(self):
         """
-        Activates the button control.
-
-        Returns:
-            bool: True if the activation is successful, False otherwise.
-
+        Deactivates the button control and cancels a pending hold.
         """
-        self.event_object.subscribe('idle', self._on_idle)
-        return super().activate()
+        self.timers.cancel(self._hold_timer)
+        self._hold_timer = None
+        return super().deactivate()
 
     @property
     def isPressed(self) -> bool:
@@ -229,6 +238,9 @@ class ButtonControl(Control):
         for event in events:
             setattr(self, '_{}'.format(event), events[event])
             self.notify(event, events[event])
+        pressed = events.get(ButtonControl.Events.PRESSED)
+        if pressed is not None:
+            self._arm_hold(pressed)
 
     def __str__(self) -> str:
         return f"{self.name} {self.status}:{self.channel}:{self.identifier}"
@@ -1,6 +1,7 @@
-from .control import ControlBase, Control
+from .control import ControlBase, Control, value_of
 from ..api.fl_class import flMidiMsg
 from ..util.midi import MIDI_STATUS
+from ..core.timer import TimerWheel, Timer
 from .button import ButtonControl
 from .jog_control import JogControl
 from .fader import FaderControl
@@ -8,9 +9,35 @@ from .knob import KnobControl
 from .encoder import EncoderControl
 
 class CC(ControlBase):
+    __slots__ = ()
+
     def __init__(self, name: str, channel: int, identifier: int, status=MIDI_STATUS.NOTE_ON_STATUS, playable=False, *a, **k):
         super().__init__(name, channel, identifier, status, playable, *a, **k)
 
+def _button_events(combo: 'ComboControl', event_data: flMidiMsg) -> dict:
+    return ButtonControl.generate_button_events(combo.primary_control.status, event_data)
+
+def _jog_events(combo: 'ComboControl', event_data: flMidiMsg) -> dict:
+    control: JogControl = combo.primary_control
+    return JogControl.generate_jog_events(control.status, control.inc_value, control.dec_value, event_data, control.mode)
+
+def _fader_events(combo: 'ComboControl', event_data: flMidiMsg) -> dict:
+    return FaderControl.generate_event(event_data)
+
+def _knob_events(combo: 'ComboControl', event_data: flMidiMsg) -> dict:
+    # The direction is tracked by the combo, so modified messages do not move the direction of the primary knob.
+    value = value_of(event_data)
+    direction = (value > combo.prev_value) - (value < combo.prev_value)
+    combo.prev_value = value
+    return KnobControl.knob_events(value, direction)
+
+def _encoder_events(combo: 'ComboControl', event_data: flMidiMsg) -> dict:
+    control: EncoderControl = combo.primary_control
+    return EncoderControl.generate_encoder_events(control.status, control.inc_value, control.dec_value, event_data, control.mode)
+
+def _no_events(combo: 'ComboControl', event_data: flMidiMsg) -> dict:
+    return {}
+
 class ComboControl(ControlBase):
     """
     Represents a combo control that combines a primary control with a modifier button.
@@ -31,18 +58,31 @@ class ComboControl(ControlBase):
         _toggled (bool): Flag indicating if the combo control is toggled.
         _pressed (bool): Flag indicating if the combo control is pressed.
         _hold (bool): Flag indicating if the combo control is being held.
-        _hold_counter (int): Counter for hold duration.
-        hold_time (int): The duration threshold for a hold event.
+        _hold_timer (Timer): Pending hold timer while a button primary control is pressed.
+        hold_time (int): The hold time in milliseconds. Defaults to 500.
 
     Methods:
         _on_modifier_button_event(event_data): Handles the modifier button event.
         _set_jogged(value): Sets the jogged value and notifies subscribers.
         _on_modified_primary_value(event_data): Handles the modified primary value event.
+        register_strategy(control_type, strategy): Registers the event generation of a control type.
         activate(): Activates the combo control.
 
     """
-
-    def __init__(self, name: str, primary_control: Control, modifier_button: ButtonControl, modifier_button_event: str = 'pressed', *a, **k):
+    # The events of the primary control are mirrored as attributes, like _unit_value. They are stored in the instance __dict__.
+    __slots__ = ('primary_control', 'modifier_button', 'modifier_button_event', '_generate_events', 'prev_value', '_toggled', '_pressed', '_hold', '_hold_timer', 'hold_time', 'timers')
+
+    strategies: dict = {
+        ButtonControl: _button_events,
+        JogControl: _jog_events,
+        FaderControl: _fader_events,
+        KnobControl: _knob_events,
+        EncoderControl: _encoder_events,
+    }
+    """Control type -> strategy(combo, event_data) that returns the events of a modified message as a dict. Primary controls use the strategy of their nearest registered class.
+    Each ComboControl subclass that registers a strategy gets its own copy of this table, so the registration only applies to that subclass and its subclasses."""
+
+    def __init__(self, name: str, primary_control: Control, modifier_button: ButtonControl, modifier_button_event: str = 'pressed', hold_time: int = 500, *a, **k):
         super(ComboControl, self).__init__(name, modifier_button.channel, modifier_button.identifier, status=primary_control.status, *a, **k)
         self.name: str = name
         self.channel: int = primary_control.channel
@@ -50,11 +90,39 @@ class ComboControl(ControlBase):
         self.primary_control: Control = primary_control
         self.modifier_button: ButtonControl = modifier_button
         self.modifier_button_event: str = modifier_button_event
+        self._generate_events = type(self).resolve_strategy(primary_control)
+        """Strategy of the primary control, resolved once here."""
+        self.prev_value: int = 0
+        """Last value of a knob primary control received through the combo. Used for the direction event."""
         self._toggled: bool = False
         self._pressed: bool = False
         self._hold: bool = False
-        self._hold_counter: int = 0
-        self.hold_time: int = 10
+        self._hold_timer: Timer = None
+        self.hold_time: int = hold_time
+        self.timers: TimerWheel = TimerWheel()
+
+    @classmethod
+    def register_strategy(cls, control_type: type, strategy) -> None:
+        """
+        Registers the event generation of a control type, so combo controls built on it emit its events while the modifier is engaged.
+        Register before the combo controls are created, they resolve their strategy when constructed.
+
+        Args:
+            control_type (type): The class of the primary control.
+            strategy (callable): strategy(combo, event_data) returning a dict of event name to value. The primary control is combo.primary_control.
+        """
+        if 'strategies' not in cls.__dict__:
+            cls.strategies = dict(cls.strategies)
+        cls.strategies[control_type] = strategy
+
+    @classmethod
+    def resolve_strategy(cls, control: Control):
+        """Returns the strategy of the nearest registered class of control, or one that generates no events."""
+        for control_type in type(control).__mro__:
+            strategy = cls.strategies.get(control_type)
+            if strategy is not None:
+                return strategy
+        return _no_events
 
     def __str__(self) -> str:
         return f"{self.name} {self.status}:{self.channel}:{self.identifier}"
@@ -95,9 +163,30 @@ class ComboControl(ControlBase):
         self.notify('jogged', value)
         self.notify('inc', value) if value else self.notify('dec', value)
 
+    def _arm_hold(self, pressed: bool):
+        """
+        Arms the hold timer on press. On release the timer is cancelled, and hold is reset if it had fired.
+
+        Args:
+            pressed (bool): Whether the primary control is pressed.
+        """
+        self.timers.cancel(self._hold_timer)
+        self._hold_timer = None
+        if pressed:
+            self._hold_timer = self.timers.call_later(self.hold_time, self._on_hold_timer)
+        elif self._hold:
+            self._hold = False
+            self.notify('hold', False)
+
+    def _on_hold_timer(self):
+        self._hold_timer = None
+        self._hold = True
+        self.notify('hold', True)
+
     def _on_modified_primary_value(self, event_data: flMidiMsg):
         """
-        Handles the modified primary value event.
+        Handles the modified primary value event. The events are generated by the strategy of the primary control and mirrored as attributes, like _unit_value.
+        A pressed event arms the hold timer.
 
         Args:
             event_data (flMidiMsg): The event data containing the MIDI message.
@@ -105,36 +194,13 @@ class ComboControl(ControlBase):
         Returns:
             None
         """
-        if isinstance(self.primary_control, JogControl):
-            events = JogControl.generate_jog_events(
-                self.primary_control.status, self.primary_control.inc_value, self.primary_control.dec_value, event_data)
-            for event in events:
-                self.notify(event, events[event])
-
-        elif isinstance(self.primary_control, ButtonControl):
-            button_events = ButtonControl.generate_button_events(
-                self.primary_control.status, event_data)
-            for event in button_events:
-                setattr(self, '_{}'.format(event), button_events[event])
-                self.notify(event, button_events[event])
-
-        elif isinstance(self.primary_control, FaderControl):
-            events = FaderControl.generate_event(event_data)
-            for event in events:
-                setattr(self, '_{}'.format(event), events[event])
-                self.notify(event, events[event])
-
-        elif isinstance(self.primary_control, KnobControl):
-            events = KnobControl.generate_event(event_data)
-            for event in events:
-                setattr(self, '_{}'.format(event), events[event])
-                self.notify(event, events[event])
-
-        elif isinstance(self.primary_control, EncoderControl):
-            events = EncoderControl.generate_encoder_events(event_data)
-            for event in events:
-                setattr(self, '_{}'.format(event), events[event])
-                self.notify(event, events[event])
+        events = self._generate_events(self, event_data)
+        for event in events:
+            setattr(self, '_' + event, events[event])
+            self.notify(event, events[event])
+        pressed = events.get(ButtonControl.Events.PRESSED)
+        if pressed is not None:
+            self._arm_hold(pressed)
 
     def activate(self):
         """
@@ -150,6 +216,8 @@ class ComboControl(ControlBase):
         return super().activate()
 
     def deactivate(self):
+        self.timers.cancel(self._hold_timer)
+        self._hold_timer = None
         self.modifier_button.deactivate()
         self.event_object.unsubscribe(
             "{}.{}".format(self.name, "value"), self._on_modified_primary_value
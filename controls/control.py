@@ -1,18 +1,31 @@
 from ..core.control_registry import ControlRegistry
 from ..util.midi import MIDI_STATUS
 from ..core.skin import SkinColor
-from ..core.event import EventObject, GlobalEventObject
+from ..core.event import EventObject, GlobalEventObject, EventHandle
 from ..core.state import StateBase
+from ..core.output import MidiOutput
+from .input_filter import InputFilter
 from uuid import uuid4
-import device
+import weakref
 
 class ControlBase(EventObject, StateBase):
-    """This class is the base class for the control object. It has the methods that should be implemented by any control the inherits from it. It is not to be used directly."""
+    """This class is the base class for the control object. It has the methods that should be implemented by any control the inherits from it. It is not to be used directly.
+        Controls use __slots__, and the observers and state dicts are only allocated when they are first used, because a surface can have hundreds of controls.
+        EventObject and StateBase keep an instance __dict__ for their own subclasses, so controls have one too, but it stays empty unless an attribute without a slot is set."""
+    __slots__ = ('_uuid', '_priority', 'name', 'status', 'channel', 'identifier', 'playable', 'observers', '_handle_watchers', '_state', '_event_handles')
+    _lazy_attributes: dict = {'observers': dict, '_handle_watchers': list, '_state': dict, '_event_handles': dict}
+    """Slots that are allocated on first read, with the type they are created with."""
+    device: MidiOutput = MidiOutput()
+    """This is the FL Studio device module, behind the global MidiOutput queue. It allows you to send midi messages directly from the control. Messages are diffed and sent on the next flush."""
+    event_object: GlobalEventObject = GlobalEventObject()
+    """Global Event Object"""
+    registry: ControlRegistry = ControlRegistry()
+    """Global Control Registry"""
+
     def __init__(self, name: str, channel: int, identifier: int, status=MIDI_STATUS.NOTE_ON_STATUS, playable=False, *a, **k):
-        super(ControlBase, self).__init__(*a, **k)
-        self.uuid: str = str(uuid4())
-        self.device = device
-        """This is the FL Studio device module. It allows you to send midi messages directly from the control."""
+        # EventObject and StateBase are not initialized here. Their dicts are created by __getattr__ on first use.
+        self._uuid: str = None
+        self._priority: int = 0
         self.name: str = name
         """Name of the control. Must be unique. The name of the control is used to identify and subscribe to events generated by the control."""
         self.status: int = status
@@ -25,16 +38,45 @@ class ControlBase(EventObject, StateBase):
         Example: identifier=0, "This would note C0" """
         self.playable: bool = playable
         """Is this control playable. This will determine if the values sent by this control are forwarded into FL Studio for playing devices."""
-        self.event_object: GlobalEventObject = GlobalEventObject()
-        """Global Event Object"""
-        self.registry: ControlRegistry = ControlRegistry()
-        """Global Control Registry"""
 
+    def __getattr__(self, name: str):
+        # Only called for attributes that are not set, so allocated slots never get here.
+        factory = ControlBase._lazy_attributes.get(name)
+        if factory is None:
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+        value = factory()
+        object.__setattr__(self, name, value)
+        return value
+
+    @property
+    def priority(self) -> int:
+        """Layer of the control in the registry. When several active controls share a MIDI message, the one with the highest priority receives it, and among equal priorities the one registered last.
+            Give overlay controls, like a shift layer, a higher priority than the controls they cover. Defaults to 0."""
+        return self._priority
+
+    @priority.setter
+    def priority(self, priority: int):
+        self._priority = priority
+        self.registry.set_priority(self, priority)
+
+    @property
+    def uuid(self) -> str:
+        """Unique id of the control. It is generated the first time it is read."""
+        if self._uuid is None:
+            self._uuid = str(uuid4())
+        return self._uuid
+
+    def event_handle(self, event_name: str) -> EventHandle:
+        """Returns the EventHandle for an event of this control. The event_id is prefixed with the name of the control once, and the handle is cached on the control."""
+        handle = self._event_handles.get(event_name)
+        if handle is None:
+            handle = self.event_object.handle('{}.{}'.format(self.name, event_name))
+            self._event_handles[event_name] = handle
+        return handle
 
     def notify(self, event_name: str, *a, **k):
         """Alias convenience method for self.event_object.notify_listeners. Calling this method automatically prefixed the event name with the name of the control."""
-        self.event_object.notify_listeners(
-            '{}.{}'.format(self.name, event_name), *a, **k)
+        self.event_handle(event_name).emit(*a, **k)
 
     def broadcast(self, event_name: str, *a, **k):
         """Alias convenience method for self.event_object.notify_listeners. Calling this method send a notification without prefixing the controller's name to the front."""
@@ -66,6 +108,8 @@ class ControlBase(EventObject, StateBase):
 # TODO: Do a better job at implementing default_feedback. It needs to be on a per/component basis. Maybe  the component can look for a default_feedback attribute on the control and use that to register auto functions for feedback.
 class Control(ControlBase):
     """This is the actual control Class. Inherit from this class when building your own controls if necessary. This is also the class from which the included controls are derived."""
+    __slots__ = ('_skin', 'feedback', 'feedback_process', 'default_color', 'blackout_color', 'input_filter')
+
     def __init__(self, name, channel, identifier, playable=False, status=MIDI_STATUS.NOTE_ON_STATUS, feedback=False, feedback_process=None, default_color='Default', blackout_color='Off', skin=None):
         super(Control, self).__init__(name, channel, identifier, status, playable)
         self._skin = skin
@@ -78,6 +122,8 @@ class Control(ControlBase):
         """This is the default color for the control. When it is activated, it will be set to this color if skin and default_color are provided."""
         self.blackout_color = blackout_color
         """This is the blackout color for the control. Can be called to blackout the control."""
+        self.input_filter: InputFilter = None
+        """Filters the values of the control before they reach any listener. See set_input_filter()."""
         self.registry.register_control(self)
 
     def _on_value(self, event):
@@ -108,10 +154,22 @@ class Control(ControlBase):
         It unregisters the control from the Global Control Registry and unsubscribes from its own "value" events.
         """
         self.reset()
+        if self.input_filter is not None:
+            self.input_filter.reset()
         self.event_object.unsubscribe("{}.value".format(self.name), self._on_value)
         self.registry.deactivate_control(self)
         self.isChanged('active', False)
 
+    def set_input_filter(self, input_filter: InputFilter):
+        """
+        Sets the InputFilter of the control, or removes it with None. Use it on knobs and faders to drop repeated and jittering values, snap a deadzone and limit the emit rate.
+        Example: knob.set_input_filter(InputFilter(hysteresis=1, max_rate=50))
+        """
+        if self.input_filter is not None:
+            self.input_filter.reset()
+        self.input_filter = input_filter
+        self.registry.update_control(self)
+
     def set_light(self, value, *a, **k):
         """
         Method to send a color to the control by "value". A skin must be provided to the control for set_light to function.
@@ -128,9 +186,66 @@ class Control(ControlBase):
         """Resets the control to its default color"""
         self.set_light(self.default_color)
     
-    def __del__(self):
-        self.registry.unregister_control(self)
-    
     def blackout(self):
         """Turns the control off"""
         self.set_light(self.blackout_color)
+
+
+def value_of(event) -> int:
+    """Returns data2 of a MIDI message as an int, or 0 if it has none."""
+    try:
+        return int(event.data2)
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+class DerivedEventControl(Control):
+    """Base class for controls that publish events derived from each message, like the unit value of a knob.
+        Only the derived events that have listeners are computed. The first message after a listener is added or removed compiles an emit function for the control, through _compile_emit(), which only does the work for the events that are listened to.
+    """
+    __slots__ = ('_emit', '_watcher')
+
+    def __init__(self, *a, **k):
+        super(DerivedEventControl, self).__init__(*a, **k)
+        self._emit = None
+        self._watcher = None
+
+    def _create_watcher(self):
+        """Returns the handle watcher of this control. It resets the emit function of this control only, so controls that share handles, because they share a name, are all recompiled."""
+        # The handles are global, so the watcher only holds the control weakly, and leaves the handles when the control is collected.
+        watched: list[EventHandle] = []
+        def on_collected(ref):
+            for handle in watched:
+                handle.remove_watcher(watcher)
+        control_ref = weakref.ref(self, on_collected)
+        def watcher(handle: EventHandle):
+            control = control_ref()
+            if control is not None:
+                control._emit = None
+        watcher.watched = watched
+        return watcher
+
+    def _derived_handles(self, event_names) -> dict[str, EventHandle]:
+        """Returns the handles of event_names that have listeners, by event name. Adding a listener to or removing one from any of the events makes the next message recompile the emit function."""
+        watcher = self._watcher
+        if watcher is None:
+            watcher = self._watcher = self._create_watcher()
+        handles = dict()
+        for event_name in event_names:
+            handle = self.event_handle(event_name)
+            if watcher not in handle.watchers:
+                handle.add_watcher(watcher)
+                watcher.watched.append(handle)
+            if handle:
+                handles[event_name] = handle
+        return handles
+
+    def _compile_emit(self):
+        """Override Method: Inheriting classes should override this method. Returns the function that publishes the derived events of a message. The default publishes nothing."""
+        return lambda event: None
+
+    def _on_value(self, event):
+        emit = self._emit
+        if emit is None:
+            emit = self._emit = self._compile_emit()
+        emit(event)
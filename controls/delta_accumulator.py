@@ -0,0 +1,43 @@
+"""delta_accumulator.py: This module contains the delta accumulator of relative controls. It adds up the detents of a jog wheel or encoder and delivers them once per tick.
+"""
+from ..core.timer import TimerWheel, Timer
+
+
+class DeltaAccumulator(object):
+    """Adds up the signed deltas of a relative control, like a jog wheel or encoder, and delivers their sum once per tick.
+        The first delta of a tick schedules a flush on the TimerWheel, which ControlSurface advances in OnIdle. The flush calls deliver(n) with the sum, so a fast spin of ten detents costs one delivery of 10 instead of ten of 1.
+        Deltas that cancel out in the same tick deliver nothing.
+        A DeltaAccumulator keeps the state of one control, so every control needs its own.
+
+    Args:
+        deliver (callable): Called with the summed delta on every flush.
+    """
+    __slots__ = ('deliver', 'delta', '_timer', 'timers')
+
+    def __init__(self, deliver) -> None:
+        self.deliver = deliver
+        self.delta: int = 0
+        """Sum of the deltas since the last flush."""
+        self._timer: Timer = None
+        self.timers: TimerWheel = TimerWheel()
+
+    def add(self, delta: int) -> None:
+        """Adds delta to the sum, and schedules the flush if it is the first delta of this tick."""
+        self.delta += delta
+        if self._timer is None:
+            self._timer = self.timers.call_later(0, self.flush)
+
+    def flush(self) -> None:
+        """Delivers the summed delta now, if it is not 0."""
+        self.timers.cancel(self._timer)
+        self._timer = None
+        delta = self.delta
+        self.delta = 0
+        if delta:
+            self.deliver(delta)
+
+    def reset(self) -> None:
+        """Drops the summed delta without delivering it."""
+        self.timers.cancel(self._timer)
+        self._timer = None
+        self.delta = 0
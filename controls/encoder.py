@@ -1,11 +1,13 @@
-from .control import Control
+from .control import DerivedEventControl
 from ..util.midi import MIDI_STATUS
 from ..api.fl_class import flMidiMsg
+from .delta_accumulator import DeltaAccumulator
+from .relative import RelativeMode, Acceleration, decode_relative
 
 
-class EncoderControl(Control):
+class EncoderControl(DerivedEventControl):
     """
-    Represents an encoder control that can generate events based on MIDI input.
+    Represents an encoder control that can generate events based on MIDI input. Only the events that have listeners are emitted.
 
     Args:
         name (str): The name of the control.
@@ -20,7 +22,12 @@ class EncoderControl(Control):
         default_color (str, optional): The default color of the control. Defaults to 'Default'.
         blackout_color (str, optional): The color when the control is in blackout mode. Defaults to 'Off'.
         skin (any, optional): The skin for the control. Defaults to None.
+        accumulate (bool, optional): Add up the detents of each tick and emit them once, see DeltaAccumulator. Defaults to False.
+        mode (int, optional): The RelativeMode data2 is encoded in. Defaults to RelativeMode.INC_DEC, which only knows inc_value and dec_value.
+        acceleration (Acceleration, optional): Scales the steps by how fast the control turns. Defaults to None.
     """
+    __slots__ = ('inc_value', 'dec_value', 'accumulator', 'mode', 'acceleration')
+
     class Events:
         """
         Represents the events generated by the encoder control.
@@ -34,7 +41,7 @@ class EncoderControl(Control):
         JOG: str = 'jog'
         """Jog event."""
     @staticmethod
-    def generate_encoder_events(status, inc_value, dec_value, event_data: flMidiMsg):
+    def generate_encoder_events(status, inc_value, dec_value, event_data: flMidiMsg, mode: int = RelativeMode.INC_DEC):
         """
         Generates events based on the MIDI input data.
 
@@ -43,41 +50,97 @@ class EncoderControl(Control):
             inc_value (int): The MIDI value for incrementing the control.
             dec_value (int): The MIDI value for decrementing the control.
             event_data (flMidiMsg): The MIDI message data.
+            mode (int, optional): The RelativeMode data2 is encoded in. Defaults to RelativeMode.INC_DEC.
 
         Returns:
-            dict: A dictionary containing the generated events.
+            dict: A dictionary containing the generated events. inc and dec carry the size of the step, jog the signed step.
         """
         events: dict[str: any] = dict()
         if event_data.status == status:
-            if event_data.data2 == inc_value:
-                events[EncoderControl.Events.INC] = True
+            delta = decode_relative(event_data.data2, mode, inc_value, dec_value)
+            if delta > 0:
+                events[EncoderControl.Events.INC] = delta
                 events[EncoderControl.Events.JOGGED] = True
-                events[EncoderControl.Events.JOG] = 1
-            if event_data.data2 == dec_value:
-                events[EncoderControl.Events.DEC] = True
+                events[EncoderControl.Events.JOG] = delta
+            elif delta < 0:
+                events[EncoderControl.Events.DEC] = -delta
                 events[EncoderControl.Events.JOGGED] = False
-                events[EncoderControl.Events.JOG] = -1
+                events[EncoderControl.Events.JOG] = delta
 
         return events
 
-    def __init__(self, name: str, channel: int, identifier: int, status: int = MIDI_STATUS.CC_STATUS, inc_value: int = 1, dec_value: int = 127, playable=False, feedback=False, feedback_process=None, default_color='Default', blackout_color='Off', skin=None):
+    def __init__(self, name: str, channel: int, identifier: int, status: int = MIDI_STATUS.CC_STATUS, inc_value: int = 1, dec_value: int = 127, playable=False, feedback=False, feedback_process=None, default_color='Default', blackout_color='Off', skin=None, accumulate: bool = False, mode: int = RelativeMode.INC_DEC, acceleration: Acceleration = None):
         super().__init__(name, channel, identifier, playable, status,
                          feedback, feedback_process, default_color, blackout_color, skin)
         self.inc_value = inc_value
         self.dec_value = dec_value
         self.status = status
+        self.accumulator: DeltaAccumulator = DeltaAccumulator(self._deliver_delta) if accumulate else None
+        """Set when the control accumulates its detents. None emits every detent."""
+        self.mode: int = mode
+        self.acceleration: Acceleration = acceleration
 
-    def _on_value(self, event_data: flMidiMsg):
-        """
-        Handles the MIDI value change event.
+    def decode(self, value: int) -> int:
+        """Returns the signed step of a data2 value, scaled by the acceleration. 0 if the value is not a step."""
+        delta = decode_relative(value, self.mode, self.inc_value, self.dec_value)
+        if delta and self.acceleration is not None:
+            delta = self.acceleration.apply(delta)
+        return delta
 
-        Args:
-            event_data (flMidiMsg): The MIDI message data.
+    def _compile_emit(self):
+        """
+        Returns the function that emits the listened to events for a step message.
+        The registry only dispatches messages of this control's status and channel here, so only data2 is decoded.
         """
-        events = EncoderControl.generate_encoder_events(
-            self.status, self.inc_value, self.dec_value, event_data)
-        for event in events:
-            self.notify(event, events[event])
+        events = EncoderControl.Events
+        handles = self._derived_handles((events.INC, events.DEC, events.JOGGED, events.JOG))
+        if not handles:
+            return lambda event_data: None
+        decode = self.decode
+
+        accumulator = self.accumulator
+        if accumulator is not None:
+            def accumulate(event_data: flMidiMsg):
+                delta = decode(event_data.data2)
+                if delta:
+                    accumulator.add(delta)
+            return accumulate
+
+        inc = handles.get(events.INC)
+        dec = handles.get(events.DEC)
+        jogged = handles.get(events.JOGGED)
+        jog = handles.get(events.JOG)
+
+        def emit(event_data: flMidiMsg):
+            delta = decode(event_data.data2)
+            if not delta:
+                return
+            if delta > 0:
+                if inc is not None:
+                    inc.emit(delta)
+            elif dec is not None:
+                dec.emit(-delta)
+            if jogged is not None:
+                jogged.emit(delta > 0)
+            if jog is not None:
+                jog.emit(delta)
+        return emit
+
+    def _deliver_delta(self, delta: int):
+        """Emits the accumulated detents of one tick once: inc or dec with the number of detents, jogged, and jog with the signed sum."""
+        if delta > 0:
+            self.notify(EncoderControl.Events.INC, delta)
+        else:
+            self.notify(EncoderControl.Events.DEC, -delta)
+        self.notify(EncoderControl.Events.JOGGED, delta > 0)
+        self.notify(EncoderControl.Events.JOG, delta)
+
+    def deactivate(self):
+        if self.accumulator is not None:
+            self.accumulator.reset()
+        if self.acceleration is not None:
+            self.acceleration.reset()
+        super().deactivate()
 
     def __str__(self) -> str:
         return f"{self.name} {self.status}:{self.channel}:{self.identifier}"
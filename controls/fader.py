@@ -1,10 +1,11 @@
-from .control import Control
+from .control import DerivedEventControl, value_of
 from ..util.midi import MIDI_STATUS
 from ..api.fl_class import flMidiMsg
 
-class FaderControl(Control):
+class FaderControl(DerivedEventControl):
     """
     This control type is for faders on your MIDI controller. It accepts the same parameters as the base Control Type, but emits special events along with the value of the fader.
+    Only the events that have listeners are computed and emitted.
 
     Events:
         - **unit_value**: This event is emitted with the fader position represented as a float from 0 - 1.0.
@@ -13,6 +14,8 @@ class FaderControl(Control):
         - **symmetry_value**: This event is emitted with the fader position represented in symmetry from -64 to 64.
         - **symmetry_unit_value**: This event is emitted with the fader position represented in symmetry from -1.0 to 1.0.
     """
+    __slots__ = ()
+
     class Events:
         """
         Represents the events generated by the Fader control.
@@ -27,6 +30,16 @@ class FaderControl(Control):
         """Fader symmetry value event."""
         SYMMETRY_UNIT_VALUE: str = 'symmetry_unit_value'
         """Fader symmetry unit value event."""
+
+    DERIVED_EVENTS: dict = {
+        Events.UNIT_VALUE: lambda value: value / 127,
+        Events.INVERSE_VALUE: lambda value: 127 - value,
+        Events.INVERSE_UNIT_VALUE: lambda value: (127 - value) / 127,
+        Events.SYMMETRY_VALUE: lambda value: value - 64,
+        Events.SYMMETRY_UNIT_VALUE: lambda value: (value - 64) / 64,
+    }
+    """Event name to the function deriving it from the fader value, in emit order."""
+
     @staticmethod
     def generate_event(event_data: flMidiMsg) -> dict[str, any]:
         """
@@ -37,29 +50,28 @@ class FaderControl(Control):
         :return: A dictionary of generated events.
         :rtype: dict[str, any]
         """
-        events: dict[str, any] = dict()
-        value: int = 0
-        try:
-            value = int(event_data.data2)
-        except:
-            value = 0
-
-        events[FaderControl.Events.UNIT_VALUE] = value / 127
-        events[FaderControl.Events.INVERSE_VALUE] = 127 - value
-        events[FaderControl.Events.INVERSE_UNIT_VALUE] = (127 - value) / 127
-        events[FaderControl.Events.SYMMETRY_VALUE] = value - 64
-        events[FaderControl.Events.SYMMETRY_UNIT_VALUE] = (value - 64) / 64
-
-        return events
+        value: int = value_of(event_data)
+        return {event: derive(value) for event, derive in FaderControl.DERIVED_EVENTS.items()}
     def __init__(self, name: str, channel: int, identifier: int, status: int = MIDI_STATUS.CC_STATUS, playable=False, feedback=False, feedback_process=None, default_color='Default', blackout_color='Off', skin=None):
         super().__init__(name, channel, identifier, playable, status,
                          feedback, feedback_process, default_color, blackout_color, skin)
 
-    def _on_value(self, e):
-        events: dict = FaderControl.generate_event(e)
-        for event in events:
-            setattr(self, "_{}".format(event), events[event])
-            self.notify(event, events[event])
+    def _compile_emit(self):
+        handles = self._derived_handles(FaderControl.DERIVED_EVENTS)
+        outputs = tuple((handles[event], derive) for event, derive in FaderControl.DERIVED_EVENTS.items() if event in handles)
+        if not outputs:
+            return lambda event: None
+        if len(outputs) == 1:
+            (handle, derive), = outputs
+            def emit(event):
+                handle.emit(derive(value_of(event)))
+            return emit
+
+        def emit(event):
+            value = value_of(event)
+            for handle, derive in outputs:
+                handle.emit(derive(value))
+        return emit
 
     def __str__(self) -> str:
         return f"{self.name} {self.status}:{self.channel}:{self.identifier}"
@@ -0,0 +1,119 @@
+"""input_filter.py: This module contains the input filter of continuous controls. It drops and snaps noisy values before any listener of the control runs.
+"""
+from ..core.timer import TimerWheel, Timer, now_ms
+from ..util.midi import MidiMessage
+
+
+class InputFilter(object):
+    """Filters the values of a continuous control, like a knob or fader, in the dispatch path of the ControlRegistry. A filtered message never reaches the listeners of the control.
+        The stages run in this order:
+            * deadzone: values within deadzone_width / 2 of deadzone_centre are snapped to the centre.
+            * repeats: a value equal to the last emitted value is dropped.
+            * hysteresis: a value that reverses the last movement by hysteresis steps or less is dropped. 0 and 127 always pass.
+            * rate: at most max_rate messages per second are emitted. The latest dropped value is emitted when the interval has passed, so the final position of a sweep is never lost.
+        An InputFilter keeps the state of one control, so every control needs its own. Set it with Control.set_input_filter().
+
+    Args:
+        suppress_repeats (bool, optional): Drop values equal to the last emitted value. Defaults to True.
+        hysteresis (int, optional): Size of the hysteresis band in MIDI steps. Defaults to 0, off.
+        deadzone_centre (float, optional): Centre of the deadzone as a unit value, 0.0 - 1.0. Defaults to None, no deadzone.
+        deadzone_width (float, optional): Width of the deadzone as a unit value. Defaults to 0.1.
+        max_rate (float, optional): Maximum messages per second. Defaults to 0, unlimited.
+    """
+    __slots__ = ('suppress_repeats', 'hysteresis', 'deadzone_centre', 'deadzone_width', 'max_rate',
+                 'deliver', 'last_value', 'direction', '_low', '_high', '_centre', '_interval', '_next_time', '_pending', '_timer', 'timers')
+
+    def __init__(self, suppress_repeats: bool = True, hysteresis: int = 0, deadzone_centre: float = None, deadzone_width: float = 0.1, max_rate: float = 0):
+        self.suppress_repeats: bool = suppress_repeats
+        self.hysteresis: int = hysteresis
+        self.deadzone_centre: float = deadzone_centre
+        self.deadzone_width: float = deadzone_width
+        self.max_rate: float = max_rate
+        self.deliver = None
+        """The compiled handler of the control. The registry sets it, and the rate stage calls it with the held back message."""
+        self.last_value: int = None
+        """The last value that was emitted."""
+        self.direction: int = 0
+        """Direction of the last emitted movement, 1 up and -1 down."""
+        self._pending: tuple = None
+        self._timer: Timer = None
+        self.timers: TimerWheel = TimerWheel()
+        self._compile()
+
+    @classmethod
+    def from_parameter(cls, parameter, **k) -> 'InputFilter':
+        """Returns a filter with the deadzone of a PluginParameter, if it has one. Other arguments are passed on."""
+        k.setdefault('deadzone_centre', parameter.deadzone_centre)
+        k.setdefault('deadzone_width', parameter.deadzone_width)
+        return cls(**k)
+
+    def _compile(self) -> None:
+        # Precompute the deadzone bounds in MIDI steps and the rate interval in milliseconds.
+        if self.deadzone_centre is None:
+            self._low = self._high = self._centre = None
+        else:
+            half_width = self.deadzone_width * 127 / 2
+            self._centre = round(self.deadzone_centre * 127)
+            self._low = self.deadzone_centre * 127 - half_width
+            self._high = self.deadzone_centre * 127 + half_width
+        self._interval: float = 1000 / self.max_rate if self.max_rate else 0
+        self._next_time: float = 0
+
+    def configure(self, **k) -> None:
+        """Changes any of the constructor arguments."""
+        for name, value in k.items():
+            setattr(self, name, value)
+        self._compile()
+
+    def reset(self) -> None:
+        """Forgets the last emitted value and drops a held back message."""
+        self.last_value = None
+        self.direction = 0
+        self._pending = None
+        self.timers.cancel(self._timer)
+        self._timer = None
+        self._next_time = 0
+
+    def accept(self, event) -> bool:
+        """Returns True if event should be emitted. A snapped value is written to event.data2."""
+        value = event.data2
+        if self._low is not None and self._low <= value <= self._high and value != self._centre:
+            value = event.data2 = self._centre
+        last_value = self.last_value
+        if last_value is not None:
+            if value == last_value:
+                if self._pending is not None:
+                    # The control moved back before the held back value was sent.
+                    self._pending = None
+                if self.suppress_repeats:
+                    return False
+            elif self.hysteresis and 0 < value < 127:
+                delta = value - last_value
+                if self.direction and (delta > 0) != (self.direction > 0) and abs(delta) <= self.hysteresis:
+                    return False
+        if self._interval:
+            now = now_ms()
+            if now < self._next_time:
+                self._pending = (event.status, event.data1, value, getattr(event, 'port', 0))
+                if self._timer is None:
+                    self._timer = self.timers.call_later(self._next_time - now, self._on_timer)
+                return False
+            self._next_time = now + self._interval
+            self._pending = None
+        self._emitted(value)
+        return True
+
+    def _emitted(self, value: int) -> None:
+        if self.last_value is not None and value != self.last_value:
+            self.direction = 1 if value > self.last_value else -1
+        self.last_value = value
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        pending = self._pending
+        if pending is None or self.deliver is None:
+            return
+        self._pending = None
+        self._next_time = now_ms() + self._interval
+        self._emitted(pending[2])
+        self.deliver(MidiMessage(*pending))
@@ -1,6 +1,8 @@
 from .control import Control
 from ..util.midi import MIDI_STATUS
 from ..api.fl_class import flMidiMsg
+from .delta_accumulator import DeltaAccumulator
+from .relative import RelativeMode, Acceleration, decode_relative
 
 class JogControl(Control):
     """
@@ -19,7 +21,12 @@ class JogControl(Control):
         default_color (str, optional): The default color of the control. Defaults to 'Default'.
         blackout_color (str, optional): The color when the control is in blackout mode. Defaults to 'Off'.
         skin (object, optional): The skin object associated with the control. Defaults to None.
+        accumulate (bool, optional): Add up the detents of each tick and emit them once, see DeltaAccumulator. Defaults to False.
+        mode (int, optional): The RelativeMode data2 is encoded in. Defaults to RelativeMode.INC_DEC, which only knows inc_value and dec_value.
+        acceleration (Acceleration, optional): Scales the steps by how fast the control turns. Defaults to None.
     """
+    __slots__ = ('inc_value', 'dec_value', 'accumulator', 'mode', 'acceleration')
+
     class Events:
         """
         Represents the events generated by the Jog control.
@@ -33,7 +40,7 @@ class JogControl(Control):
         JOG: str = 'jog'
         """Jog wheel jog event."""
     @staticmethod
-    def generate_jog_events(status, inc_value, dec_value, event_data: flMidiMsg):
+    def generate_jog_events(status, inc_value, dec_value, event_data: flMidiMsg, mode: int = RelativeMode.INC_DEC):
         """
         Generates jog events based on the MIDI input.
 
@@ -42,35 +49,67 @@ class JogControl(Control):
             inc_value (int): The MIDI value for the increment action.
             dec_value (int): The MIDI value for the decrement action.
             event_data (flMidiMsg): The MIDI message data.
+            mode (int, optional): The RelativeMode data2 is encoded in. Defaults to RelativeMode.INC_DEC.
 
         Returns:
-            dict: A dictionary containing the generated events.
+            dict: A dictionary containing the generated events. inc and dec carry the size of the step, jog the signed step.
         """
         events: dict[str: any] = dict()
         if event_data.status == status:
-            if event_data.data2 == inc_value:
-                events[JogControl.Events.INC] = True
+            delta = decode_relative(event_data.data2, mode, inc_value, dec_value)
+            if delta > 0:
+                events[JogControl.Events.INC] = delta
                 events[JogControl.Events.JOGGED] = True
-                events[JogControl.Events.JOGGED] = 1
-            if event_data.data2 == dec_value:
-                events[JogControl.Events.DEC] = True
+                events[JogControl.Events.JOG] = delta
+            elif delta < 0:
+                events[JogControl.Events.DEC] = -delta
                 events[JogControl.Events.JOGGED] = False
-                events[JogControl.Events.JOG] = -1
+                events[JogControl.Events.JOG] = delta
 
         return events
 
-    def __init__(self, name: str, channel: int, identifier: int, status: int = MIDI_STATUS.CC_STATUS, inc_value: int = 1, dec_value: int = 127, playable=False, feedback=False, feedback_process=None, default_color='Default', blackout_color='Off', skin=None):
+    def __init__(self, name: str, channel: int, identifier: int, status: int = MIDI_STATUS.CC_STATUS, inc_value: int = 1, dec_value: int = 127, playable=False, feedback=False, feedback_process=None, default_color='Default', blackout_color='Off', skin=None, accumulate: bool = False, mode: int = RelativeMode.INC_DEC, acceleration: Acceleration = None):
         super().__init__(name, channel, identifier, playable, status,
                          feedback, feedback_process, default_color, blackout_color, skin)
         self.inc_value = inc_value
         self.dec_value = dec_value
         self.status = status
+        self.accumulator: DeltaAccumulator = DeltaAccumulator(self._deliver_delta) if accumulate else None
+        """Set when the control accumulates its detents. None emits every detent."""
+        self.mode: int = mode
+        self.acceleration: Acceleration = acceleration
+
+    def decode(self, value: int) -> int:
+        """Returns the signed step of a data2 value, scaled by the acceleration. 0 if the value is not a step."""
+        delta = decode_relative(value, self.mode, self.inc_value, self.dec_value)
+        if delta and self.acceleration is not None:
+            delta = self.acceleration.apply(delta)
+        return delta
 
     def _on_value(self, event_data: flMidiMsg):
-        events = JogControl.generate_jog_events(
-            self.status, self.inc_value, self.dec_value, event_data)
-        for event in events:
-            self.notify(event, events[event])
+        delta = self.decode(event_data.data2)
+        if not delta:
+            return
+        if self.accumulator is not None:
+            self.accumulator.add(delta)
+        else:
+            self._deliver_delta(delta)
+
+    def _deliver_delta(self, delta: int):
+        """Emits a signed step, of one message or of the accumulated detents of one tick: inc or dec with the size of the step, jogged, and jog with the step."""
+        if delta > 0:
+            self.notify(JogControl.Events.INC, delta)
+        else:
+            self.notify(JogControl.Events.DEC, -delta)
+        self.notify(JogControl.Events.JOGGED, delta > 0)
+        self.notify(JogControl.Events.JOG, delta)
+
+    def deactivate(self):
+        if self.accumulator is not None:
+            self.accumulator.reset()
+        if self.acceleration is not None:
+            self.acceleration.reset()
+        super().deactivate()
 
     def __str__(self) -> str:
         return f"{self.name} {self.status}:{self.channel}:{self.identifier}"
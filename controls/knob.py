@@ -1,13 +1,13 @@
 """knob.py: This module contains classes for Knob Controls
 """
 
-from .control import Control
+from .control import DerivedEventControl, value_of
 from ..util.midi import MIDI_STATUS
 from ..api.fl_class import flMidiMsg
 from dataclasses import dataclass
 
 
-class KnobControl(Control):
+class KnobControl(DerivedEventControl):
     """This control type is for knobs on your midi controller. It accepts the same parameters as the base Control Type, but emmits special events along with the value of the fader.
     Events:
         * unit_value: This event is emitted with the fader position represented as a float from 0 - 1.0.
@@ -15,7 +15,10 @@ class KnobControl(Control):
         * inverse_unit_value: this event is emitted with fader position reversed, but in unit form from 0 - 1.0.
         * symentry_value: this event is emitted with the fader position represented in symetry from -64 - 64.
         * symentry_unit_value: this event is emitted with the fader position represented in symetry from -1.0 - 1.0
+    Only the events that have listeners are computed and emitted.
     """
+    __slots__ = ('prev_value',)
+
     @dataclass
     class KnobEvent:
         """This dataclass represents the event generated by the Knob control."""
@@ -50,32 +53,25 @@ class KnobControl(Control):
         DIRECTION: str = 'direction'
         ALL: str = 'all'
 
+    DERIVED_EVENTS: dict = {
+        Events.UNIT_VALUE: lambda value: float(value) / 127,
+        Events.INVERSE_VALUE: lambda value: 127 - value,
+        Events.INVERSE_UNIT_VALUE: lambda value: (127 - float(value)) / 127,
+        Events.SYMMETRY_VALUE: lambda value: value - 127 // 2,
+        Events.SYMMETRY_UNIT_VALUE: lambda value: (value - 127 / 2) / (127 / 2),
+    }
+    """Event name to the function deriving it from the knob value, in emit order. The all and direction events are emitted before and after them."""
+
     def generate_event(self, event_data: flMidiMsg) -> dict[str: any]:
         """This static method generates the additional events for this control."""
-        events: dict[str: any] = dict()
-        value: int = 0
-        try:
-            value = int(event_data.data2)
-        except:
-            value = 0
-        half_value: float = 127/2
-
-        direction: int = 0
-        if value > self.prev_value:
-            direction = 1
-        elif value < self.prev_value:
-            direction = -1
-        self.prev_value = value
+        value: int = value_of(event_data)
+        return KnobControl.knob_events(value, self._direction(value))
 
-        knob_event: KnobControl.KnobEvent = KnobControl.KnobEvent(
-            value,
-            unit_value=float(value) / 127,
-            inverse_value=127 - value,
-            inverse_unit_value=(127 - float(value)) / 127,
-            symmetry_value=value - 127 // 2,
-            symmetry_unit_value=(value - half_value) / half_value,
-            direction=direction
-        )
+    @staticmethod
+    def knob_events(value: int, direction: int) -> dict[str: any]:
+        """Returns every event of value, by event name, for a knob that moved in direction."""
+        events: dict[str: any] = dict()
+        knob_event: KnobControl.KnobEvent = KnobControl.knob_event(value, direction)
         events[KnobControl.Events.ALL] = knob_event
         events[KnobControl.Events.UNIT_VALUE] = knob_event.unit_value
         events[KnobControl.Events.INVERSE_VALUE] = knob_event.inverse_value
@@ -85,16 +81,50 @@ class KnobControl(Control):
         events[KnobControl.Events.DIRECTION] = knob_event.direction
 
         return events
+
     def __init__(self, name: str, channel: int, identifier: int, status: int = MIDI_STATUS.CC_STATUS, playable=False, feedback=False, feedback_process=None, default_color='Default', blackout_color='Off', skin=None):
         super().__init__(name, channel, identifier, playable, status,
                          feedback, feedback_process, default_color, blackout_color, skin)
         self.prev_value: int = 0
 
-    def _on_value(self, e):
-        events: list = self.generate_event(e)
-        for event in events:
-            setattr(self, "_{}".format(event), events[event])
-            self.notify(event, events[event])
+    @staticmethod
+    def knob_event(value: int, direction: int) -> 'KnobControl.KnobEvent':
+        """Returns the KnobEvent with every derived value of value."""
+        derived = KnobControl.DERIVED_EVENTS
+        return KnobControl.KnobEvent(value, *(derive(value) for derive in derived.values()), direction=direction)
+
+    def _direction(self, value: int) -> int:
+        """Returns 1 if value is above the previous value, -1 if below, 0 otherwise, and stores value as the previous value."""
+        direction = (value > self.prev_value) - (value < self.prev_value)
+        self.prev_value = value
+        return direction
+
+    def _compile_emit(self):
+        handles = self._derived_handles((KnobControl.Events.ALL, *KnobControl.DERIVED_EVENTS, KnobControl.Events.DIRECTION))
+        all_handle = handles.get(KnobControl.Events.ALL)
+        direction_handle = handles.get(KnobControl.Events.DIRECTION)
+        outputs = tuple((handles[event], derive) for event, derive in KnobControl.DERIVED_EVENTS.items() if event in handles)
+        if all_handle is None and direction_handle is None and len(outputs) <= 1:
+            if not outputs:
+                def emit(event):
+                    self.prev_value = value_of(event)
+                return emit
+            (handle, derive), = outputs
+            def emit(event):
+                value = self.prev_value = value_of(event)
+                handle.emit(derive(value))
+            return emit
+
+        def emit(event):
+            value = value_of(event)
+            direction = self._direction(value)
+            if all_handle is not None:
+                all_handle.emit(KnobControl.knob_event(value, direction))
+            for handle, derive in outputs:
+                handle.emit(derive(value))
+            if direction_handle is not None:
+                direction_handle.emit(direction)
+        return emit
 
     def __str__(self) -> str:
         return f"{self.name} {self.status}:{self.channel}:{self.identifier}"
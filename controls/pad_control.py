@@ -1,10 +1,13 @@
+from array import array
 from ..util.midi import MIDI_STATUS
-from ..core.event import GlobalEventObject
-from ..core.control_registry import ControlRegistry
 from fl_controller_framework.api.fl_class import flMidiMsg
+from ..core.skin import PadColorBatch, SysexPadEncoder, SkinColor
+from ..core.timer import TimerWheel, Timer, now_ms
 from .control import ControlBase
 
 class cc(ControlBase):
+    __slots__ = ()
+
     def __init__(self, name: str, channel: int, identifier: int, status=MIDI_STATUS.NOTE_ON_STATUS, playable=False, *a, **k):
         """
         Represents a control change (CC) MIDI message.
@@ -22,13 +25,16 @@ class cc(ControlBase):
 
 
 class PadControl(ControlBase):
+    __slots__ = ('number', 'color', '_feedback', '_translation', 'draw', 'color_batch')
+
     def __init__(self, name, channel, identifier, 
     number: int,
     color: tuple = None,
     playable=True, 
     status: int = MIDI_STATUS.NOTE_ON_STATUS,
     feedback=None, 
-    translation=None
+    translation=None,
+    register: bool = True
     ):
         """
         Represents a pad control.
@@ -42,43 +48,84 @@ class PadControl(ControlBase):
             playable (bool, optional): Whether the pad is playable. Defaults to False.
             feedback (None, optional): Feedback function for the pad. Defaults to None.
             translation (None, optional): Translation function for the pad. Defaults to None.
+            register (bool, optional): Registers the pad with the control registry. PadsControl passes False and registers all of its pads at once. Defaults to True.
         """
         super(PadControl, self).__init__(name or f'pad_{number}_{identifier}', channel, identifier, status, playable)
         self.number: int = number
         self.color: tuple = color
-        self.status: int = status
-        self.feedback = feedback
-        self.translation = translation
-        self.registry.register_control(self) 
-
-    
-    def __del__(self):
-        self.registry.unregister_control(self)
+        # Set directly, the property setters recompile the registry slots of a registered pad.
+        self._feedback = feedback
+        self._translation = translation
+        self.draw = None
+        """Draw function for the pad. set_light calls it as draw(pad, *a, **k)."""
+        self.color_batch: PadColorBatch = None
+        """Batch that set_color queues the pad color on. PadsControl sets it when it has a SysEx encoder."""
+        if register:
+            self.registry.register_control(self)
+
+    @property
+    def feedback(self):
+        """Feedback function for the pad. Setting it recompiles the pad's dispatch slots in the registry."""
+        return self._feedback
+
+    @feedback.setter
+    def feedback(self, feedback_func):
+        self._feedback = feedback_func
+        self.registry.update_control(self)
+
+    @property
+    def translation(self):
+        """Translation function for the pad. Setting it recompiles the pad's dispatch slots in the registry."""
+        return self._translation
+
+    @translation.setter
+    def translation(self, translation_func):
+        self._translation = translation_func
+        self.registry.update_control(self)
     
     def set_light(self, *a, **k):
         """
         Sets the light of the pad.
 
         Args:
-            *a: Variable length argument list.
+            *a: Variable length argument list. A single SkinColor, like PadRGBColor, is drawn on the pad itself.
             **k: Arbitrary keyword arguments.
         """
-        if hasattr(self.draw, '__call__'):
+        if len(a) == 1 and isinstance(a[0], SkinColor):
+            a[0].draw(self)
+        elif self.draw is not None:
             self.draw(self, *a, **k)
 
+    def set_color(self, rgb: tuple):
+        """
+        Sets the RGB color of the pad. With a color batch, the color is sent with all other pad changes of the tick in one SysEx frame. Otherwise it is drawn with set_light.
+
+        Args:
+            rgb (tuple): The 7 bit (red, green, blue) color.
+        """
+        self.color = rgb
+        if self.color_batch is not None:
+            self.color_batch.set_color(self.identifier, rgb)
+        else:
+            self.set_light(rgb)
+
 class PadsControl(ControlBase):
+    __slots__ = ('pad_mapping', 'feedback', 'translation', 'draw', 'color_batch', 'shift', 'pads', 'hold_time', 'short_press_time', 'multi_hold', '_pads_by_number',
+                 '_press_times', '_hold_timers', '_pad_flags', '_pressed_state', '_hold_state', '_pressed_pads', 'timers')
+
     def __init__(
             self, 
             name: str, 
             channel: int, 
             pad_mapping: dict[int: int], 
             status: int = MIDI_STATUS.NOTE_ON_STATUS,
-            hold_time=10, 
-            short_press_time=2, 
+            hold_time=500, 
+            short_press_time=250, 
             playable=True, 
             feedback=None, 
             translation=None, 
-            draw=None
+            draw=None,
+            encoder: SysexPadEncoder = None
         ):
         """
         Represents a group of pad controls.
@@ -88,35 +135,43 @@ class PadsControl(ControlBase):
             channel (int): The MIDI channel of the control.
             pad_mapping (dict[int: int]): The mapping of pad IDs to pad numbers.
             status (int, optional): The MIDI status byte for note on messages. Defaults to MIDI_STATUS.NOTE_ON_STATUS.
-            hold_time (int, optional): The hold time in milliseconds. Defaults to 10.
-            short_press_time (int, optional): The short press time in milliseconds. Defaults to 2.
+            hold_time (int, optional): The hold time in milliseconds. Defaults to 500.
+            short_press_time (int, optional): Pads released within this many milliseconds emit short_press. Defaults to 250.
             playable (bool, optional): Whether the pads are playable. Defaults to True.
             feedback (None, optional): Feedback function for the pads. Defaults to None.
             translation (None, optional): Translation function for the pads. Defaults to None.
             draw (None, optional): Draw function for the pads. Defaults to None.
+            encoder (SysexPadEncoder, optional): Encoder used to send the colors of all pads changed in a tick as one SysEx frame. Defaults to None.
         """
-        self.event_object: GlobalEventObject = GlobalEventObject()
-        self.registry: ControlRegistry = ControlRegistry()
-        self.name: str = name
-        self.channel: int = channel
-        self.status: int = status
+        super(PadsControl, self).__init__(name, channel, None, status, playable)
         self.pad_mapping: dict[int: int] = pad_mapping
-        self.playable = playable
         self.feedback = feedback
         self.translation = translation
         self.draw = draw
+        self.color_batch: PadColorBatch = PadColorBatch(encoder) if encoder is not None else None
         self.shift = 24
         self.pads: list[PadControl] = []
         self.hold_time = hold_time
         self.short_press_time = short_press_time
-        self.pad_state = dict()
         self.multi_hold = dict()
         for pad_id in self.pad_mapping:
-            pad_number = self.pad_mapping[pad_id]
-            self.pad_state[pad_number] = dict()
-            self.pad_state[pad_number]['hold_counter'] = 0
-            self.pad_state[pad_number]['hold'] = False
             self.pads.append(self.__generate_pad_control(pad_id))
+        self.registry.register_many(self.pads)
+        self._pads_by_number: dict[int, PadControl] = {pad.number: pad for pad in self.pads}
+
+        # Pad state lives in fixed size arrays indexed by pad number.
+        state_size = max(self.pad_mapping.values(), default=-1) + 1
+        self._press_times: array = array('d', [0.0]) * state_size
+        self._hold_timers: list[Timer] = [None] * state_size
+        self._pad_flags: dict[str, bytearray] = {
+            'pressed': bytearray(state_size),
+            'released': bytearray(state_size),
+            'hold': bytearray(state_size),
+        }
+        self._pressed_state: bytearray = self._pad_flags['pressed']
+        self._hold_state: bytearray = self._pad_flags['hold']
+        self._pressed_pads: set[int] = set()
+        self.timers: TimerWheel = TimerWheel()
 
     def size(self) -> int:
         """
@@ -127,41 +182,20 @@ class PadsControl(ControlBase):
         """
         return len(self.pads)
 
-    def _pad_state_is_changed(self, pad_number, event_name, value):
-        """
-        Checks if the state of a pad has changed.
-
-        Args:
-            pad_number (int): The pad number.
-            event_name (str): The name of the event.
-            value: The value of the event.
-
-        Returns:
-            bool: True if the state has changed, False otherwise.
-        """
-        changed = False
-        current_state = self.pad_state[pad_number].get(event_name)
-        if current_state == None:
-            changed = True
-            self.pad_state[pad_number][event_name] = value
-        else:
-            if value != current_state:
-                changed = True
-        self.pad_state[pad_number][event_name] = value
-        return changed
-
     def get_pad_event_state(self, pad_number, event_name):
         """
         Gets the event state of a pad.
 
         Args:
             pad_number (int): The pad number.
-            event_name (str): The name of the event.
+            event_name (str): The name of the event. One of 'pressed', 'released', 'hold' or 'press_time'.
 
         Returns:
             Any: The event state.
         """
-        return self.pad_state[pad_number].get(event_name)
+        if event_name == 'press_time':
+            return self._press_times[pad_number]
+        return bool(self._pad_flags[event_name][pad_number])
 
     def set_pad_event_state(self, pad_number, event_name, value):
         """
@@ -169,25 +203,42 @@ class PadsControl(ControlBase):
 
         Args:
             pad_number (int): The pad number.
-            event_name (str): The name of the event.
+            event_name (str): The name of the event. One of 'pressed', 'released', 'hold' or 'press_time'.
             value: The value of the event.
         """
-        self.pad_state[pad_number][event_name] = value
+        if event_name == 'press_time':
+            self._press_times[pad_number] = value
+        else:
+            self._pad_flags[event_name][pad_number] = 1 if value else 0
+            if event_name == 'pressed':
+                if value:
+                    self._pressed_pads.add(pad_number)
+                else:
+                    self._pressed_pads.discard(pad_number)
 
-    def _on_idle(self):
+    def pressed_pads(self) -> list[int]:
         """
-        Event handler for idle event.
+        Returns the pad numbers that are currently pressed.
+
+        Returns:
+            list[int]: The pressed pad numbers.
         """
-        for pad_number in self.pad_state:
-            if self.get_pad_event_state(pad_number, 'pressed'):
-                self.pad_state[pad_number]['hold_counter'] += 1
-                if self.pad_state[pad_number]['hold_counter'] > self.hold_time:
-                    if self._pad_state_is_changed(pad_number, 'hold', True):
-                        self._set_hold(pad_number, True)
-            else:
-                self.pad_state[pad_number]['hold_counter'] = 0
-                if self._pad_state_is_changed(pad_number, 'hold', False):
-                    self._set_hold(pad_number, False)
+        return list(self._pressed_pads)
+
+    def _on_hold_timer(self, pad_number: int):
+        """
+        Called by the timer wheel when a pad has been pressed for hold_time milliseconds.
+
+        Args:
+            pad_number (int): The pad number.
+        """
+        self._hold_timers[pad_number] = None
+        self._hold_state[pad_number] = 1
+        self._set_hold(pad_number, True)
+
+    def _cancel_hold_timer(self, pad_number: int):
+        self.timers.cancel(self._hold_timers[pad_number])
+        self._hold_timers[pad_number] = None
 
     def _set_multi_hold(self, pad_number, hold):
         """
@@ -221,6 +272,10 @@ class PadsControl(ControlBase):
             event: The event object.
         """
         self.set_pad_event_state(pad_number, 'pressed', pressed)
+        self._cancel_hold_timer(pad_number)
+        if pressed:
+            self._press_times[pad_number] = now_ms()
+            self._hold_timers[pad_number] = self.timers.call_later(self.hold_time, self._on_hold_timer, pad_number)
         self.notify('pressed', pad_number, pressed, event)
 
     def _set_released(self, pad_number: int, released: bool, event):
@@ -232,11 +287,14 @@ class PadsControl(ControlBase):
             released (bool): Whether the pad is released.
             event: The event object.
         """
-        hold_counter = self.pad_state[pad_number]['hold_counter']
-        if hold_counter > 0 and hold_counter < self.short_press_time:
+        hold = self._hold_state[pad_number]
+        if not hold and now_ms() - self._press_times[pad_number] < self.short_press_time:
             self.notify('short_press', pad_number, True)
         self.set_pad_event_state(pad_number, 'released', released)
         self.notify('released', pad_number, released, event)
+        if hold:
+            self._hold_state[pad_number] = 0
+            self._set_hold(pad_number, False)
 
     def _on_value(self, event):
         """
@@ -275,7 +333,7 @@ class PadsControl(ControlBase):
         """
         pad_name = '{}_{}_{}'.format(
             self.name, self.pad_mapping[pad_id], pad_id)
-        return PadControl(
+        pad = PadControl(
             name=pad_name,
             channel=self.channel,
             identifier=pad_id,
@@ -284,7 +342,45 @@ class PadsControl(ControlBase):
             playable=self.playable,
             translation=self.translation,
             feedback=self.feedback,
+            register=False,
         )
+        pad.draw = self.draw
+        pad.color_batch = self.color_batch
+        return pad
+
+    def get_pad(self, pad_number: int) -> PadControl:
+        """
+        Gets a pad by pad number.
+
+        Args:
+            pad_number (int): The pad number.
+
+        Returns:
+            PadControl: The pad, or None.
+        """
+        return self._pads_by_number.get(pad_number)
+
+    def set_pad_color(self, pad_number: int, rgb: tuple):
+        """
+        Sets the RGB color of one pad. See PadControl.set_color.
+
+        Args:
+            pad_number (int): The pad number.
+            rgb (tuple): The 7 bit (red, green, blue) color.
+        """
+        pad = self._pads_by_number.get(pad_number)
+        if pad is not None:
+            pad.set_color(rgb)
+
+    def draw_pads(self, colors: dict[int, tuple]):
+        """
+        Sets the RGB colors of many pads. With an encoder, every changed pad goes out in a single SysEx frame on the next flush.
+
+        Args:
+            colors (dict[int, tuple]): The 7 bit (red, green, blue) color by pad number.
+        """
+        for pad_number in colors:
+            self.set_pad_color(pad_number, colors[pad_number])
 
     def set_feedback(self, feedback_func):
         """
@@ -318,7 +414,6 @@ class PadsControl(ControlBase):
         """
         Activates the pads control.
         """
-        self.event_object.subscribe('idle', self._on_idle)
         for pad in self.pads:
             self.event_object.subscribe('{}.value'.format(pad.name), self._on_value)
             self.registry.activate_control(pad)
@@ -330,6 +425,8 @@ class PadsControl(ControlBase):
         for pad in self.pads:
             self.event_object.unsubscribe('{}.value'.format(pad.name), self._on_value)
             self.registry.deactivate_control(pad)
+        for pad_number in self._pressed_pads:
+            self._cancel_hold_timer(pad_number)
 
     def _initialize(self):
         """
@@ -347,3 +444,6 @@ class PadsControl(ControlBase):
         """
         Turns off the lights of the pads control.
         """
+        if self.color_batch is not None:
+            for pad in self.pads:
+                pad.set_color((0, 0, 0))
@@ -0,0 +1,81 @@
+"""relative.py: This module contains the decoding and acceleration of relative controls, like jog wheels and encoders, that send steps instead of positions.
+"""
+from ..core.timer import now_ms
+
+
+class RelativeMode:
+    """The formats in which relative controls encode a signed step in data2."""
+    INC_DEC: int = 0
+    """One value for a step up and another for a step down, inc_value and dec_value. Every other value is ignored."""
+    TWOS_COMPLEMENT: int = 1
+    """1 - 63 are steps up, 127 - 64 are steps down, -1 - -64."""
+    BINARY_OFFSET: int = 2
+    """64 is no step, 65 - 127 are steps up, 63 - 0 are steps down, -1 - -64."""
+    SIGN_MAGNITUDE: int = 3
+    """Bit 6 is the sign, set for a step down, and bits 0 - 5 are the size of the step."""
+
+
+DECODE_TABLES: dict[int, tuple] = {
+    RelativeMode.TWOS_COMPLEMENT: tuple(value if value < 64 else value - 128 for value in range(128)),
+    RelativeMode.BINARY_OFFSET: tuple(value - 64 for value in range(128)),
+    RelativeMode.SIGN_MAGNITUDE: tuple(-(value & 0x3F) if value & 0x40 else value & 0x3F for value in range(128)),
+}
+"""Signed step of every data2 value, for each RelativeMode except INC_DEC."""
+
+
+def decode_relative(value: int, mode: int = RelativeMode.INC_DEC, inc_value: int = 1, dec_value: int = 127) -> int:
+    """Returns the signed step encoded in a data2 value, or 0 if it is not a step. inc_value and dec_value are only used by RelativeMode.INC_DEC."""
+    if mode == RelativeMode.INC_DEC:
+        if value == inc_value:
+            return 1
+        if value == dec_value:
+            return -1
+        return 0
+    return DECODE_TABLES[mode][value & 0x7F]
+
+
+class Acceleration(object):
+    """Scales the steps of a relative control by how fast it turns, so a quick sweep covers a range with far fewer messages.
+        The factor of a step is read from a lookup table by the time since the previous step, in buckets of bucket_ms. The table is built once from the curve.
+        A step in the other direction than the previous one is never scaled, so changing direction stays precise.
+        An Acceleration keeps the state of one control, so every control needs its own.
+
+    Args:
+        curve (tuple, optional): (interval_ms, factor) pairs. A step that follows the previous one within interval_ms is multiplied by the factor of the first matching pair. Defaults to ((10, 8), (20, 4), (40, 2)).
+        bucket_ms (int, optional): Time resolution of the lookup table. Defaults to 2.
+    """
+    __slots__ = ('curve', 'bucket_ms', 'table', 'last_time', 'last_sign')
+
+    def __init__(self, curve: tuple = ((10, 8), (20, 4), (40, 2)), bucket_ms: int = 2):
+        self.curve: tuple = tuple(sorted(curve))
+        self.bucket_ms: int = bucket_ms
+        self.table: tuple = self._build_table()
+        """Factor of each bucket. Intervals past the end of the table are not scaled."""
+        self.last_time: float = None
+        self.last_sign: int = 0
+
+    def _build_table(self) -> tuple:
+        if not self.curve:
+            return ()
+        table = []
+        for index in range(-(-self.curve[-1][0] // self.bucket_ms)):
+            interval = index * self.bucket_ms
+            table.append(next(factor for limit, factor in self.curve if interval < limit))
+        return tuple(table)
+
+    def apply(self, delta: int) -> int:
+        """Returns delta scaled by the factor of the time since the previous step."""
+        now = now_ms()
+        sign = 1 if delta > 0 else -1
+        if self.last_time is not None and sign == self.last_sign:
+            index = int((now - self.last_time) // self.bucket_ms)
+            if index < len(self.table):
+                delta *= self.table[index]
+        self.last_time = now
+        self.last_sign = sign
+        return delta
+
+    def reset(self) -> None:
+        """Forgets the previous step, so the next one is not scaled."""
+        self.last_time = None
+        self.last_sign = 0
@@ -1,24 +1,101 @@
+import weakref
 from dataclasses import dataclass
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Callable, Optional
 from .event import GlobalEventObject
 from ..util.midi import MIDI_STATUS
 from .state import StateBase
-from ..util.functions import contains, get_index
 from ..api.fl_class import flMidiMsg
 
 ControlID = Tuple[int, int, int]
 
+DISPATCH_TABLE_SIZE: int = 128 * 128
+"""Number of slots in the compiled dispatch table. One slot for every status byte (status type x 16 channels) and every data1 value."""
+
 @dataclass
 class ControlEntry:
     id: ControlID
-    control: any
+    ref: weakref.ref
+    """Weak reference to the control. The registry never keeps a control alive."""
     active: bool = False
+    priority: int = 0
+    """Layer of the control. Higher priorities own the ControlID before lower ones."""
+    order: int = 0
+    """Registration sequence number. Among entries of the same priority, the last registered one comes first."""
+
+    @property
+    def control(self):
+        return self.ref()
+
+
+class ControlLayers(object):
+    """The layer stack of one ControlID. Entries are ordered by priority, then by registration, latest first.
+        The active entries are kept in a second list in the same order, so the owner of the ControlID, its first active entry, is read in O(1) and only changes on activate, deactivate and registration.
+        When no entry is active, the first entry owns the ControlID and reports that it is not active.
+    """
+    __slots__ = ('entries', 'active')
+
+    def __init__(self) -> None:
+        self.entries: List[ControlEntry] = []
+        self.active: List[ControlEntry] = []
+
+    @staticmethod
+    def _insert(entries: List[ControlEntry], entry: ControlEntry) -> None:
+        rank = (entry.priority, entry.order)
+        for index, other in enumerate(entries):
+            if (other.priority, other.order) < rank:
+                entries.insert(index, entry)
+                return
+        entries.append(entry)
+
+    @staticmethod
+    def _remove(entries: List[ControlEntry], entry: ControlEntry) -> None:
+        for index, other in enumerate(entries):
+            if other is entry:
+                del entries[index]
+                return
+
+    def owner(self) -> Optional[ControlEntry]:
+        """Returns the entry that receives the messages of this ControlID."""
+        if self.active:
+            return self.active[0]
+        return self.entries[0] if self.entries else None
 
-Registry = Dict[ControlID, List[ControlEntry]]
+    def add(self, entry: ControlEntry) -> None:
+        self._insert(self.entries, entry)
+        if entry.active:
+            self._insert(self.active, entry)
+
+    def remove(self, entry: ControlEntry) -> None:
+        self._remove(self.entries, entry)
+        if entry.active:
+            self._remove(self.active, entry)
+
+    def set_active(self, entry: ControlEntry, active: bool) -> None:
+        if entry.active == active:
+            return
+        entry.active = active
+        if active:
+            self._insert(self.active, entry)
+        else:
+            self._remove(self.active, entry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+Registry = Dict[ControlID, ControlLayers]
+DispatchHandler = Callable[[flMidiMsg], None]
 
 class ControlRegistry(StateBase):
     map: Registry = dict()
+    entries: dict = dict()
+    """id(control) -> its ControlEntry objects, one per ControlID. Finding and unregistering a control is O(1). The entries are removed when the control is collected."""
     modifiers: dict = dict()
+    dispatch_table: List[Optional[DispatchHandler]] = [None] * DISPATCH_TABLE_SIZE
+    """Flat table of pre-bound handler chains, indexed by status byte and data1. Rebuilt only when the owner of a ControlID changes."""
+    _owners: Dict[ControlID, tuple] = dict()
+    """ControlID -> (owner entry, active) the dispatch slot was compiled for."""
+    _order: int = 0
+
     def __new__(cls, *args, **kwargs):
         if not hasattr(cls, 'instance'):
             cls.instance = super(ControlRegistry, cls).__new__(
@@ -32,13 +109,20 @@ class ControlRegistry(StateBase):
     def _create_control_id(self, control) -> ControlID:
         return (control.channel, control.identifier, (control.status + control.channel))
 
+    @staticmethod
+    def _slot_index(id_tuple: ControlID) -> int:
+        """Returns the dispatch table slot for a ControlID. The status byte already carries the channel, so it is combined with data1."""
+        return ((id_tuple[2] & 0x7F) << 7) | (id_tuple[1] & 0x7F)
+
     def add_modifier(self, modifier, control):
         ControlRegistry.modifiers[control.name] = modifier
+        self._compile_control(control)
 
     def remove_modifier(self, modifier, control):
         mod = ControlRegistry.modifiers.get(control.name, None)
         if mod is not None and mod == modifier:
             del ControlRegistry.modifiers[control.name]
+            self._compile_control(control)
 
     def _create_control_ids(self, control) -> List[ControlID]:
         id_list = []
@@ -48,12 +132,10 @@ class ControlRegistry(StateBase):
         return id_list
 
     def activate_control(self, control):
-        for id_tuple in self._create_control_ids(control):
-            if ControlRegistry.map.get(id_tuple) == None:
-                return
-            for entry in ControlRegistry.map[id_tuple]:
-                if entry.control.name == control.name:
-                    entry.active = True
+        """Activates the entries of control. The dispatch slots are only recompiled where control becomes the owner."""
+        for entry in ControlRegistry.entries.get(id(control), ()):
+            ControlRegistry.map[entry.id].set_active(entry, True)
+            self._update_slot(entry.id)
 
     def get_modifer_from_control(self, control):
         for modifier in ControlRegistry.modifiers:
@@ -62,62 +144,172 @@ class ControlRegistry(StateBase):
         return None
 
     def deactivate_control(self, control):
-        for id_tuple in self._create_control_ids(control):
-            if ControlRegistry.map.get(id_tuple) == None:
-                return
-            for entry in ControlRegistry.map[id_tuple]:
-                if entry.control.name == control.name:
-                    entry.active = False
+        """Deactivates the entries of control. Where it owned the ControlID, the next active entry below it takes over."""
+        for entry in ControlRegistry.entries.get(id(control), ()):
+            ControlRegistry.map[entry.id].set_active(entry, False)
+            self._update_slot(entry.id)
+
+    def set_priority(self, control, priority: int):
+        """Moves a registered control to another layer. See ControlBase.priority."""
+        for entry in ControlRegistry.entries.get(id(control), ()):
+            layers = ControlRegistry.map[entry.id]
+            layers.remove(entry)
+            entry.priority = priority
+            layers.add(entry)
+            self._update_slot(entry.id)
+
+    def owner(self, id_tuple: ControlID):
+        """Returns the control that receives the messages of a ControlID, or None."""
+        layers = ControlRegistry.map.get(id_tuple)
+        entry = layers.owner() if layers is not None else None
+        return entry.control if entry is not None else None
+
+    def _add_entries(self, control) -> List[ControlID]:
+        """Adds an entry for control to the layer stack of each of its ControlIDs, on top of the entries of the same priority. Returns the ControlIDs, or an empty list if the control is already registered."""
+        key = id(control)
+        if key in ControlRegistry.entries:
+            return []
+        id_list = self._create_control_ids(control)
+        # The callback runs when the control is collected, before its id can be reused.
+        ref = weakref.ref(control, lambda ref: self._remove_entries(key))
+        ControlRegistry._order += 1
+        entries = []
+        for id_tuple in id_list:
+            control_entry = ControlEntry(id_tuple, ref, priority=control.priority, order=ControlRegistry._order)
+            layers = ControlRegistry.map.get(id_tuple)
+            if layers is None:
+                layers = ControlRegistry.map[id_tuple] = ControlLayers()
+            layers.add(control_entry)
+            entries.append(control_entry)
+        ControlRegistry.entries[key] = entries
+        return id_list
 
     def register_control(self, control):
-        for id_tuple in self._create_control_ids(control):
-            control_entry = ControlEntry(id_tuple, control)
-            if ControlRegistry.map.get(id_tuple) == None:
-                ControlRegistry.map[id_tuple] = []
-            if not contains(ControlRegistry.map[id_tuple], lambda cEntry: cEntry == control_entry):
-                ControlRegistry.map[id_tuple].insert(0, control_entry)
+        for id_tuple in self._add_entries(control):
+            self._update_slot(id_tuple)
+
+    def register_many(self, controls):
+        """Registers several controls, and compiles each dispatch slot they touch once at the end. Controls that are already registered are skipped."""
+        touched: dict = dict()
+        for control in controls:
+            for id_tuple in self._add_entries(control):
+                touched[id_tuple] = None
+        for id_tuple in touched:
+            self._update_slot(id_tuple)
 
     def unregister_control(self, control):
-        for id_tuple in self._create_control_ids(control):
-            control_entry = ControlEntry(id_tuple, control)
-            if ControlRegistry.map.get(id_tuple) == None:
-                return
-            control_entries: list[ControlEntry] = ControlRegistry.map[id_tuple]
-            if contains(control_entries, lambda cEntry: cEntry == control_entry):
-                c_index = control_entries.index(control_entry)
-                del control_entries[c_index]
+        """Removes a control from the registry. Controls do not need to be unregistered before they are dropped, they are removed when they are collected."""
+        self._remove_entries(id(control))
+
+    def _remove_entries(self, key: int):
+        entries = ControlRegistry.entries.pop(key, None)
+        if entries is None:
+            return
+        for control_entry in entries:
+            layers = ControlRegistry.map.get(control_entry.id)
+            if layers is not None:
+                layers.remove(control_entry)
+                self._update_slot(control_entry.id)
 
     def is_control_modified(self, control):
         return ControlRegistry.modifiers.get(control.name, None)
 
-    def HandleMidiMsg(self, event: flMidiMsg):
-        id_tuple = (event.midiChan, event.data1, event.status)
-        controls: list = ControlRegistry.map.get(id_tuple)
-        # Get the control on the top of the registry stack for this event_id(channel, identifier)
-        # Notify the listeners in the event registry and execute feedback, translation and playable.
-        if controls and len(controls) > 0:
-
-            control_entry = controls[0]
-            control = control_entry.control
-            if control_entry.active:
-
-                modifier_control = self.is_control_modified(control)
-                if modifier_control is not None:
-                    event_id = "{}.{}".format(modifier_control.name, "value")
-                    event.handled = not modifier_control.playable
-                    self.event_object.notify_listeners(event_id, event)
-                else:
-                    event_id = '{}.{}'.format(control.name, 'value')
-                    event.handled = not control.playable
-                    self.event_object.notify_listeners(event_id, event)
+    def update_control(self, control):
+        """Recompiles the dispatch slots of a control. Call this after changing a control's feedback or translation function."""
+        self._compile_control(control)
+
+    def recompile(self):
+        """Rebuilds every dispatch slot. Call this after swapping EventHandle.emit, because the handlers bind it when they are compiled."""
+        for id_tuple in ControlRegistry.map:
+            self._compile_slot(id_tuple)
 
-                    if hasattr(control, 'feedback'):
-                        if hasattr(control.feedback, '__call__'):
-                            control.feedback(event, control)
+    def _compile_control(self, control):
+        for id_tuple in self._create_control_ids(control):
+            if ControlRegistry.map.get(id_tuple):
+                self._compile_slot(id_tuple)
+
+    def _update_slot(self, id_tuple: ControlID):
+        """Recompiles the dispatch slot of a ControlID if its owner, or whether the owner is active, changed."""
+        layers = ControlRegistry.map.get(id_tuple)
+        entry = layers.owner() if layers is not None else None
+        compiled = ControlRegistry._owners.get(id_tuple)
+        if entry is None or compiled is None or compiled[0] is not entry or compiled[1] != entry.active:
+            self._compile_slot(id_tuple)
+
+    def _compile_slot(self, id_tuple: ControlID):
+        """Rebuilds the handler chain for one ControlID. Only the owner, the first active entry of the layer stack, receives the message."""
+        layers = ControlRegistry.map.get(id_tuple)
+        entry = layers.owner() if layers is not None else None
+        if entry is None:
+            ControlRegistry._owners.pop(id_tuple, None)
+            handler = None
+        else:
+            ControlRegistry._owners[id_tuple] = (entry, entry.active)
+            handler = self._build_handler(entry)
+        ControlRegistry.dispatch_table[self._slot_index(id_tuple)] = handler
+
+    def _build_handler(self, control_entry: ControlEntry) -> DispatchHandler:
+        """Binds everything the message path needs (event handle, feedback, translation, modifier) into a single closure.
+        The closure only holds a weak reference to the control, so the dispatch table does not keep it alive."""
+        control_ref = control_entry.ref
+        control = control_ref()
+        if control is None:
+            return None
+
+        if not control_entry.active:
+            name = control.name
+            def handle_inactive(event):
+                print(f"Control {name} is not active")
+                event.handled = not control_ref().playable
+            return handle_inactive
+
+        modifier_control = self.is_control_modified(control)
+        if modifier_control is not None:
+            emit_modified = self.event_object.handle("{}.{}".format(modifier_control.name, "value")).emit
+            def handle_modified(event):
+                event.handled = not modifier_control.playable
+                emit_modified(event)
+            handler = handle_modified
+        else:
+            emit_value = self.event_object.handle('{}.{}'.format(control.name, 'value')).emit
+            feedback = getattr(control, 'feedback', None)
+            feedback = feedback if callable(feedback) else None
+            translation = getattr(control, 'translation', None)
+            translation = translation if callable(translation) else None
 
-                    if hasattr(control, 'translation'):
-                        if hasattr(control.translation, '__call__'):
-                            control.translation(event)
+            if feedback is None and translation is None:
+                def handle_value(event):
+                    event.handled = not control_ref().playable
+                    emit_value(event)
+                handler = handle_value
             else:
-                print(f"Control {control.name} is not active")
-                event.handled = not control.playable
+                def handle_value_feedback(event):
+                    control = control_ref()
+                    event.handled = not control.playable
+                    emit_value(event)
+                    if feedback is not None:
+                        feedback(event, control)
+                    if translation is not None:
+                        translation(event)
+                handler = handle_value_feedback
+
+        input_filter = getattr(control, 'input_filter', None)
+        if input_filter is None:
+            return handler
+        # The filter runs before the value reaches any listener, feedback or translation, or the modifier that owns the control.
+        input_filter.deliver = handler
+        accept = input_filter.accept
+        def handle_filtered(event):
+            if accept(event):
+                handler(event)
+            else:
+                owner = modifier_control if modifier_control is not None else control_ref()
+                event.handled = not owner.playable
+        return handle_filtered
+
+    def HandleMidiMsg(self, event: flMidiMsg):
+        # The handler on top of the registry stack for this event_id(channel, identifier) was compiled when the registry last changed.
+        # It notifies the listeners in the event registry and executes feedback, translation and playable.
+        handler = ControlRegistry.dispatch_table[((event.status & 0x7F) << 7) | (event.data1 & 0x7F)]
+        if handler is not None:
+            handler(event)
@@ -0,0 +1,154 @@
+"""dirty.py: This module contains the dirty index service. It collects the mixer tracks and channels FL reports with OnDirtyMixerTrack and OnDirtyChannel, and hands them to subscribers on the next matching OnRefresh.
+"""
+__pdoc__ = {
+    "_fl": False,
+}
+from .event import RefreshFlags, RefreshDispatcher, FLEvents
+from ..api.fl_class import _fl
+
+ALL_DIRTY: int = -1
+"""Index FL passes when every track or channel changed. As a bitset, -1 has every bit set."""
+
+
+class DirtySet(object):
+    """A deduplicated set of dirty indexes, stored as the bits of an int. Bit n is set when index n is dirty, and bits is -1 when every index is dirty.
+        Iterating yields the dirty indexes in ascending order.
+
+    Args:
+        bits (int): The bitset.
+        size (int): Number of indexes that exist. Used to iterate an all dirty set.
+    """
+    __slots__ = ('bits', 'size')
+
+    def __init__(self, bits: int, size: int):
+        self.bits: int = bits
+        self.size: int = size
+
+    @property
+    def all(self) -> bool:
+        """True when every index is dirty."""
+        return self.bits < 0
+
+    def indexes(self, start: int = 0, stop: int = None) -> list[int]:
+        """Returns the dirty indexes in range(start, stop), in ascending order. Stop defaults to the size."""
+        if stop is None:
+            stop = self.size
+        if stop <= start:
+            return []
+        bits = (self.bits >> start) & ((1 << (stop - start)) - 1)
+        indexes = []
+        while bits:
+            low = bits & -bits
+            indexes.append(start + low.bit_length() - 1)
+            bits ^= low
+        return indexes
+
+    def __contains__(self, index: int) -> bool:
+        return index >= 0 and (self.bits >> index) & 1 == 1
+
+    def __iter__(self):
+        return iter(self.indexes())
+
+    def __len__(self) -> int:
+        return len(self.indexes())
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __repr__(self) -> str:
+        return 'DirtySet(all)' if self.all else 'DirtySet({})'.format(self.indexes(0, self.bits.bit_length()))
+
+
+class DirtyAccumulator(object):
+    """Collects the dirty indexes of one kind, mixer tracks or channels, between refreshes.
+        mark() only sets a bit. On a refresh with one of its flags, each subscriber is called once with every index marked since it was last called, so a track reported ten times is re-read once.
+        Subscribers whose flags did not come keep their indexes until their refresh arrives.
+
+    Args:
+        default_mask (int): OnRefresh flags FL sends after these indexes changed. Used when a subscriber does not pass a mask.
+        size_getter (callable): Returns how many indexes exist.
+    """
+    def __init__(self, default_mask: int, size_getter) -> None:
+        self.default_mask: int = default_mask
+        self.size_getter = size_getter
+        self.pending: int = 0
+        """Indexes marked since the last delivery, as a bitset."""
+        self.subscriptions: dict = dict()
+        """Handler to [mask, bits]. bits holds the indexes the handler has not received yet."""
+        self._mask: int = 0
+
+    def mark(self, index: int, *a) -> None:
+        """Marks index as dirty. -1 marks every index."""
+        if not self.subscriptions:
+            return
+        if index < 0:
+            self.pending = ALL_DIRTY
+        else:
+            self.pending |= 1 << index
+
+    def subscribe(self, handler, mask: int = None) -> None:
+        """Calls handler(dirty: DirtySet, flags: int) on refreshes with one of the flags in mask, when it has dirty indexes. flags is the matching subset of mask."""
+        self.subscriptions[handler] = [self.default_mask if mask is None else mask, 0]
+        self._update_mask()
+
+    def unsubscribe(self, handler) -> None:
+        if self.subscriptions.pop(handler, None) is not None:
+            self._update_mask()
+            if not self.subscriptions:
+                self.pending = 0
+
+    def _update_mask(self) -> None:
+        mask = 0
+        for subscription in self.subscriptions.values():
+            mask |= subscription[0]
+        if mask != self._mask:
+            dispatcher = RefreshDispatcher()
+            dispatcher.unsubscribe(self._on_refresh)
+            if mask:
+                dispatcher.subscribe(mask, self._on_refresh)
+            self._mask = mask
+
+    def _on_refresh(self, flags: int) -> None:
+        pending = self.pending
+        self.pending = 0
+        size = None
+        for handler, subscription in list(self.subscriptions.items()):
+            bits = subscription[1] | pending
+            matched = subscription[0] & flags
+            if matched and bits:
+                subscription[1] = 0
+                if size is None:
+                    size = self.size_getter()
+                handler(DirtySet(bits, size), matched)
+            else:
+                subscription[1] = bits
+
+
+class DirtyIndexes(object):
+    """The dirty index service. ControlSurface marks the indexes of OnDirtyMixerTrack and OnDirtyChannel here instead of re-reading anything, and the subscribers of mixer_tracks and channels receive them once, on the refresh that follows.
+        Example: DirtyIndexes().mixer_tracks.subscribe(self.on_dirty_tracks)
+        It is a singleton object.
+    """
+    MIXER_TRACK_COUNT: int = 127
+    """Mixer tracks 0 - 126. The master is 0."""
+
+    def __new__(cls, *args, **kwargs):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(DirtyIndexes, cls).__new__(cls)
+        return cls.instance
+
+    def __init__(self) -> None:
+        if 'mixer_tracks' in self.__dict__:
+            return
+        self.mixer_tracks: DirtyAccumulator = DirtyAccumulator(RefreshFlags.HW_Dirty_Mixer_Controls, lambda: DirtyIndexes.MIXER_TRACK_COUNT)
+        """Dirty mixer tracks, delivered on HW_Dirty_Mixer_Controls by default."""
+        self.channels: DirtyAccumulator = DirtyAccumulator(RefreshFlags.HW_ChannelEvent, _fl.channels.channelCount)
+        """Dirty channels, delivered on HW_ChannelEvent by default. The channel event flag FL passes with the index is not kept."""
+
+    def for_event(self, event_id: str) -> DirtyAccumulator:
+        """Returns the accumulator of FLEvents.OnDirtyMixerTrack or FLEvents.OnDirtyChannel, or None."""
+        if event_id == FLEvents.OnDirtyMixerTrack:
+            return self.mixer_tracks
+        if event_id == FLEvents.OnDirtyChannel:
+            return self.channels
+        return None
@@ -1,37 +1,114 @@
 """event.py: This module contains the essential event/observer building blocks from the rest of the .. 
     Essentially, this whole framework is a bidirectional observer pattern with builtin state. Most classes in this framework inherit from EventObject class.
 """
+import sys
+
+class EventHandle(object):
+    """A preallocated handle for one event_id. It holds the tuple of listener functions directly, so emitting through a handle needs no string building and no dict lookup.
+        Get a handle with EventObject.handle(event_id) and keep a reference to it in hot paths.
+        Listeners are stored in an insertion-ordered dict, so add and remove are O(1). Emit iterates an immutable tuple snapshot that is rebuilt lazily after the listeners change.
+    """
+    __slots__ = ('event_id', 'listeners', 'watchers', '_listener_map')
+
+    def __init__(self, event_id: str):
+        self.event_id: str = event_id
+        """The interned event_id this handle belongs to."""
+        self.listeners: tuple = ()
+        """Tuple snapshot of the listener functions, or None when it must be rebuilt. Use EventHandle.snapshot() to read it."""
+        self.watchers: tuple = ()
+        """Functions called with this handle after a listener is added or removed, see add_watcher(). They are never called on emit."""
+        self._listener_map: dict = dict()
+
+    def add(self, func):
+        """Adds an observer function to this handle. Raises TypeError if func is not callable."""
+        if not callable(func):
+            raise TypeError(f"Listener for {self.event_id} is not callable: {func!r}")
+        if func not in self._listener_map:
+            self._listener_map[func] = None
+            self.listeners = None
+            for watcher in self.watchers:
+                watcher(self)
+
+    def remove(self, func):
+        """Removes an observer function from this handle."""
+        if func in self._listener_map:
+            del self._listener_map[func]
+            self.listeners = None
+            for watcher in self.watchers:
+                watcher(self)
+
+    def add_watcher(self, func):
+        """Registers func(handle) to be called after a listener is added to or removed from this handle. Adding the same function twice does nothing."""
+        if func not in self.watchers:
+            self.watchers = self.watchers + (func,)
+
+    def remove_watcher(self, func):
+        """Removes a function registered with add_watcher."""
+        if func in self.watchers:
+            self.watchers = tuple(watcher for watcher in self.watchers if watcher is not func)
+
+    def snapshot(self) -> tuple:
+        """Returns the immutable tuple of listener functions."""
+        listeners = self.listeners
+        if listeners is None:
+            listeners = self.listeners = tuple(self._listener_map)
+        return listeners
+
+    def emit(self, *a, **k):
+        """Calls every listener of this handle with the supplied arguments."""
+        listeners = self.listeners
+        if listeners is None:
+            listeners = self.snapshot()
+        for func in listeners:
+            func(*a, **k)
+
+    def __len__(self) -> int:
+        return len(self._listener_map)
+
+    def __repr__(self) -> str:
+        return f"EventHandle({self.event_id}, {len(self._listener_map)} listeners)"
 
 class EventObject(object):
     """This object is a base class that implements the basic observer patter. """
+
     def __init__(self, *a, **k):
         super(EventObject, self).__init__(*a, **k)
-        self.observers: dict[str,list] = dict()
+        self.observers: dict[str,EventHandle] = dict()
         """dictionary instance variable that houses the registry of observer functions. 
-        They key for this dictionary is a str of the event_id. Events are referenced by this key and the list of observers are called by it."""
+        They key for this dictionary is a str of the event_id. Events are referenced by this key and the EventHandle holding the observers is returned by it."""
+        self._handle_watchers: list = []
+
+    def add_handle_watcher(self, func):
+        """Registers func to be called with every EventHandle this object creates from now on. Used by UIState to sort state subscriptions when they appear instead of scanning observers on every idle."""
+        self._handle_watchers.append(func)
+
+    def handle(self, event_id: str) -> EventHandle:
+        """Returns the EventHandle for event_id, creating it on first use. The event_id is interned, and the same handle is returned for the lifetime of this object."""
+        handle = self.observers.get(event_id)
+        if handle is None:
+            event_id = sys.intern(event_id)
+            handle = EventHandle(event_id)
+            self.observers[event_id] = handle
+            for watcher in self._handle_watchers:
+                watcher(handle)
+        return handle
 
     def subscribe(self, event_id: str, func):
-        """Subscribe to an event by event_id. This function add the supplied observer func to the list identified by event_id."""
-        if self.observers.get(event_id) == None:
-            self.observers[event_id] = []
-        if(func not in self.observers[event_id]):
-            self.observers[event_id].append(func)
+        """Subscribe to an event by event_id. This function add the supplied observer func to the handle identified by event_id."""
+        self.handle(event_id).add(func)
             
     def unsubscribe(self, event_id: str, func):
         """Unsubscribe removed the supplied function from the list of observers by event_id."""
-        handlers: list = self.observers[event_id]
-        if handlers != None:
-            for f in handlers:
-                if f == func:
-                    handlers.remove(f)
+        handle = self.observers.get(event_id)
+        if handle != None:
+            handle.remove(func)
     
     def notify_listeners(self, event_id: str, *a, **k):
-        """This function is called whenever a new event(event_id) is received. All functions registered by subscribe are called by the specified event_id."""
-        _listeners = self.observers.get(event_id)
-        if _listeners != None:
-            for func in _listeners:
-                if hasattr(func, '__call__'):
-                    func(*a, **k)
+        """This function is called whenever a new event(event_id) is received. All functions registered by subscribe are called by the specified event_id.
+            Hot paths should hold on to EventObject.handle(event_id) and call EventHandle.emit() instead."""
+        handle = self.observers.get(event_id)
+        if handle != None:
+            handle.emit(*a, **k)
 
 class GlobalEventObject(EventObject):
     """This is a global event registry. This class inherits from EventObject and is used to receive the events from FL Studio. 
@@ -45,7 +122,109 @@ class GlobalEventObject(EventObject):
         return cls.instance
 
     def __init__(self) -> None:
-        super(GlobalEventObject, self).__init__()
+        # The singleton is initialized once. Re-running EventObject.__init__ would drop the observers and orphan handles held elsewhere.
+        if not hasattr(self, 'observers'):
+            super(GlobalEventObject, self).__init__()
+
+class RefreshFlags:
+    """Integer values of the flags FL Studio passes to OnRefresh. These mirror the HW_Dirty_* constants of the midi module."""
+    HW_Dirty_Mixer_Sel: int = 1
+    HW_Dirty_Mixer_Display: int = 2
+    HW_Dirty_Mixer_Controls: int = 4
+    HW_Dirty_RemoteLinks: int = 16
+    HW_Dirty_FocusedWindow: int = 32
+    HW_Dirty_Performance: int = 64
+    HW_Dirty_LEDs: int = 256
+    HW_Dirty_RemoteLinkValues: int = 512
+    HW_Dirty_Patterns: int = 1024
+    HW_Dirty_Tracks: int = 2048
+    HW_Dirty_ControlValues: int = 4096
+    HW_Dirty_Colors: int = 8192
+    HW_Dirty_Names: int = 16384
+    HW_Dirty_ChannelRackGroup: int = 32768
+    HW_ChannelEvent: int = 65536
+    ALL: int = 0x1FFFF
+    """Every flag. Used for OnDoFullRefresh."""
+
+REFRESH_FLAG_NAMES: dict[int, str] = {value: name for name, value in vars(RefreshFlags).items() if name.startswith('HW_')}
+"""Flag value to name, for every single OnRefresh flag."""
+_REFRESH_FLAG_VALUES: dict[str, int] = {name: value for value, name in REFRESH_FLAG_NAMES.items()}
+
+class RefreshDispatcher(object):
+    """Dispatches the OnRefresh flag word to handlers subscribed with a bitmask, like HW_Dirty_Mixer_Controls | HW_Dirty_Colors.
+        Each handler is called once per refresh with the subset of its mask that is set, and not at all when none of its flags are set.
+        The handlers to call for a flag word are looked up in a table that is built the first time the word arrives, and rebuilt after subscriptions change. FL only sends a handful of different words, so a refresh is usually one dict lookup.
+        Listeners of the per flag string events (FLEvents.HW_Dirty_Mixer_Sel, ...) and of FLEvents.OnRefresh are bridged into the table by bridge(), and receive the whole flag word as before.
+        It is a singleton object.
+    """
+    MAX_TABLE_SIZE: int = 256
+
+    def __new__(cls, *args, **kwargs):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(RefreshDispatcher, cls).__new__(cls)
+        return cls.instance
+
+    def __init__(self) -> None:
+        if 'subscriptions' in self.__dict__:
+            return
+        self.subscriptions: dict = dict()
+        """Handler to mask, in subscription order."""
+        self.flags: int = 0
+        """The flag word of the current, or last, refresh."""
+        self._table: dict[int, tuple] = dict()
+        self._bridges: dict[EventHandle, object] = dict()
+        self._bridged: list = []
+
+    def subscribe(self, mask: int, handler) -> None:
+        """Calls handler(flags & mask) on every refresh that has one of the flags in mask. Subscribing a handler again adds to its mask."""
+        self.subscriptions[handler] = self.subscriptions.get(handler, 0) | mask
+        self._table.clear()
+
+    def unsubscribe(self, handler) -> None:
+        if self.subscriptions.pop(handler, None) is not None:
+            self._table.clear()
+
+    def _entries(self, flags: int) -> tuple:
+        if len(self._table) >= self.MAX_TABLE_SIZE:
+            self._table.clear()
+        entries = self._table[flags] = tuple((handler, flags & mask) for handler, mask in self.subscriptions.items() if flags & mask or mask == ~0)
+        return entries
+
+    def dispatch(self, flags: int) -> None:
+        """Calls the handlers subscribed to any of flags. It is patched into the OnRefresh function. Handlers subscribed with the mask ~0 are called for every refresh, even with no flags set."""
+        self.flags = flags
+        entries = self._table.get(flags)
+        if entries is None:
+            entries = self._entries(flags)
+        for handler, matched in entries:
+            handler(matched)
+
+    def bridge(self, event_object: 'EventObject') -> None:
+        """Forwards refreshes to the per flag string events and to FLEvents.OnRefresh of event_object, while they have listeners."""
+        if event_object in self._bridged:
+            return
+        self._bridged.append(event_object)
+        for handle in list(event_object.observers.values()):
+            self._bridge_handle(handle)
+        event_object.add_handle_watcher(self._bridge_handle)
+
+    def _bridge_handle(self, handle: EventHandle) -> None:
+        if handle.event_id == FLEvents.OnRefresh:
+            # Every bit, so OnRefresh listeners also get flags this module does not know, and a zero word.
+            mask = ~0
+        else:
+            mask = _REFRESH_FLAG_VALUES.get(handle.event_id)
+            if mask is None:
+                return
+        def on_change(handle: EventHandle, mask=mask):
+            emit = self._bridges.get(handle)
+            if handle and emit is None:
+                emit = self._bridges[handle] = lambda matched: handle.emit(self.flags)
+                self.subscribe(mask, emit)
+            elif not handle and emit is not None:
+                self.unsubscribe(self._bridges.pop(handle))
+        handle.add_watcher(on_change)
+        on_change(handle)
 
 class FLEvents:
     HW_Dirty_Mixer_Sel : str = "HW_Dirty_Mixer_Sel"
@@ -376,4 +555,4 @@ Set optional 'indexGlobal' to 1 to return global channel index instead of index
         isRecording: str = "transport.isRecording"
         isPlaying: str = "transport.isPlaying"
         getSongPosHint: str = "transport.getSongPosHint"
-        getLoopMode: str = "transport.getLoopMode"
\ No newline at end of file
+        getLoopMode: str = "transport.getLoopMode"
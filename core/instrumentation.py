@@ -0,0 +1,218 @@
+"""instrumentation.py: This module contains the opt-in instrumentation of the event hot paths. It records call counts and latency histograms per event_id and per listener.
+"""
+import weakref
+from array import array
+from time import perf_counter_ns
+from .event import EventHandle, GlobalEventObject
+from .control_registry import ControlRegistry
+from .state import UIState
+
+HISTOGRAM_BUCKETS: int = 32
+"""Latency buckets per key. Bucket n counts calls that took 2^(n-1) to 2^n nanoseconds, the last bucket everything slower."""
+
+
+def listener_name(func) -> str:
+    """Returns a readable name for a listener function, with the name of the component or control it is bound to."""
+    owner = getattr(func, '__self__', None)
+    name = getattr(func, '__qualname__', None) or repr(func)
+    owner_name = getattr(owner, 'name', None)
+    if isinstance(owner_name, str):
+        return '{}({}).{}'.format(type(owner).__name__, owner_name, getattr(func, '__name__', name))
+    return name
+
+
+class Instrumentation(object):
+    """Opt-in instrumentation of EventHandle.emit (and so EventObject.notify_listeners), ControlRegistry.HandleMidiMsg and UIState.HandleState.
+        Enabling it swaps instrumented versions of those methods into their classes, and disabling it swaps the originals back, so a disabled instrumentation costs nothing on the hot path.
+        Every call is recorded in a fixed size ring buffer of (key, duration) samples, and in per key counts, totals and log2 latency histograms. Keys are event_ids, listeners and the 'HandleMidiMsg' and 'HandleState' entry points.
+        Memory is only allocated the first time a key is seen. Use dump() to print a report, for example from a button combo with dump_on(), or on OnDeInit.
+        It is a singleton object.
+    """
+    _original_emit = EventHandle.emit
+    _original_handle_midi_msg = ControlRegistry.HandleMidiMsg
+    _original_handle_state = UIState.HandleState
+
+    def __new__(cls, *args, **kwargs):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(Instrumentation, cls).__new__(cls)
+        return cls.instance
+
+    def __init__(self, ring_size: int = 4096) -> None:
+        if 'ring_keys' in self.__dict__:
+            return
+        self.enabled: bool = False
+        self.ring_size: int = ring_size
+        """Number of samples kept in the ring buffer. The oldest samples are overwritten."""
+        self.ring_keys: array = array('l', [-1]) * ring_size
+        self.ring_durations: array = array('q', [0]) * ring_size
+        self.ring_position: int = 0
+        self.key_names: list[str] = []
+        self.key_kinds: list[str] = []
+        """'event', 'listener' or 'entry' for every key."""
+        self.counts: array = array('q')
+        self.totals: array = array('q')
+        self.maximums: array = array('q')
+        self.histograms: array = array('q')
+        self._keys: dict = dict()
+        """event_id or entry point name -> key."""
+        self._listener_keys: dict[int, tuple] = dict()
+        """id(listener) -> (weak reference to the listener, key). Listeners are not kept alive by the instrumentation."""
+
+    def _allocate(self, name: str, kind: str) -> int:
+        """Allocates the counters of a new key and returns its index."""
+        key = len(self.key_names)
+        self.key_names.append(name)
+        self.key_kinds.append(kind)
+        self.counts.append(0)
+        self.totals.append(0)
+        self.maximums.append(0)
+        self.histograms.extend(array('q', [0]) * HISTOGRAM_BUCKETS)
+        return key
+
+    def _key(self, obj: str, kind: str) -> int:
+        """Returns the key index of an event_id or entry point, allocating its counters on first use."""
+        key = self._keys.get(obj)
+        if key is None:
+            key = self._keys[obj] = self._allocate(str(obj), kind)
+        return key
+
+    def _listener_key(self, func) -> int:
+        """Returns the key index of a listener. A listener that was collected, and whose id was reused, gets a new key."""
+        entry = self._listener_keys.get(id(func))
+        if entry is not None and entry[0]() is func:
+            return entry[1]
+        key = self._allocate(listener_name(func), 'listener')
+        try:
+            ref = weakref.ref(func)
+        except TypeError:
+            # Kept strongly if it cannot be referenced weakly.
+            ref = lambda: func
+        self._listener_keys[id(func)] = (ref, key)
+        return key
+
+    def record(self, key: int, duration: int) -> None:
+        """Records one call of key that took duration nanoseconds."""
+        position = self.ring_position
+        self.ring_keys[position] = key
+        self.ring_durations[position] = duration
+        self.ring_position = (position + 1) % self.ring_size
+        self.counts[key] += 1
+        self.totals[key] += duration
+        if duration > self.maximums[key]:
+            self.maximums[key] = duration
+        bucket = duration.bit_length()
+        self.histograms[key * HISTOGRAM_BUCKETS + (bucket if bucket < HISTOGRAM_BUCKETS else HISTOGRAM_BUCKETS - 1)] += 1
+
+    def enable(self) -> None:
+        """Swaps the instrumented hot paths in. The dispatch table is recompiled, because it binds EventHandle.emit when it is compiled."""
+        if self.enabled:
+            return
+        self.enabled = True
+        original_emit = Instrumentation._original_emit
+        original_handle_midi_msg = Instrumentation._original_handle_midi_msg
+        original_handle_state = Instrumentation._original_handle_state
+        key = self._key
+        listener_key = self._listener_key
+        record = self.record
+        midi_key = key('HandleMidiMsg', 'entry')
+        state_key = key('HandleState', 'entry')
+
+        def emit(handle, *a, **k):
+            listeners = handle.listeners
+            if listeners is None:
+                listeners = handle.snapshot()
+            start = perf_counter_ns()
+            for func in listeners:
+                listener_start = perf_counter_ns()
+                func(*a, **k)
+                record(listener_key(func), perf_counter_ns() - listener_start)
+            record(key(handle.event_id, 'event'), perf_counter_ns() - start)
+        emit.__doc__ = original_emit.__doc__
+
+        def HandleMidiMsg(registry, event):
+            start = perf_counter_ns()
+            original_handle_midi_msg(registry, event)
+            record(midi_key, perf_counter_ns() - start)
+
+        def HandleState(ui_state):
+            start = perf_counter_ns()
+            original_handle_state(ui_state)
+            record(state_key, perf_counter_ns() - start)
+
+        EventHandle.emit = emit
+        ControlRegistry.HandleMidiMsg = HandleMidiMsg
+        UIState.HandleState = HandleState
+        ControlRegistry().recompile()
+
+    def disable(self) -> None:
+        """Swaps the original hot paths back in. Recorded data is kept until reset()."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        EventHandle.emit = Instrumentation._original_emit
+        ControlRegistry.HandleMidiMsg = Instrumentation._original_handle_midi_msg
+        UIState.HandleState = Instrumentation._original_handle_state
+        ControlRegistry().recompile()
+
+    def reset(self) -> None:
+        """Clears every recorded sample and counter."""
+        for values in (self.counts, self.totals, self.maximums, self.histograms):
+            for index in range(len(values)):
+                values[index] = 0
+        for index in range(self.ring_size):
+            self.ring_keys[index] = -1
+        self.ring_position = 0
+
+    def percentile(self, key: int, fraction: float) -> int:
+        """Returns the upper bound in nanoseconds of the histogram bucket that holds the given fraction of the calls of key."""
+        count = self.counts[key]
+        if not count:
+            return 0
+        threshold = count * fraction
+        seen = 0
+        offset = key * HISTOGRAM_BUCKETS
+        for bucket in range(HISTOGRAM_BUCKETS):
+            seen += self.histograms[offset + bucket]
+            if seen >= threshold:
+                return min(1 << bucket, self.maximums[key])
+        return self.maximums[key]
+
+    def recent(self) -> list[tuple[str, int]]:
+        """Returns the (key name, duration in nanoseconds) samples in the ring buffer, oldest first."""
+        samples = []
+        for offset in range(self.ring_size):
+            index = (self.ring_position + offset) % self.ring_size
+            key = self.ring_keys[index]
+            if key >= 0:
+                samples.append((self.key_names[key], self.ring_durations[index]))
+        return samples
+
+    def report(self, limit: int = 20) -> str:
+        """Returns the report printed by dump(): the entry points, then the event_ids and listeners with the most total time."""
+        lines = []
+        def section(title: str, kind: str):
+            keys = [key for key in range(len(self.key_names)) if self.key_kinds[key] == kind and self.counts[key]]
+            keys.sort(key=lambda key: self.totals[key], reverse=True)
+            lines.append(title)
+            lines.append('  {:>9} {:>10} {:>9} {:>9} {:>9}  {}'.format('calls', 'total ms', 'mean us', 'p99 us', 'max us', 'name'))
+            for key in keys[:limit]:
+                lines.append('  {:>9} {:>10.2f} {:>9.1f} {:>9.1f} {:>9.1f}  {}'.format(
+                    self.counts[key], self.totals[key] / 1e6, self.totals[key] / self.counts[key] / 1e3,
+                    self.percentile(key, 0.99) / 1e3, self.maximums[key] / 1e3, self.key_names[key]))
+        section('Entry points', 'entry')
+        section('Events', 'event')
+        section('Listeners', 'listener')
+        return '\n'.join(lines)
+
+    def dump(self, limit: int = 20) -> str:
+        """Prints the report to the script output and returns it."""
+        report = self.report(limit)
+        print(report)
+        return report
+
+    def dump_on(self, event_id: str, event_object=None) -> None:
+        """Dumps the report every time event_id is notified with a truthy first argument, like the 'pressed' or 'hold' event of a button combo."""
+        def dump(*a, **k):
+            if not a or a[0]:
+                self.dump()
+        (event_object or GlobalEventObject()).subscribe(event_id, dump)
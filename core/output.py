@@ -0,0 +1,99 @@
+"""output.py: This module contains the MIDI output queue. Messages sent to the controller are collected during a tick, merged by address, compared with what the device already shows, and flushed in one go.
+"""
+import device
+
+class MidiOutput(object):
+    """This is a global MIDI output queue. It has the same midiOutMsg and midiOutSysex methods as FL Studio's device module, so it can be used wherever the device module is used.
+        Every other attribute is forwarded to the device module.
+
+        Short messages are keyed by address (status byte and data1). A shadow copy holds the last data2 sent to every address:
+        writes that repeat the value the device already shows are dropped, and several writes to the same address within a tick are merged so only the last one is sent.
+        SysEx frames are queued in order, and identical frames within a tick are sent once.
+        ControlSurface flushes the queue on OnIdle and OnUpdateBeatIndicator. It is a singleton object.
+    """
+    def __new__(cls, *args, **kwargs):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(MidiOutput, cls).__new__(cls)
+        return cls.instance
+
+    def __init__(self, max_messages_per_flush: int = 0) -> None:
+        if 'shadow' in self.__dict__:
+            return
+        self.shadow: dict[int, int] = dict()
+        """Last data2 sent, by address. The address is status | data1 << 8. Sending a note on forgets the note off of the same note, and the other way around."""
+        self.pending: dict = dict()
+        """Messages waiting for the next flush. Short messages map address to data2, SysEx frames map the frame to itself."""
+        self.max_messages_per_flush: int = max_messages_per_flush
+        """Maximum number of messages sent by one flush. The rest stay queued for the next one. 0 means no limit."""
+        self.flush_hooks: list = []
+        """Functions called at the start of every flush. Batchers like PadColorBatch use them to queue their frames."""
+
+    def __getattr__(self, name: str):
+        return getattr(device, name)
+
+    def midiOutMsg(self, message: int, channel: int = -1, data1: int = -1, data2: int = -1) -> None:
+        """Queues a short MIDI message. Accepts the same arguments as device.midiOutMsg: a packed message, or status, channel, data1 and data2."""
+        if data1 < 0:
+            status = message & 0xFF
+            data1 = (message >> 8) & 0xFF
+            data2 = (message >> 16) & 0xFF
+        else:
+            status = message if channel < 0 else (message & 0xF0) | (channel & 0x0F)
+        address = status | (data1 << 8)
+        if 0x80 <= status < 0xA0:
+            # Note on and note off to the same note drive the same LED. The later write replaces a queued one of the other kind.
+            self.pending.pop(address ^ 0x10, None)
+        if self.shadow.get(address) == data2:
+            # The device already shows this value. Drop any earlier write of this tick too.
+            self.pending.pop(address, None)
+        else:
+            self.pending[address] = data2
+
+    def midiOutSysex(self, message: bytes) -> None:
+        """Queues a SysEx frame. Frames are sent in order, identical frames within a tick are sent once."""
+        message = bytes(message)
+        self.pending[message] = message
+
+    def invalidate(self, address: int = None) -> None:
+        """Forgets what the device shows, for one address or for all of them, so the next write is sent even if it repeats the last value. Call this when the controller was reset or reconnected."""
+        if address is None:
+            self.shadow.clear()
+        else:
+            self.shadow.pop(address, None)
+
+    def add_flush_hook(self, func) -> None:
+        """Registers func to be called at the start of every flush."""
+        if func not in self.flush_hooks:
+            self.flush_hooks.append(func)
+
+    def remove_flush_hook(self, func) -> None:
+        """Removes a function registered with add_flush_hook."""
+        if func in self.flush_hooks:
+            self.flush_hooks.remove(func)
+
+    def flush(self, max_messages: int = None) -> int:
+        """Sends the queued messages and returns how many were sent. max_messages defaults to max_messages_per_flush, 0 sends everything."""
+        for hook in self.flush_hooks:
+            hook()
+        pending = self.pending
+        if not pending:
+            return 0
+        if max_messages is None:
+            max_messages = self.max_messages_per_flush
+        if not max_messages or len(pending) <= max_messages:
+            self.pending = dict()
+            items = pending.items()
+        else:
+            items = list(pending.items())[:max_messages]
+            for key, _ in items:
+                del pending[key]
+        shadow = self.shadow
+        for key, value in items:
+            if key.__class__ is bytes:
+                device.midiOutSysex(value)
+            else:
+                shadow[key] = value
+                if 0x80 <= key & 0xFF < 0xA0:
+                    shadow.pop(key ^ 0x10, None)
+                device.midiOutMsg(key | (value << 16))
+        return len(items)
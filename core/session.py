@@ -0,0 +1,205 @@
+"""session.py: This module contains the session recorder and the replay engine. A session is the stream of FL Studio callbacks a ControlSurface receives, written to a compact binary log.
+"""
+import struct
+import time
+from ..util.midi import MidiMessage
+
+SESSION_MAGIC: bytes = b'FLCS'
+SESSION_VERSION: int = 1
+SESSION_HEADER = struct.Struct('<4sHd')
+"""Magic, version, and the wall clock time the recording started."""
+SESSION_RECORD = struct.Struct('<BBBBBiQ')
+"""Kind, status, data1, data2, port, value, and microseconds since the recording started. 17 bytes per record."""
+
+
+class SessionRecord:
+    """Kinds of session records."""
+    MIDI: int = 1
+    """OnMidiMsg. Uses status, data1, data2 and port."""
+    REFRESH: int = 2
+    """OnRefresh. The flags are in value."""
+    IDLE: int = 3
+    """OnIdle."""
+    BEAT: int = 4
+    """OnUpdateBeatIndicator. The beat value is in value."""
+    DIRTY_MIXER_TRACK: int = 5
+    """OnDirtyMixerTrack. The track index is in value."""
+    DIRTY_CHANNEL: int = 6
+    """OnDirtyChannel. The channel index is in value and the flag in data1."""
+    FULL_REFRESH: int = 7
+    """OnDoFullRefresh."""
+    DEINIT: int = 8
+    """OnDeInit. It is the last record of a session, since OnDeInit stops the recording."""
+
+
+class SessionRecorder(object):
+    """Records the callbacks of a ControlSurface to a binary session log.
+        Records are packed into a preallocated buffer, which is written to the file in bulk at the end of every OnIdle. The buffer is only written early when it fills up between two idle calls.
+        attach() wraps the callbacks of one surface instance, and detach() removes the wrappers again, so a surface that is not recorded runs its callbacks unchanged.
+
+    Args:
+        path (str): The file the session is written to. It is overwritten.
+        capacity (int, optional): Number of records the buffer holds. Defaults to 4096.
+    """
+    CALLBACKS: tuple = ('OnMidiMsg', 'OnRefresh', 'OnIdle', 'OnUpdateBeatIndicator', 'OnDirtyMixerTrack', 'OnDirtyChannel', 'OnDoFullRefresh', 'OnDeInit')
+
+    def __init__(self, path: str, capacity: int = 4096):
+        self.path: str = path
+        self.capacity: int = capacity
+        self.buffer: bytearray = bytearray(SESSION_RECORD.size * capacity)
+        self.offset: int = 0
+        self.records: int = 0
+        """Number of records written so far."""
+        self.file = None
+        self.surface = None
+        self._start: int = 0
+
+    def start(self) -> None:
+        """Opens the session file and writes the header. attach() calls it."""
+        if self.file is None:
+            self.file = open(self.path, 'wb')
+            self.file.write(SESSION_HEADER.pack(SESSION_MAGIC, SESSION_VERSION, time.time()))
+            self._start = time.perf_counter_ns()
+
+    def record(self, kind: int, status: int = 0, data1: int = 0, data2: int = 0, port: int = 0, value: int = 0) -> None:
+        """Packs one record into the buffer."""
+        if self.offset == len(self.buffer):
+            self.flush()
+        SESSION_RECORD.pack_into(self.buffer, self.offset, kind, status & 0xFF, data1 & 0xFF, data2 & 0xFF, port & 0xFF, value, (time.perf_counter_ns() - self._start) // 1000)
+        self.offset += SESSION_RECORD.size
+        self.records += 1
+
+    def flush(self) -> None:
+        """Writes the buffered records to the file."""
+        if self.offset and self.file is not None:
+            self.file.write(memoryview(self.buffer)[:self.offset])
+            self.offset = 0
+
+    def stop(self) -> None:
+        """Writes the remaining records and closes the file."""
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def attach(self, surface) -> None:
+        """Starts recording the callbacks of surface."""
+        self.start()
+        self.surface = surface
+        record = self.record
+        flush = self.flush
+        on_midi_msg, on_refresh, on_idle, on_beat, on_dirty_mixer_track, on_dirty_channel, on_full_refresh, on_deinit = (getattr(surface, name) for name in self.CALLBACKS)
+
+        def OnMidiMsg(event):
+            record(SessionRecord.MIDI, event.status, event.data1, event.data2, getattr(event, 'port', 0))
+            on_midi_msg(event)
+
+        def OnRefresh(flags):
+            record(SessionRecord.REFRESH, value=flags)
+            on_refresh(flags)
+
+        def OnIdle():
+            record(SessionRecord.IDLE)
+            on_idle()
+            flush()
+
+        def OnUpdateBeatIndicator(value):
+            record(SessionRecord.BEAT, value=value)
+            on_beat(value)
+
+        def OnDirtyMixerTrack(index):
+            record(SessionRecord.DIRTY_MIXER_TRACK, value=index)
+            on_dirty_mixer_track(index)
+
+        def OnDirtyChannel(index, flag):
+            record(SessionRecord.DIRTY_CHANNEL, data1=flag, value=index)
+            on_dirty_channel(index, flag)
+
+        def OnDoFullRefresh():
+            record(SessionRecord.FULL_REFRESH)
+            on_full_refresh()
+
+        def OnDeInit():
+            # Recorded first, the surface stops the recording in OnDeInit and the stop writes the buffer.
+            record(SessionRecord.DEINIT)
+            on_deinit()
+
+        for callback in (OnMidiMsg, OnRefresh, OnIdle, OnUpdateBeatIndicator, OnDirtyMixerTrack, OnDirtyChannel, OnDoFullRefresh, OnDeInit):
+            setattr(surface, callback.__name__, callback)
+
+    def detach(self) -> None:
+        """Stops recording and restores the callbacks of the surface."""
+        if self.surface is not None:
+            for name in self.CALLBACKS:
+                if name in self.surface.__dict__:
+                    delattr(self.surface, name)
+            self.surface = None
+        self.stop()
+
+
+def read_session(path: str) -> list[tuple]:
+    """Reads a session log. Returns the records as (kind, status, data1, data2, port, value, microseconds) tuples. Raises ValueError if the file is not a session log."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < SESSION_HEADER.size:
+        raise ValueError('{} is not a session log'.format(path))
+    magic, version, _ = SESSION_HEADER.unpack_from(data)
+    if magic != SESSION_MAGIC or version != SESSION_VERSION:
+        raise ValueError('{} is not a version {} session log'.format(path, SESSION_VERSION))
+    end = len(data) - (len(data) - SESSION_HEADER.size) % SESSION_RECORD.size
+    return list(SESSION_RECORD.iter_unpack(memoryview(data)[SESSION_HEADER.size:end]))
+
+
+class SessionReplay(object):
+    """Replays a session log against a ControlSurface, at full speed or in real time. MIDI records are replayed as MidiMessage events.
+
+    Args:
+        records (list[tuple]): The records, as returned by read_session().
+    """
+    def __init__(self, records: list[tuple]):
+        self.records: list[tuple] = records
+
+    @classmethod
+    def load(cls, path: str) -> 'SessionReplay':
+        return cls(read_session(path))
+
+    def replay(self, surface, realtime: bool = False) -> dict:
+        """Replays every record against surface.
+
+        Args:
+            surface (ControlSurface): The surface that receives the callbacks.
+            realtime (bool, optional): Waits between records as long as the recording did. Defaults to False, full speed.
+
+        Returns:
+            dict: Count of replayed records per kind name, plus 'elapsed_ms'.
+        """
+        names = {value: name for name, value in vars(SessionRecord).items() if isinstance(value, int)}
+        counts = {name: 0 for name in names.values()}
+        on_midi_msg = surface.OnMidiMsg
+        start = time.perf_counter_ns()
+        for kind, status, data1, data2, port, value, timestamp in self.records:
+            if realtime:
+                delay = timestamp / 1e6 - (time.perf_counter_ns() - start) / 1e9
+                if delay > 0:
+                    time.sleep(delay)
+            if kind == SessionRecord.MIDI:
+                on_midi_msg(MidiMessage(status, data1, data2, port))
+            elif kind == SessionRecord.IDLE:
+                surface.OnIdle()
+            elif kind == SessionRecord.REFRESH:
+                surface.OnRefresh(value)
+            elif kind == SessionRecord.BEAT:
+                surface.OnUpdateBeatIndicator(value)
+            elif kind == SessionRecord.DIRTY_MIXER_TRACK:
+                surface.OnDirtyMixerTrack(value)
+            elif kind == SessionRecord.DIRTY_CHANNEL:
+                surface.OnDirtyChannel(value, data1)
+            elif kind == SessionRecord.FULL_REFRESH:
+                surface.OnDoFullRefresh()
+            elif kind == SessionRecord.DEINIT:
+                surface.OnDeInit()
+            else:
+                continue
+            counts[names[kind]] += 1
+        counts['elapsed_ms'] = (time.perf_counter_ns() - start) / 1e6
+        return counts
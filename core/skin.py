@@ -1,4 +1,7 @@
+import weakref
 from abc import ABC, abstractmethod
+from .output import MidiOutput
+from ..util.colors import pad_color
 
 class SkinColor(ABC):
   """
@@ -25,4 +28,126 @@ class SkinColor(ABC):
     Returns:
       None
     """
-    pass
\ No newline at end of file
+    pass
+
+class PadRGBColor(SkinColor):
+  """
+  Skin color for RGB pads. Drawing it sets the color of the pad with `PadControl.set_color`, so pads with a `PadColorBatch` send it in the batched SysEx frame.
+
+  Args:
+    rgb (tuple[int, int, int]): The 8 bit color.
+    brightness (int, optional): Brightness passed to `util.colors.pad_color`. Defaults to 127.
+  """
+  def __init__(self, rgb: tuple[int, int, int], brightness: int = 127):
+    self.rgb: tuple[int, int, int] = tuple(rgb)
+    self.brightness: int = brightness
+    self.rgb7: tuple[int, int, int] = pad_color(self.rgb, brightness, max=127)
+    """The 7 bit color sent to the pad, computed once."""
+
+  def draw(self, control) -> None:
+    control.set_color(self.rgb7)
+
+class SysexPadEncoder(ABC):
+  """
+  Abstract base class for encoding many pad colors into SysEx frames.
+
+  Subclasses implement `encode` for the frame format of a particular device. They are used by `PadColorBatch`.
+  """
+
+  @abstractmethod
+  def encode(self, colors: list[tuple[int, tuple[int, int, int]]]) -> list[bytes]:
+    """
+    Encodes pad colors into SysEx frames.
+
+    Args:
+      colors: (index, (red, green, blue)) for every pad that changed, in the order they changed. The index is the MIDI note of the pad.
+
+    Returns:
+      list[bytes]: The complete SysEx frames, including the 0xF0 and 0xF7 bytes.
+    """
+    pass
+
+class RGBSysexPadEncoder(SysexPadEncoder):
+  """
+  Encodes pad colors as header + (entry_prefix, index, red, green, blue) for each pad + 0xF7.
+
+  This matches the RGB LED commands of many pad controllers. Color values are sent as 7 bit values, use `util.colors.pad_color` or `RGB8_to_RGB7` to convert 8 bit colors.
+
+  Args:
+    header (bytes): Start of the frame, including 0xF0 and the manufacturer/device bytes.
+    entry_prefix (bytes, optional): Bytes written before each pad, like a lighting type. Defaults to none.
+    max_pads_per_frame (int, optional): Splits large updates into several frames for devices with a small SysEx buffer. Defaults to 0, no limit.
+  """
+  def __init__(self, header: bytes, entry_prefix: bytes = b'', max_pads_per_frame: int = 0):
+    self.header: bytes = bytes(header)
+    self.entry_prefix: bytes = bytes(entry_prefix)
+    self.max_pads_per_frame: int = max_pads_per_frame
+
+  def encode(self, colors: list[tuple[int, tuple[int, int, int]]]) -> list[bytes]:
+    step = self.max_pads_per_frame or len(colors)
+    frames = []
+    for start in range(0, len(colors), step):
+      frame = bytearray(self.header)
+      for index, (red, green, blue) in colors[start:start + step]:
+        frame += self.entry_prefix
+        frame += bytes((index & 0x7F, red & 0x7F, green & 0x7F, blue & 0x7F))
+      frame.append(0xF7)
+      frames.append(bytes(frame))
+    return frames
+
+class PadColorBatch(object):
+  """
+  Gathers the pad colors set during a tick and sends all that changed in one SysEx frame, on the next MidiOutput flush.
+
+  A shadow copy of the colors the device shows is kept, so colors that did not change are not sent again.
+
+  Args:
+    encoder (SysexPadEncoder): Encoder for the device's frame format.
+    output (MidiOutput, optional): Queue the frames are sent on. Defaults to the global MidiOutput.
+  """
+  def __init__(self, encoder: SysexPadEncoder, output: MidiOutput = None):
+    self.encoder: SysexPadEncoder = encoder
+    self.output: MidiOutput = output or MidiOutput()
+    self.shadow: dict[int, tuple[int, int, int]] = dict()
+    self.pending: dict[int, tuple[int, int, int]] = dict()
+    # The output is a singleton, so it only holds the batch weakly. The hook removes itself when the batch is collected.
+    output = self.output
+    flush = weakref.WeakMethod(self.flush, lambda ref: output.remove_flush_hook(hook))
+    def hook():
+      batch_flush = flush()
+      if batch_flush is not None:
+        batch_flush()
+    self._hook = hook
+    output.add_flush_hook(hook)
+
+  def set_color(self, index: int, rgb: tuple[int, int, int]) -> None:
+    """
+    Queues the color of one pad.
+
+    Args:
+      index (int): The MIDI note of the pad.
+      rgb (tuple[int, int, int]): The 7 bit color.
+    """
+    rgb = tuple(rgb)
+    if self.shadow.get(index) == rgb:
+      self.pending.pop(index, None)
+    else:
+      self.pending[index] = rgb
+
+  def invalidate(self) -> None:
+    """Forgets the colors the device shows, so every pad is sent again the next time it is set."""
+    self.shadow.clear()
+
+  def flush(self) -> None:
+    """Encodes the queued colors and queues the frames on the output. Called by MidiOutput.flush."""
+    if not self.pending:
+      return
+    colors = list(self.pending.items())
+    self.pending = dict()
+    self.shadow.update(colors)
+    for frame in self.encoder.encode(colors):
+      self.output.midiOutSysex(frame)
+
+  def close(self) -> None:
+    """Stops flushing with the output."""
+    self.output.remove_flush_hook(self._hook)
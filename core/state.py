@@ -1,12 +1,16 @@
 __pdoc__ = {
     "_fl": False,
 }
-from .event import EventObject
+import time
+from functools import partial
+from .event import EventObject, EventHandle, GlobalEventObject, RefreshFlags, RefreshDispatcher, FLEvents
+from .dirty import DirtyIndexes, DirtySet
 from ..util.functions import safe_getattr
 from ..api.fl_class import _fl
 
 class StateBase():
     """This is a base class the implements a basic state pattern. It has one method that checks the change of state, using a instance dictionary."""
+
     def __init__(self) -> None:
         self._state = dict()
 
@@ -42,37 +46,419 @@ class StateObject(object):
         self.state[event_id] = value
 
 
+_Flags = RefreshFlags
+
+_MIXER_TRACK_FLAGS = _Flags.HW_Dirty_Mixer_Controls | _Flags.HW_Dirty_Mixer_Display
+_CHANNEL_FLAGS = _Flags.HW_ChannelEvent | _Flags.HW_Dirty_ChannelRackGroup
+_PLAYLIST_FLAGS = _Flags.HW_Dirty_Tracks | _Flags.HW_Dirty_Performance
+
+REFRESH_MODULE_FLAGS: dict[str, int] = {
+    "mixer": _MIXER_TRACK_FLAGS | _Flags.HW_Dirty_Mixer_Sel | _Flags.HW_Dirty_Names | _Flags.HW_Dirty_Colors,
+    "channels": _CHANNEL_FLAGS | _Flags.HW_Dirty_Names | _Flags.HW_Dirty_Colors,
+    "patterns": _Flags.HW_Dirty_Patterns | _Flags.HW_Dirty_Names | _Flags.HW_Dirty_Colors,
+    "playlist": _PLAYLIST_FLAGS | _Flags.HW_Dirty_Names | _Flags.HW_Dirty_Colors,
+    "plugins": _Flags.HW_Dirty_ControlValues | _Flags.HW_Dirty_Names | _Flags.HW_Dirty_Colors | _Flags.HW_Dirty_FocusedWindow,
+    "transport": _Flags.HW_Dirty_LEDs,
+    "ui": _Flags.HW_Dirty_LEDs | _Flags.HW_Dirty_FocusedWindow,
+}
+"""Refresh flags that make any getter of an FL module dirty. Getters of modules missing from this table are volatile and polled on idle."""
+
+REFRESH_GETTER_FLAGS: dict[str, int] = {
+    "mixer.trackNumber": _Flags.HW_Dirty_Mixer_Sel,
+    "mixer.trackCount": _Flags.HW_Dirty_Mixer_Display,
+    "mixer.getTrackName": _Flags.HW_Dirty_Mixer_Display | _Flags.HW_Dirty_Names,
+    "mixer.getTrackColor": _Flags.HW_Dirty_Mixer_Display | _Flags.HW_Dirty_Colors,
+    "mixer.getActiveEffectIndex": _Flags.HW_Dirty_FocusedWindow | _Flags.HW_Dirty_Mixer_Sel,
+    "channels.selectedChannel": _CHANNEL_FLAGS | _Flags.HW_Dirty_FocusedWindow,
+    "channels.channelNumber": _CHANNEL_FLAGS | _Flags.HW_Dirty_FocusedWindow,
+    "channels.channelCount": _CHANNEL_FLAGS,
+    "channels.getChannelName": _CHANNEL_FLAGS | _Flags.HW_Dirty_Names,
+    "channels.getChannelColor": _CHANNEL_FLAGS | _Flags.HW_Dirty_Colors,
+    "playlist.getPerformanceModeState": _Flags.HW_Dirty_Performance,
+    "ui.getFocused": _Flags.HW_Dirty_FocusedWindow,
+    "ui.getFocusedFormID": _Flags.HW_Dirty_FocusedWindow,
+    "ui.getFocusedFormCaption": _Flags.HW_Dirty_FocusedWindow,
+    "ui.getFocusedPluginName": _Flags.HW_Dirty_FocusedWindow,
+    "ui.getVisible": _Flags.HW_Dirty_FocusedWindow,
+}
+"""Refresh flags for individual getters. These take precedence over REFRESH_MODULE_FLAGS."""
+
+VOLATILE_GETTERS: set[str] = {
+    "mixer.getTrackPeaks",
+    "mixer.getLastPeakVol",
+    "mixer.getSongStepPos",
+    "mixer.getSongTickPos",
+    "mixer.getCurrentTempo",
+    "channels.getActivityLevel",
+    "playlist.getTrackActivityLevel",
+    "playlist.getTrackActivityLevelVis",
+    "playlist.getVisTimeBar",
+    "playlist.getVisTimeTick",
+    "playlist.getVisTimeStep",
+    "transport.getSongPos",
+    "transport.getSongPosHint",
+    "ui.getHintMsg",
+    "ui.getTimeDispMin",
+}
+"""Getters that change without FL sending a matching refresh flag, like meters and song position. These are polled on idle."""
+
+def getter_refresh_flags(event_id: str) -> int:
+    """Returns the refresh flags that make the FL getter event_id dirty, or 0 if the getter must be polled on idle."""
+    if event_id in VOLATILE_GETTERS:
+        return 0
+    flags = REFRESH_GETTER_FLAGS.get(event_id)
+    if flags is None:
+        flags = REFRESH_MODULE_FLAGS.get(event_id.split('.', 1)[0], 0)
+    return flags
+
+
+STATE_ARGUMENT_SEPARATOR: str = ':'
+"""Separates the getter path from its arguments in a state event_id. Example: "mixer.getTrackVolume:5"."""
+
+def _parse_state_argument(argument: str):
+    argument = argument.strip()
+    for cast in (int, float):
+        try:
+            return cast(argument)
+        except ValueError:
+            pass
+    return argument
+
+def parse_state_event_id(event_id: str) -> tuple:
+    """Splits a state event_id into (module_name, function_name, args). Returns None if event_id is not of the form module.function[:arg,arg...].
+        Arguments are converted to int or float when possible. Example: "mixer.getTrackVolume:5,1" -> ("mixer", "getTrackVolume", (5, 1))
+    """
+    path, _, arguments = event_id.partition(STATE_ARGUMENT_SEPARATOR)
+    path_list = path.split('.')
+    if len(path_list) != 2:
+        return None
+    args = tuple(_parse_state_argument(argument) for argument in arguments.split(',')) if arguments else ()
+    return path_list[0], path_list[1], args
+
+def state_event_id(path: str, *args) -> str:
+    """Builds the event_id for an FL getter called with args. Example: state_event_id("mixer.getTrackVolume", 5) -> "mixer.getTrackVolume:5"."""
+    if not args:
+        return path
+    return path + STATE_ARGUMENT_SEPARATOR + ','.join(str(arg) for arg in args)
+
+_UNSET = object()
+
+class StateSubscription(object):
+    """A watched FL Studio getter. It is created once per event_id when the event is first subscribed, with the getter and its arguments already bound into one callable.
+        The last value read is kept in the subscription itself.
+    """
+    __slots__ = ('event_id', 'handle', 'getter', 'args', 'refresh_flags', 'value')
+
+    def __init__(self, event_id: str, handle: EventHandle, getter, args: tuple, refresh_flags: int):
+        self.event_id: str = event_id
+        self.handle: EventHandle = handle
+        """Event handle the changed values are emitted on."""
+        self.args: tuple = args
+        """Arguments the getter is called with."""
+        self.getter = partial(getter, *args) if args else getter
+        """The resolved FL Studio function, bound to args."""
+        self.refresh_flags: int = refresh_flags
+        """OnRefresh flags that make this getter dirty. 0 means volatile: it is polled on idle."""
+        self.value = _UNSET
+        """The last value read. Unset until the first read."""
+
+
 class UIState(StateObject):
-    """This class handles the UI events sent from FL Studio."""
-    def __init__(self, event_object: EventObject) -> None:
+    """This class handles the UI events sent from FL Studio.
+        Subscriptions to FL getters are sorted when their event handle is created. Getters that FL reports through OnRefresh flags are only re-read by HandleRefresh when a matching flag arrives.
+        Volatile getters are polled by HandleState, at most once every poll_interval_ms. Event ids that are not FL getters are never looked at.
+    """
+    def __init__(self, event_object: EventObject, poll_interval_ms: int = 0) -> None:
         super(UIState, self).__init__(event_object)
         self.fl = _fl
+        self.poll_interval_ms: int = poll_interval_ms
+        """Minimum time between two polls of the volatile getters, in milliseconds. 0 polls on every idle call."""
+        self._next_poll: float = 0.0
+        self._subscriptions: dict[str, StateSubscription] = dict()
+        self._refresh_subscriptions: list[StateSubscription] = []
+        self._volatile_subscriptions: list[StateSubscription] = []
+        self._pending: dict[StateSubscription, None] = dict()
+        self._watched: dict[tuple, StateSubscription] = dict()
+        """(getter, args) -> subscription, for watch()."""
+        self._adding: str = None
+        self._idle_handle: EventHandle = event_object.handle('idle')
+        for handle in list(event_object.observers.values()):
+            self._add_handle(handle)
+        event_object.add_handle_watcher(self._add_handle)
+
+    def watch(self, getter, args: tuple = (), refresh_flags: int = None) -> EventHandle:
+        """Watches any getter called with args and returns the EventHandle its changed values are emitted on. Subscribe to the handle, or to its event_id.
+            refresh_flags defaults to the flags of the matching FL getter; pass 0 to poll it on idle. Watching the same getter and args twice returns the same handle.
+            An FL getter keeps its plain event_id, like "mixer.getTrackVolume:5". Any other getter, like a lambda, gets an event_id made unique by its id.
+        """
+        key = (getter, tuple(args))
+        subscription = self._watched.get(key)
+        if subscription is not None:
+            return subscription.handle
+        module_name = getattr(getter, '__module__', None) or 'state'
+        function_name = getattr(getter, '__name__', None) or type(getter).__name__
+        path = '{}.{}'.format(module_name, function_name)
+        if safe_getattr(safe_getattr(self.fl, module_name), function_name) != getter:
+            path = '{}@{:x}'.format(path, id(getter))
+        event_id = state_event_id(path, *args)
+        subscription = self._subscriptions.get(event_id)
+        if subscription is None:
+            # The handle watcher must not add an FL getter subscription of its own before this one, with other refresh flags.
+            self._adding = event_id
+            try:
+                handle = self.event_object.handle(event_id)
+            finally:
+                self._adding = None
+            subscription = self._subscriptions.get(event_id)
+            if subscription is None:
+                if refresh_flags is None:
+                    refresh_flags = getter_refresh_flags(path)
+                subscription = self._add_subscription(StateSubscription(event_id, handle, getter, tuple(args), refresh_flags))
+        self._watched[key] = subscription
+        return subscription.handle
+
+    def _add_handle(self, handle: EventHandle) -> None:
+        """Sorts a new event handle into the refresh or volatile group if it names an FL getter."""
+        if handle.event_id in self._subscriptions or handle.event_id == self._adding:
+            return
+        parsed = parse_state_event_id(handle.event_id)
+        if parsed is None:
+            return
+        module_name, function_name, args = parsed
+        module = safe_getattr(self.fl, module_name)
+        if module is None:
+            return
+        getter = safe_getattr(module, function_name)
+        if not callable(getter):
+            return
+        refresh_flags = getter_refresh_flags('{}.{}'.format(module_name, function_name))
+        self._add_subscription(StateSubscription(handle.event_id, handle, getter, args, refresh_flags))
+
+    def _add_subscription(self, subscription: StateSubscription) -> StateSubscription:
+        handle = subscription.handle
+        self._subscriptions[subscription.event_id] = subscription
+        if subscription.refresh_flags:
+            self._refresh_subscriptions.append(subscription)
+        else:
+            self._volatile_subscriptions.append(subscription)
+        handle.add_watcher(lambda _, subscription=subscription: self._on_subscription_changed(subscription))
+        self._on_subscription_changed(subscription)
+        return subscription
+
+    def _on_subscription_changed(self, subscription: StateSubscription) -> None:
+        """Schedules a read on the next idle when a getter gains listeners. Refresh getters are not read while nobody listens, so this also catches up a stale value."""
+        if subscription.handle:
+            self._pending[subscription] = None
+
+    def _update(self, subscription: StateSubscription) -> None:
+        if not subscription.handle:
+            return
+        new_state = subscription.getter()
+        # The first read always differs from the unset value, so the first value is published too.
+        if new_state != subscription.value:
+            subscription.value = new_state
+            subscription.handle.emit(new_state)
+
+    def get_value(self, event_id: str, default=None):
+        """Returns the last value read for a state event_id, or default if it has not been read."""
+        subscription = self._subscriptions.get(event_id)
+        if subscription is None or subscription.value is _UNSET:
+            return default
+        return subscription.value
+
+    def HandleRefresh(self, flags: int) -> None:
+        """Re-reads the getters made dirty by the OnRefresh flags. It is patched into the OnRefresh function."""
+        for subscription in self._refresh_subscriptions:
+            if subscription.refresh_flags & flags:
+                self._update(subscription)
 
     def HandleState(self):
         """This method handles the UI events sent from FL Studio. It is patched into the onIdle function.
-            When onIdel is called, this method loops through the registered observers in the global event object. For every event_id that is registered, it calls that list of observer functions.
-            These event registration is called in the components/controls. The pattern for event_ids is [module_name].[function].
-            Example... If a component wants to listen for a selected channel change, the event id is "channels.selectedChannel".
-            This function will split that event_id, call the corresponding FL Studio module function, check the state to see if it was changed, and if it was changed from the last onIdle call, notify the list of observer functions. 
+            When onIdle is called, this method notifies the 'idle' listeners, reads the getters that were subscribed since the last call, and polls the volatile getters.
+            The pattern for event_ids is [module_name].[function]. Example... If a component wants to listen for a selected channel change, the event id is "channels.selectedChannel".
+            Getters that take arguments append them after a colon: "mixer.getTrackVolume:5" calls mixer.getTrackVolume(5). See state_event_id().
+            The value is compared with the last one read, and the observer functions are notified when it has changed.
         """
-        # Loop through subscriber_map object to find what state we are listening to
-        self.event_object.notify_listeners('idle')
-        for event_id in list(self.event_object.observers):
-
-            # Get the state by the event_id string
-            path_list = event_id.split('.')
-
-            # This checks to see if this event_id is for the UI state.
-            module = safe_getattr(self.fl, path_list[0])
-            if module != None: 
-                new_state = getattr(module, path_list[1])()
-                # Check to see if we have tracked this state before. If not, state has changed, call all functions subscribed
-                old_state = self.state.get(event_id)
-                if old_state == None:
-                    self.event_object.notify_listeners(event_id, new_state)
-                else:
-                    # Check to see if state has changed. If so call all subscribed functions with value
-                    if new_state != old_state:
-                        self.event_object.notify_listeners(
-                            event_id, new_state)
-                self.state[event_id] = new_state
\ No newline at end of file
+        self._idle_handle.emit()
+        if self._pending:
+            pending = self._pending
+            self._pending = dict()
+            for subscription in pending:
+                self._update(subscription)
+        if self.poll_interval_ms:
+            now = time.monotonic()
+            if now < self._next_poll:
+                return
+            self._next_poll = now + self.poll_interval_ms / 1000
+        for subscription in self._volatile_subscriptions:
+            self._update(subscription)
+
+
+class RangeWatcher(object):
+    """Watches a set of fields over a window of indexes, like the 8 mixer tracks shown on an 8 strip controller.
+        Indexes reported by dirty_event (OnDirtyMixerTrack, OnDirtyChannel) are collected by the DirtyIndexes service, and only those that are inside the window are re-read when OnRefresh brings one of refresh_flags.
+        All changes of one refresh are published together as a single '{name}.rows_changed' event, with a diff of the form {index: {field: new_value}}.
+        Watchers without a dirty_event re-read the whole window on a matching refresh.
+        Use the mixer(), channels() and playlist() constructors for the common cases.
+    """
+    MIXER_FIELDS: dict[str, str] = {
+        "volume": "getTrackVolume",
+        "pan": "getTrackPan",
+        "mute": "isTrackMuted",
+        "solo": "isTrackSolo",
+        "name": "getTrackName",
+        "color": "getTrackColor",
+    }
+    """Field name to mixer module getter."""
+    CHANNEL_FIELDS: dict[str, str] = {
+        "volume": "getChannelVolume",
+        "pan": "getChannelPan",
+        "mute": "isChannelMuted",
+        "solo": "isChannelSolo",
+        "name": "getChannelName",
+        "color": "getChannelColor",
+    }
+    """Field name to channels module getter."""
+    PLAYLIST_FIELDS: dict[str, str] = {
+        "mute": "isTrackMuted",
+        "solo": "isTrackSolo",
+        "name": "getTrackName",
+        "color": "getTrackColor",
+    }
+    """Field name to playlist module getter."""
+
+    class Events:
+        ROWS_CHANGED: str = 'rows_changed'
+        """Published once per refresh with {index: {field: value}} for every changed row."""
+
+    def __init__(self, name: str, module, fields: dict[str, str], start: int = 0, count: int = 8, dirty_event: str = None, refresh_flags: int = RefreshFlags.ALL, count_getter=None) -> None:
+        self.name: str = name
+        """Name of the watcher. Events are published as '{name}.rows_changed'."""
+        self.fields: dict = {field: getattr(module, getter_name) for field, getter_name in fields.items()}
+        """Field name to resolved getter. Each getter is called with the row index."""
+        self.start: int = start
+        """First index of the window."""
+        self.count: int = count
+        """Number of indexes in the window."""
+        self.dirty_event: str = dirty_event
+        """FLEvents.OnDirtyMixerTrack or FLEvents.OnDirtyChannel, whose dirty indexes are re-read. None re-reads the whole window on every matching refresh."""
+        self.refresh_flags: int = refresh_flags
+        """OnRefresh flags that trigger a re-read of the dirty rows."""
+        self.count_getter = count_getter
+        """Optional function returning how many indexes exist. Indexes past it are not read."""
+        self.rows: dict[int, dict] = dict()
+        """Last values read, by index."""
+        self.event_object: EventObject = GlobalEventObject()
+        self._rows_changed: EventHandle = self.event_object.handle('{}.{}'.format(name, RangeWatcher.Events.ROWS_CHANGED))
+        self._dirty: set = set()
+        self._all_dirty: bool = True
+        self.active: bool = False
+
+    @classmethod
+    def mixer(cls, name: str, start: int = 0, count: int = 8, fields: list[str] = None) -> 'RangeWatcher':
+        """Watches mixer tracks. Dirty tracks come from OnDirtyMixerTrack and are re-read on the mixer refresh flags."""
+        return cls(name, _fl.mixer, cls._select_fields(cls.MIXER_FIELDS, fields), start, count,
+                   dirty_event=FLEvents.OnDirtyMixerTrack,
+                   refresh_flags=RefreshFlags.HW_Dirty_Mixer_Controls | RefreshFlags.HW_Dirty_Mixer_Display | RefreshFlags.HW_Dirty_Names | RefreshFlags.HW_Dirty_Colors,
+                   count_getter=_fl.mixer.trackCount)
+
+    @classmethod
+    def channels(cls, name: str, start: int = 0, count: int = 8, fields: list[str] = None) -> 'RangeWatcher':
+        """Watches channel rack channels. Dirty channels come from OnDirtyChannel and are re-read on HW_ChannelEvent and related flags."""
+        return cls(name, _fl.channels, cls._select_fields(cls.CHANNEL_FIELDS, fields), start, count,
+                   dirty_event=FLEvents.OnDirtyChannel,
+                   refresh_flags=RefreshFlags.HW_ChannelEvent | RefreshFlags.HW_Dirty_ChannelRackGroup | RefreshFlags.HW_Dirty_Names | RefreshFlags.HW_Dirty_Colors,
+                   count_getter=_fl.channels.channelCount)
+
+    @classmethod
+    def playlist(cls, name: str, start: int = 1, count: int = 8, fields: list[str] = None) -> 'RangeWatcher':
+        """Watches playlist tracks. FL does not report dirty playlist tracks, so the window is re-read on HW_Dirty_Tracks."""
+        return cls(name, _fl.playlist, cls._select_fields(cls.PLAYLIST_FIELDS, fields), start, count,
+                   refresh_flags=RefreshFlags.HW_Dirty_Tracks | RefreshFlags.HW_Dirty_Names | RefreshFlags.HW_Dirty_Colors,
+                   count_getter=_fl.playlist.trackCount)
+
+    @staticmethod
+    def _select_fields(all_fields: dict[str, str], fields: list[str]) -> dict[str, str]:
+        if fields is None:
+            return all_fields
+        return {field: all_fields[field] for field in fields}
+
+    def window(self) -> range:
+        """Returns the indexes of the current window."""
+        return range(self.start, self.start + self.count)
+
+    def set_window(self, start: int, count: int = None) -> None:
+        """Moves the window. Rows entering the window are read immediately and published as changed."""
+        self.start = start
+        if count is not None:
+            self.count = count
+        for index in list(self.rows):
+            if not self.start <= index < self.start + self.count:
+                del self.rows[index]
+        self._all_dirty = True
+        if self.active:
+            self.refresh()
+
+    def _on_dirty(self, dirty: DirtySet, flags: int) -> None:
+        indexes = dirty.indexes(self.start, self.start + self.count)
+        if indexes:
+            self._dirty.update(indexes)
+            self.refresh()
+
+    def _on_refresh(self, flags: int) -> None:
+        # Only called with the matching refresh_flags.
+        self._all_dirty = True
+        self.refresh()
+
+    def refresh(self) -> dict[int, dict]:
+        """Re-reads the dirty rows now and publishes the changes. Returns the diff."""
+        if self._all_dirty:
+            indexes = self.window()
+        else:
+            indexes = sorted(self._dirty)
+        self._all_dirty = False
+        self._dirty.clear()
+        limit = self.count_getter() if self.count_getter is not None else None
+        diff: dict[int, dict] = dict()
+        for index in indexes:
+            if limit is not None and index >= limit:
+                continue
+            row = self.rows.get(index)
+            if row is None:
+                row = self.rows[index] = dict()
+            changes = None
+            for field, getter in self.fields.items():
+                value = getter(index)
+                if field not in row or row[field] != value:
+                    row[field] = value
+                    if changes is None:
+                        changes = diff[index] = dict()
+                    changes[field] = value
+        if diff:
+            self._rows_changed.emit(diff)
+        return diff
+
+    def activate(self) -> None:
+        """Starts watching. The whole window is read and published."""
+        if self.active:
+            return
+        self.active = True
+        dirty_indexes = DirtyIndexes().for_event(self.dirty_event)
+        if dirty_indexes is not None:
+            dirty_indexes.subscribe(self._on_dirty, self.refresh_flags)
+        else:
+            RefreshDispatcher().subscribe(self.refresh_flags, self._on_refresh)
+        self._all_dirty = True
+        self.refresh()
+
+    def deactivate(self) -> None:
+        """Stops watching. The rows are forgotten, so the next activate publishes every row again."""
+        if not self.active:
+            return
+        self.active = False
+        dirty_indexes = DirtyIndexes().for_event(self.dirty_event)
+        if dirty_indexes is not None:
+            dirty_indexes.unsubscribe(self._on_dirty)
+        else:
+            RefreshDispatcher().unsubscribe(self._on_refresh)
+        self.rows.clear()
@@ -0,0 +1,90 @@
+"""timer.py: This module contains the timer wheel used for time based control events, like hold and short press.
+"""
+import time
+
+def now_ms() -> float:
+    """Returns the monotonic clock in milliseconds."""
+    return time.monotonic() * 1000
+
+
+class Timer(object):
+    """A callback scheduled on the TimerWheel. Keep it to cancel the callback."""
+    __slots__ = ('deadline', 'tick', 'callback', 'args', 'active')
+
+    def __init__(self, deadline: float, tick: int, callback, args: tuple):
+        self.deadline: float = deadline
+        """Monotonic time in milliseconds at which the callback is due."""
+        self.tick: int = tick
+        self.callback = callback
+        self.args: tuple = args
+        self.active: bool = True
+        """False once the timer fired or was cancelled."""
+
+
+class TimerWheel(object):
+    """This is a global hashed timer wheel on the monotonic clock. Timers are hashed into slots of resolution_ms, so scheduling and cancelling are O(1).
+        ControlSurface advances the wheel on OnIdle, so callbacks fire on the first idle call after their deadline. When no timer is armed, advance returns without reading the clock.
+        It is a singleton object.
+    """
+    def __new__(cls, *args, **kwargs):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(TimerWheel, cls).__new__(cls)
+        return cls.instance
+
+    def __init__(self, resolution_ms: int = 5, slot_count: int = 256, clock=now_ms) -> None:
+        if 'slots' in self.__dict__:
+            return
+        self.resolution_ms: int = resolution_ms
+        """Width of one slot in milliseconds."""
+        self.clock = clock
+        """Function returning the current time in milliseconds."""
+        self.slots: list[dict] = [dict() for _ in range(slot_count)]
+        self._count: int = 0
+        self._last_tick: int = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def call_later(self, delay_ms: float, callback, *args) -> Timer:
+        """Calls callback(*args) once, delay_ms milliseconds from now. Returns the Timer."""
+        now = self.clock()
+        if self._count == 0:
+            self._last_tick = int(now // self.resolution_ms)
+        deadline = now + delay_ms
+        tick = -int(-deadline // self.resolution_ms)
+        timer = Timer(deadline, tick, callback, args)
+        self.slots[tick % len(self.slots)][timer] = None
+        self._count += 1
+        return timer
+
+    def cancel(self, timer: Timer) -> None:
+        """Cancels a timer that has not fired yet. Cancelling twice, or None, does nothing."""
+        if timer is not None and timer.active:
+            timer.active = False
+            del self.slots[timer.tick % len(self.slots)][timer]
+            self._count -= 1
+
+    def advance(self, now: float = None) -> None:
+        """Fires every timer whose deadline has passed."""
+        if self._count == 0:
+            return
+        if now is None:
+            now = self.clock()
+        current_tick = int(now // self.resolution_ms)
+        slot_count = len(self.slots)
+        first_tick = self._last_tick
+        if current_tick - first_tick >= slot_count:
+            first_tick = current_tick - slot_count + 1
+        self._last_tick = current_tick
+        for tick in range(first_tick, current_tick + 1):
+            slot = self.slots[tick % slot_count]
+            if not slot:
+                continue
+            for timer in [timer for timer in slot if timer.deadline <= now]:
+                # An earlier callback may have cancelled this timer.
+                if not timer.active:
+                    continue
+                del slot[timer]
+                self._count -= 1
+                timer.active = False
+                timer.callback(*timer.args)
@@ -0,0 +1,13 @@
+"""
+Offline stand-ins for the FL Studio MIDI scripting modules (mixer, channels, device, ...), backed by an in-memory project.
+They make it possible to import, profile and benchmark the framework outside of FL Studio. Install them before importing the framework:
+
+    from fl_controller_framework.offline import install
+    project = install()
+    from fl_controller_framework.control_surface import ControlSurface
+
+The project records every MIDI message sent to the device and counts every API call.
+"""
+from .project import OfflineProject, OfflineChannel, OfflineMixerTrack, OfflinePattern, OfflinePlaylistTrack, OfflinePlugin, BrowserNode
+from .modules import install, OfflineModule, OfflineAPI, MidiConstants, MODULE_APIS
+from .message import OfflineMidiMsg
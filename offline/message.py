@@ -0,0 +1,9 @@
+"""message.py: A stand-in for the MIDI event object FL Studio passes to OnMidiMsg.
+"""
+from ..util.midi import MidiMessage
+
+
+class OfflineMidiMsg(MidiMessage):
+    """A MIDI message as FL Studio passes it to OnMidiMsg. Only the fields the framework reads are filled in.
+        It does not derive from api.fl_class.flMidiMsg, so it can be imported before the stand-in modules are installed.
+    """
@@ -0,0 +1,641 @@
+"""modules.py: Stand-ins for the FL Studio MIDI scripting modules, backed by an OfflineProject.
+"""
+import sys
+import math
+import types
+from .project import OfflineProject, OfflinePattern, BrowserNode
+
+
+def _toggle(current: bool, value: int) -> bool:
+    """FL setters take -1 to toggle, otherwise the new state."""
+    return not current if value == -1 else bool(value)
+
+
+class OfflineAPI(object):
+    """Base class of the module stand-ins. Every public method becomes a function of the module."""
+    def __init__(self, project: OfflineProject):
+        self.project: OfflineProject = project
+
+
+class MixerAPI(OfflineAPI):
+    def trackCount(self) -> int:
+        return len(self.project.mixer_tracks)
+
+    def trackNumber(self) -> int:
+        return self.project.selected_mixer_track
+
+    def setTrackNumber(self, index: int, flags: int = 0) -> None:
+        self.selectTrack(index)
+
+    def selectTrack(self, index: int) -> None:
+        for track in self.project.mixer_tracks:
+            track.selected = False
+        self.project.mixer_tracks[index].selected = True
+        self.project.selected_mixer_track = index
+
+    def isTrackSelected(self, index: int) -> bool:
+        return self.project.mixer_tracks[index].selected
+
+    def getTrackName(self, index: int) -> str:
+        return self.project.mixer_tracks[index].name
+
+    def setTrackName(self, index: int, name: str) -> None:
+        self.project.mixer_tracks[index].name = name
+
+    def getTrackColor(self, index: int) -> int:
+        return self.project.mixer_tracks[index].color
+
+    def setTrackColor(self, index: int, color: int) -> None:
+        self.project.mixer_tracks[index].color = color
+
+    def getTrackVolume(self, index: int, mode: int = 0) -> float:
+        volume = self.project.mixer_tracks[index].volume
+        if mode:
+            # Unity gain sits at 0.8 of the fader.
+            return 20 * math.log10(volume / 0.8) if volume > 0 else -math.inf
+        return volume
+
+    def setTrackVolume(self, index: int, volume: float, pickupMode: int = 0) -> None:
+        self.project.mixer_tracks[index].volume = min(max(volume, 0.0), 1.0)
+
+    def getTrackPan(self, index: int) -> float:
+        return self.project.mixer_tracks[index].pan
+
+    def setTrackPan(self, index: int, pan: float, pickupMode: int = 0) -> None:
+        self.project.mixer_tracks[index].pan = min(max(pan, -1.0), 1.0)
+
+    def isTrackMuted(self, index: int) -> bool:
+        return self.project.mixer_tracks[index].muted
+
+    def muteTrack(self, index: int, value: int = -1) -> None:
+        track = self.project.mixer_tracks[index]
+        track.muted = _toggle(track.muted, value)
+
+    def isTrackEnabled(self, index: int) -> bool:
+        return not self.project.mixer_tracks[index].muted
+
+    def isTrackSolo(self, index: int) -> bool:
+        return self.project.mixer_tracks[index].solo
+
+    def soloTrack(self, index: int, value: int = -1, mode: int = -1) -> None:
+        track = self.project.mixer_tracks[index]
+        track.solo = _toggle(track.solo, value)
+
+    def isTrackArmed(self, index: int) -> bool:
+        return self.project.mixer_tracks[index].armed
+
+    def armTrack(self, index: int) -> None:
+        track = self.project.mixer_tracks[index]
+        track.armed = not track.armed
+
+    def getTrackPeaks(self, index: int, mode: int) -> float:
+        left, right = self.project.mixer_tracks[index].peaks
+        return left if mode == 0 else right if mode == 1 else max(left, right)
+
+    def getLastPeakVol(self, section: int) -> float:
+        return self.getTrackPeaks(0, section)
+
+    def getActiveEffectIndex(self):
+        return self.project.active_effect
+
+    def getTrackPluginId(self, index: int, plugIndex: int) -> int:
+        return index << 22 | plugIndex << 16
+
+    def isTrackSlotsEnabled(self, index: int) -> bool:
+        return True
+
+    def isTrackAutomationEnabled(self, index: int, plugIndex: int) -> bool:
+        return False
+
+    def getTrackStereoSep(self, index: int) -> float:
+        return 0.0
+
+    def getRouteSendActive(self, index: int, destIndex: int) -> bool:
+        return destIndex == 0 and index != 0
+
+    def getCurrentTempo(self, asInt: int = 0):
+        return int(self.project.tempo * 1000) if asInt else self.project.tempo
+
+    def getSongStepPos(self) -> int:
+        return int(self.project.song_pos * 16)
+
+    def getSongTickPos(self, mode: int = 0) -> int:
+        return int(self.project.song_pos * 96 * 4)
+
+
+class ChannelsAPI(OfflineAPI):
+    def _channel(self, index: int):
+        return self.project.channels[index]
+
+    def channelCount(self, globalCount: int = 0) -> int:
+        return len(self.project.channels)
+
+    def selectedChannel(self, canBeNone: int = 0, offset: int = 0, indexGlobal: int = 0) -> int:
+        if canBeNone and not any(channel.selected for channel in self.project.channels):
+            return -1
+        return self.project.selected_channel + offset
+
+    def channelNumber(self, canBeNone: int = 0, offset: int = 0) -> int:
+        return self.selectedChannel(canBeNone, offset)
+
+    def getChannelIndex(self, index: int) -> int:
+        return index
+
+    def selectOneChannel(self, index: int) -> None:
+        for channel in self.project.channels:
+            channel.selected = False
+        self._channel(index).selected = True
+        self.project.selected_channel = index
+
+    def selectChannel(self, index: int, value: int = -1) -> None:
+        channel = self._channel(index)
+        channel.selected = _toggle(channel.selected, value)
+        if channel.selected:
+            self.project.selected_channel = index
+
+    def isChannelSelected(self, index: int) -> bool:
+        return self._channel(index).selected
+
+    def getChannelName(self, index: int) -> str:
+        return self._channel(index).name
+
+    def setChannelName(self, index: int, name: str) -> None:
+        self._channel(index).name = name
+
+    def getChannelColor(self, index: int) -> int:
+        return self._channel(index).color
+
+    def setChannelColor(self, index: int, color: int) -> None:
+        self._channel(index).color = color
+
+    def getChannelVolume(self, index: int, mode: int = 0) -> float:
+        return self._channel(index).volume
+
+    def setChannelVolume(self, index: int, volume: float, pickupMode: int = 0) -> None:
+        self._channel(index).volume = min(max(volume, 0.0), 1.0)
+
+    def getChannelPan(self, index: int) -> float:
+        return self._channel(index).pan
+
+    def setChannelPan(self, index: int, pan: float, pickupMode: int = 0) -> None:
+        self._channel(index).pan = min(max(pan, -1.0), 1.0)
+
+    def getChannelPitch(self, index: int, mode: int = 0) -> float:
+        return self._channel(index).pitch
+
+    def setChannelPitch(self, index: int, value: float, mode: int = 0, pickupMode: int = 0) -> None:
+        self._channel(index).pitch = value
+
+    def isChannelMuted(self, index: int) -> bool:
+        return self._channel(index).muted
+
+    def muteChannel(self, index: int, value: int = -1) -> None:
+        channel = self._channel(index)
+        channel.muted = _toggle(channel.muted, value)
+
+    def isChannelSolo(self, index: int) -> bool:
+        return self._channel(index).solo
+
+    def soloChannel(self, index: int) -> None:
+        channel = self._channel(index)
+        channel.solo = not channel.solo
+
+    def getChannelType(self, index: int) -> int:
+        # CT_Sampler = 0, CT_GenPlug = 2
+        return 2 if self._channel(index).plugin is not None else 0
+
+    def getTargetFxTrack(self, index: int) -> int:
+        return self._channel(index).target_fx_track
+
+    def getChannelMidiInPort(self, index: int) -> int:
+        return -1
+
+    def getActivityLevel(self, index: int) -> float:
+        return self._channel(index).activity
+
+    def getRecEventId(self, index: int) -> int:
+        return (index + 1) << 16
+
+    def getGridBit(self, index: int, position: int) -> int:
+        return self._channel(index).grid.get(position, 0)
+
+    def getGridBitWithLoop(self, index: int, position: int) -> int:
+        return self.getGridBit(index, position)
+
+    def setGridBit(self, index: int, position: int, value: int) -> None:
+        self._channel(index).grid[position] = 1 if value else 0
+
+    def isGridBitAssigned(self, index: int) -> bool:
+        return any(self._channel(index).grid.values())
+
+    def getCurrentStepParam(self, index: int, step: int, param: int) -> int:
+        return 0
+
+    def getStepParam(self, step: int, param: int, index: int, startPos: int, padsStride: int = 16) -> int:
+        return 0
+
+    def isHighLighted(self) -> bool:
+        return False
+
+    def isGraphEditorVisible(self) -> bool:
+        return False
+
+    def quickQuantize(self, index: int, startOnly: int = 1) -> None:
+        pass
+
+
+class PatternsAPI(OfflineAPI):
+    def patternCount(self) -> int:
+        return len(self.project.patterns)
+
+    def patternMax(self) -> int:
+        return self.project.PATTERN_MAX
+
+    def patternNumber(self) -> int:
+        return self.project.pattern_number
+
+    def jumpToPattern(self, index: int) -> None:
+        if index not in self.project.patterns:
+            self.project.patterns[index] = OfflinePattern('Pattern {}'.format(index))
+        self.project.pattern_number = index
+
+    def getPatternName(self, index: int) -> str:
+        pattern = self.project.patterns.get(index)
+        return pattern.name if pattern else ''
+
+    def setPatternName(self, index: int, name: str) -> None:
+        self.project.patterns[index].name = name
+
+    def getPatternColor(self, index: int) -> int:
+        pattern = self.project.patterns.get(index)
+        return pattern.color if pattern else 0
+
+    def setPatternColor(self, index: int, color: int) -> None:
+        self.project.patterns[index].color = color
+
+    def getPatternLength(self, index: int) -> int:
+        pattern = self.project.patterns.get(index)
+        return pattern.length if pattern else 0
+
+
+class PlaylistAPI(OfflineAPI):
+    def _track(self, index: int):
+        return self.project.playlist_tracks[index]
+
+    def trackCount(self) -> int:
+        return len(self.project.playlist_tracks)
+
+    def getTrackName(self, index: int) -> str:
+        return self._track(index).name
+
+    def setTrackName(self, index: int, name: str) -> None:
+        self._track(index).name = name
+
+    def getTrackColor(self, index: int) -> int:
+        return self._track(index).color
+
+    def setTrackColor(self, index: int, color: int) -> None:
+        self._track(index).color = color
+
+    def isTrackMuted(self, index: int) -> bool:
+        return self._track(index).muted
+
+    def muteTrack(self, index: int, value: int = -1) -> None:
+        track = self._track(index)
+        track.muted = _toggle(track.muted, value)
+
+    def isTrackMuteLock(self, index: int) -> bool:
+        return False
+
+    def muteTrackLock(self, index: int) -> None:
+        pass
+
+    def isTrackSolo(self, index: int) -> bool:
+        return self._track(index).solo
+
+    def soloTrack(self, index: int, value: int = -1) -> None:
+        track = self._track(index)
+        track.solo = _toggle(track.solo, value)
+
+    def isTrackSelected(self, index: int) -> bool:
+        return self._track(index).selected
+
+    def selectTrack(self, index: int) -> None:
+        track = self._track(index)
+        track.selected = not track.selected
+
+    def selectAll(self) -> None:
+        for track in self.project.playlist_tracks.values():
+            track.selected = True
+
+    def deselectAll(self) -> None:
+        for track in self.project.playlist_tracks.values():
+            track.selected = False
+
+    def getPerformanceModeState(self) -> int:
+        return 0
+
+    def getTrackActivityLevel(self, index: int) -> float:
+        return 0.0
+
+    def getTrackActivityLevelVis(self, index: int) -> float:
+        return 0.0
+
+    def getVisTimeBar(self) -> int:
+        return int(self.project.song_pos) + 1
+
+    def getVisTimeStep(self) -> int:
+        return 0
+
+    def getVisTimeTick(self) -> int:
+        return 0
+
+
+class PluginsAPI(OfflineAPI):
+    def isValid(self, index: int, slotIndex: int = -1, useGlobalIndex: bool = False) -> bool:
+        return self.project.get_plugin(index, slotIndex) is not None
+
+    def getPluginName(self, index: int, slotIndex: int = -1, userName: int = 0, useGlobalIndex: bool = False) -> str:
+        return self.project.get_plugin(index, slotIndex).name
+
+    def getParamCount(self, index: int, slotIndex: int = -1, useGlobalIndex: bool = False) -> int:
+        return len(self.project.get_plugin(index, slotIndex).parameter_values)
+
+    def getParamName(self, paramIndex: int, index: int, slotIndex: int = -1, useGlobalIndex: bool = False) -> str:
+        return self.project.get_plugin(index, slotIndex).parameter_names[paramIndex]
+
+    def getParamValue(self, paramIndex: int, index: int, slotIndex: int = -1, useGlobalIndex: bool = False) -> float:
+        return self.project.get_plugin(index, slotIndex).parameter_values[paramIndex]
+
+    def setParamValue(self, value: float, paramIndex: int, index: int, slotIndex: int = -1, pickupMode: int = 0, useGlobalIndex: bool = False) -> None:
+        self.project.get_plugin(index, slotIndex).parameter_values[paramIndex] = min(max(value, 0.0), 1.0)
+
+    def getParamValueString(self, paramIndex: int, index: int, slotIndex: int = -1, pickupMode: int = 0, useGlobalIndex: bool = False) -> str:
+        return self.project.get_plugin(index, slotIndex).get_value_string(paramIndex)
+
+
+class TransportAPI(OfflineAPI):
+    def start(self) -> None:
+        self.project.playing = not self.project.playing
+
+    def stop(self) -> None:
+        self.project.playing = False
+        self.project.song_pos = 0.0
+
+    def isPlaying(self) -> bool:
+        return self.project.playing
+
+    def record(self) -> None:
+        self.project.recording = not self.project.recording
+
+    def isRecording(self) -> bool:
+        return self.project.recording
+
+    def getLoopMode(self) -> int:
+        return self.project.loop_mode
+
+    def setLoopMode(self) -> None:
+        self.project.loop_mode = 1 - self.project.loop_mode
+
+    def getSongPos(self, mode: int = -1) -> float:
+        return self.project.song_pos
+
+    def setSongPos(self, position: float, mode: int = -1) -> None:
+        self.project.song_pos = position
+
+    def getSongPosHint(self) -> str:
+        return '{}:01:000'.format(int(self.project.song_pos) + 1)
+
+    def globalTransport(self, command: int, value: int, pmeflags: int = 0, flags: int = 0) -> int:
+        self.project.transport_commands.append((command, value))
+        return 1
+
+
+class UIAPI(OfflineAPI):
+    def getFocused(self, index: int) -> int:
+        return 1 if self.project.focused_window == index else 0
+
+    def setFocused(self, index: int) -> None:
+        self.project.focused_window = index
+        self.project.visible_windows.add(index)
+
+    def getVisible(self, index: int) -> int:
+        return 1 if index in self.project.visible_windows else 0
+
+    def showWindow(self, index: int) -> None:
+        self.project.visible_windows.add(index)
+
+    def hideWindow(self, index: int) -> None:
+        self.project.visible_windows.discard(index)
+
+    def getFocusedFormCaption(self) -> str:
+        return ''
+
+    def getFocusedFormID(self) -> int:
+        return self.project.focused_window
+
+    def getFocusedPluginName(self) -> str:
+        plugin = self.project.get_plugin(self.project.selected_channel)
+        return plugin.name if plugin else ''
+
+    def getHintMsg(self) -> str:
+        return self.project.hint_msg
+
+    def setHintMsg(self, msg: str) -> None:
+        self.project.hint_msg = msg
+
+    def isInPopupMenu(self) -> int:
+        return 1 if self.project.in_popup_menu else 0
+
+    def getTimeDispMin(self) -> bool:
+        return False
+
+    def isLoopRecEnabled(self) -> bool:
+        return self.project.loop_record
+
+    def isMetronomeEnabled(self) -> bool:
+        return self.project.metronome
+
+    def jog(self, value: int) -> int:
+        """Moves the browser cursor by value nodes, clamped to the visible nodes."""
+        count = len(self.project.visible_browser_nodes())
+        self.project.browser_cursor = min(max(self.project.browser_cursor + value, 0), max(count - 1, 0))
+        return 1
+
+    def getFocusedNodeCaption(self) -> str:
+        node = self.project.focused_browser_node()
+        return node.caption if node else ''
+
+    def getFocusedNodeFileType(self) -> int:
+        node = self.project.focused_browser_node()
+        return node.file_type if node else -1
+
+    def toggleBrowserNode(self, value: int = -1) -> None:
+        node = self.project.focused_browser_node()
+        if node is not None and node.file_type == BrowserNode.FOLDER:
+            node.expanded = _toggle(node.expanded, value)
+
+    def previewBrowserMenuItem(self) -> None:
+        node = self.project.focused_browser_node()
+        if node is not None and node.file_type != BrowserNode.FOLDER:
+            self.project.previews.append(node.caption)
+
+    def selectBrowserMenuItem(self) -> None:
+        pass
+
+    def navigateBrowserTabs(self, direction: int) -> str:
+        step = -1 if direction == 42 else 1
+        self.project.browser_tab = (self.project.browser_tab + step) % len(self.project.browser_tabs)
+        return self.project.browser_tabs[self.project.browser_tab]
+
+    def enter(self) -> None:
+        self.project.in_popup_menu = False
+
+
+class DeviceAPI(OfflineAPI):
+    def midiOutMsg(self, message: int, channel: int = -1, data1: int = -1, data2: int = -1) -> None:
+        if channel != -1:
+            status = message | channel
+        else:
+            status, data1, data2 = message & 0xFF, (message >> 8) & 0xFF, (message >> 16) & 0xFF
+        self.project.midi_out.append((status, data1, data2))
+
+    def midiOutSysex(self, message: bytes) -> None:
+        self.project.sysex_out.append(bytes(message))
+
+    def setHasMeters(self) -> None:
+        pass
+
+    def isAssigned(self) -> bool:
+        return True
+
+    def getName(self) -> str:
+        return 'Offline'
+
+    def getPortNumber(self) -> int:
+        return 0
+
+
+class GeneralAPI(OfflineAPI):
+    def undoUp(self) -> None:
+        self.project.undo_position += 1
+
+    def undoDown(self) -> None:
+        self.project.undo_position -= 1
+
+    def processRECEvent(self, eventId: int, value: int, flags: int) -> int:
+        if not flags & MidiConstants.REC_GetValue:
+            self.project.rec_events[eventId] = value
+        return self.project.rec_events.get(eventId, 0)
+
+    def getVersion(self) -> int:
+        return 36
+
+
+class ArrangementAPI(OfflineAPI):
+    def currentTime(self, snap: int = 0) -> int:
+        return int(self.project.song_pos * 96 * 4)
+
+
+class UtilsAPI(OfflineAPI):
+    def Limited(self, value: float, min_value: float, max_value: float) -> float:
+        return min(max(value, min_value), max_value)
+
+
+class MidiConstants(object):
+    """The constants of the FL midi module that the framework uses."""
+    widMixer = 0
+    widChannelRack = 1
+    widPlaylist = 2
+    widPianoRoll = 3
+    widBrowser = 4
+    widPlugin = 5
+    PME_System = 1 << 1
+    PME_System_Safe = 1 << 2
+    PME_PreviewNote = 1 << 3
+    PME_FromHost = 1 << 4
+    PME_FromMIDI = 1 << 5
+    PME_FromScript = 1 << 6
+    FPT_Play = 10
+    FPT_Stop = 11
+    FPT_Record = 12
+    FPT_Left = 42
+    FPT_Right = 43
+    FPT_Escape = 81
+    FPT_LoopRecord = 113
+    FromMIDI_Max = 1 << 30
+    REC_UpdateValue = 1 << 16
+    REC_GetValue = 1 << 17
+    REC_ShowHint = 1 << 18
+    REC_UpdateControl = 1 << 20
+    REC_Control = REC_UpdateValue | REC_UpdateControl
+    REC_MIDIController = REC_Control | REC_ShowHint
+    REC_Chan_Vol = 0
+
+
+class OfflineModule(types.ModuleType):
+    """A stand-in FL Studio module. Its functions are the public methods of an OfflineAPI, wrapped to count every call in the project.
+        Anything that is not implemented raises AttributeError, like the real modules do.
+    """
+    def __init__(self, name: str, api: OfflineAPI = None, constants: type = None):
+        super().__init__(name)
+        if constants is not None:
+            for attr, value in vars(constants).items():
+                if not attr.startswith('_'):
+                    setattr(self, attr, value)
+        if api is not None:
+            self.bind(api)
+
+    def bind(self, api: OfflineAPI) -> None:
+        """Binds the module functions to api, and so to its project."""
+        counter = api.project.api_calls
+        for attr in dir(api):
+            if attr.startswith('_') or attr == 'project':
+                continue
+            setattr(self, attr, self._counted('{}.{}'.format(self.__name__, attr), getattr(api, attr), counter))
+
+    @staticmethod
+    def _counted(path: str, func, counter):
+        def call(*a, **k):
+            counter[path] += 1
+            return func(*a, **k)
+        call.__name__ = func.__name__
+        return call
+
+
+MODULE_APIS: dict[str, type] = {
+    'mixer': MixerAPI,
+    'channels': ChannelsAPI,
+    'patterns': PatternsAPI,
+    'playlist': PlaylistAPI,
+    'plugins': PluginsAPI,
+    'transport': TransportAPI,
+    'ui': UIAPI,
+    'device': DeviceAPI,
+    'general': GeneralAPI,
+    'arrangement': ArrangementAPI,
+    'utils': UtilsAPI,
+}
+"""Module name to the OfflineAPI class that implements it. The midi module only holds MidiConstants."""
+
+
+def install(project: OfflineProject = None) -> OfflineProject:
+    """Installs the stand-in modules in sys.modules, so `import mixer` and friends resolve to them. Call it before importing the framework.
+        Calling it again binds the installed modules to a new project, so already imported framework modules see the new project too.
+
+    Args:
+        project (OfflineProject, optional): The project to back the modules. Defaults to OfflineProject.default().
+
+    Returns:
+        OfflineProject: The project the modules are bound to.
+    """
+    project = project if project is not None else OfflineProject.default()
+    for name, api_class in MODULE_APIS.items():
+        module = sys.modules.get(name)
+        if isinstance(module, OfflineModule):
+            module.bind(api_class(project))
+        else:
+            sys.modules[name] = OfflineModule(name, api_class(project))
+    if not isinstance(sys.modules.get('midi'), OfflineModule):
+        sys.modules['midi'] = OfflineModule('midi', constants=MidiConstants)
+    return project
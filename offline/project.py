@@ -0,0 +1,176 @@
+"""project.py: The in-memory FL Studio project that backs the offline stand-in modules.
+"""
+from collections import Counter
+
+
+class OfflinePlugin(object):
+    """A plugin with named parameters. Parameter values are normalized floats, 0.0 - 1.0."""
+    def __init__(self, name: str, parameters: dict[str, float] = None):
+        self.name: str = name
+        self.parameter_names: list[str] = list(parameters or {})
+        self.parameter_values: list[float] = list((parameters or {}).values())
+
+    def get_value_string(self, index: int) -> str:
+        return '{}%'.format(round(self.parameter_values[index] * 100))
+
+
+class OfflineChannel(object):
+    """A channel rack channel."""
+    def __init__(self, name: str, color: int = -10261391, plugin: OfflinePlugin = None, target_fx_track: int = 0):
+        self.name: str = name
+        self.color: int = color
+        self.volume: float = 0.78125
+        self.pan: float = 0.0
+        self.pitch: float = 0.0
+        self.muted: bool = False
+        self.solo: bool = False
+        self.selected: bool = False
+        self.plugin: OfflinePlugin = plugin
+        self.target_fx_track: int = target_fx_track
+        self.activity: float = 0.0
+        self.grid: dict[int, int] = dict()
+
+
+class OfflineMixerTrack(object):
+    """A mixer track. Effect slots hold plugins by slot index."""
+    def __init__(self, name: str, color: int = -12303292):
+        self.name: str = name
+        self.color: int = color
+        self.volume: float = 0.8
+        self.pan: float = 0.0
+        self.muted: bool = False
+        self.solo: bool = False
+        self.armed: bool = False
+        self.selected: bool = False
+        self.peaks: tuple[float, float] = (0.0, 0.0)
+        self.slots: dict[int, OfflinePlugin] = dict()
+
+
+class OfflinePattern(object):
+    def __init__(self, name: str, color: int = -11960449, length: int = 16):
+        self.name: str = name
+        self.color: int = color
+        self.length: int = length
+
+
+class OfflinePlaylistTrack(object):
+    def __init__(self, name: str, color: int = -10721942):
+        self.name: str = name
+        self.color: int = color
+        self.muted: bool = False
+        self.solo: bool = False
+        self.selected: bool = False
+
+
+class BrowserNode(object):
+    """A node of the browser tree. Folders have the file type FOLDER and can be expanded."""
+    FOLDER: int = -100
+
+    def __init__(self, caption: str, file_type: int = FOLDER, children: list['BrowserNode'] = None):
+        self.caption: str = caption
+        self.file_type: int = file_type
+        self.children: list[BrowserNode] = children or []
+        self.expanded: bool = False
+
+
+class OfflineProject(object):
+    """In-memory model of an FL Studio project, used by the offline stand-in modules.
+        Every call made through the stand-in modules is counted in api_calls, by "module.function". Every MIDI message sent with device.midiOutMsg is recorded in midi_out, and every SysEx message in sysex_out.
+        Use OfflineProject.default() for a populated project.
+    """
+    MIXER_TRACK_COUNT: int = 127
+    PLAYLIST_TRACK_COUNT: int = 500
+    PATTERN_MAX: int = 999
+
+    def __init__(self):
+        self.channels: list[OfflineChannel] = []
+        self.mixer_tracks: list[OfflineMixerTrack] = [OfflineMixerTrack('Master' if index == 0 else 'Insert {}'.format(index)) for index in range(self.MIXER_TRACK_COUNT)]
+        self.patterns: dict[int, OfflinePattern] = dict()
+        """Patterns by pattern number. Pattern numbers start at 1."""
+        self.playlist_tracks: dict[int, OfflinePlaylistTrack] = {index: OfflinePlaylistTrack('Track {}'.format(index)) for index in range(1, self.PLAYLIST_TRACK_COUNT + 1)}
+        """Playlist tracks by track number. Track numbers start at 1."""
+        self.browser: BrowserNode = BrowserNode('Browser')
+        self.browser_tabs: list[str] = ['All', 'Projects', 'Plugins', 'Samples']
+
+        self.selected_channel: int = 0
+        self.selected_mixer_track: int = 0
+        self.active_effect: tuple[int, int] = None
+        """(mixer track, slot) of the focused effect plugin, or None."""
+        self.pattern_number: int = 1
+
+        self.playing: bool = False
+        self.recording: bool = False
+        self.loop_mode: int = 0
+        self.song_pos: float = 0.0
+        self.tempo: float = 140.0
+        self.metronome: bool = False
+        self.loop_record: bool = False
+
+        self.focused_window: int = 1
+        self.visible_windows: set[int] = {0, 1, 2}
+        self.hint_msg: str = ''
+        self.in_popup_menu: bool = False
+        self.browser_cursor: int = 0
+        self.browser_tab: int = 0
+        self.previews: list[str] = []
+        """Captions of the browser nodes that were previewed, in order."""
+
+        self.rec_events: dict[int, int] = dict()
+        self.transport_commands: list[tuple] = []
+        self.undo_position: int = 0
+
+        self.midi_out: list[tuple] = []
+        """(status, data1, data2) of every message sent with device.midiOutMsg."""
+        self.sysex_out: list[bytes] = []
+        self.api_calls: Counter = Counter()
+
+    @classmethod
+    def default(cls, channel_count: int = 16, pattern_count: int = 8, parameter_count: int = 32) -> 'OfflineProject':
+        """Returns a project with channels, patterns, a plugin on every channel, an effect on the first inserts and a small browser tree."""
+        project = cls()
+        for index in range(channel_count):
+            parameters = {'Param {}'.format(p): 0.5 for p in range(parameter_count)}
+            project.channels.append(OfflineChannel('Channel {}'.format(index + 1), plugin=OfflinePlugin('Synth {}'.format(index + 1), parameters), target_fx_track=index + 1))
+        project.channels[0].selected = True
+        for number in range(1, pattern_count + 1):
+            project.patterns[number] = OfflinePattern('Pattern {}'.format(number))
+        for index in range(1, 9):
+            project.mixer_tracks[index].slots[0] = OfflinePlugin('Fruity Limiter', {'Gain': 0.5, 'Ceiling': 1.0, 'Release': 0.3})
+        project.mixer_tracks[0].selected = True
+        project.browser.children = [
+            BrowserNode('Packs', children=[BrowserNode('Drums', children=[BrowserNode('Kick {}.wav'.format(i), 7) for i in range(1, 33)])]),
+            BrowserNode('Plugin presets', children=[BrowserNode('Preset {}.fst'.format(i), 8) for i in range(1, 17)]),
+            BrowserNode('Recorded', children=[]),
+        ]
+        return project
+
+    def visible_browser_nodes(self) -> list[BrowserNode]:
+        """The browser nodes as shown in the browser: every child of an expanded folder follows its folder."""
+        nodes = []
+        def visit(node: BrowserNode):
+            for child in node.children:
+                nodes.append(child)
+                if child.expanded:
+                    visit(child)
+        visit(self.browser)
+        return nodes
+
+    def focused_browser_node(self) -> BrowserNode:
+        nodes = self.visible_browser_nodes()
+        return nodes[self.browser_cursor] if nodes else None
+
+    def get_plugin(self, index: int, slot_index: int = -1) -> OfflinePlugin:
+        """Returns the channel plugin when slot_index is -1, otherwise the plugin in the effect slot of mixer track index."""
+        if slot_index == -1:
+            if 0 <= index < len(self.channels):
+                return self.channels[index].plugin
+            return None
+        if 0 <= index < len(self.mixer_tracks):
+            return self.mixer_tracks[index].slots.get(slot_index)
+        return None
+
+    def reset_counters(self) -> None:
+        """Clears the recorded MIDI output and the API call counts."""
+        self.midi_out.clear()
+        self.sysex_out.clear()
+        self.api_calls.clear()
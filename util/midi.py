@@ -26,3 +26,23 @@ class STATUS_BYTE:
     PROGRAM_CHANGE=0xC0
     CHANNEL_AFTERTOUCH=0xD0
     PTICH_BEND=0xE0
+
+class MidiMessage(object):
+    """A MIDI message with the fields of the event FL Studio passes to OnMidiMsg that the framework reads.
+        The framework creates it for messages that do not come from FL Studio, like replayed session records. It does not derive from api.fl_class.flMidiMsg, so it can be used without the FL Studio modules.
+    """
+    def __init__(self, status: int, data1: int, data2: int, port: int = 0):
+        self.handled: bool = False
+        self.status: int = status
+        self.data1: int = data1
+        self.data2: int = data2
+        self.port: int = port
+        self.midiId: int = status & 0xF0
+        self.midiChan: int = status & 0x0F
+        self.midiChanEx: int = status & 0x0F
+        self.note: int = data1
+        self.velocity: int = data2
+        self.controlNum: int = data1
+        self.controlVal: int = data2
+        self.sysex: bytes = None
+        self.pmeFlags: int = 0
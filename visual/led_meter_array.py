@@ -1,6 +1,6 @@
 from ..core.state import StateBase
 from ..controls.control import ControlBase
-import device
+from ..core.output import MidiOutput
 
 
 class LedMeterArray(StateBase):
@@ -8,7 +8,7 @@ class LedMeterArray(StateBase):
         super().__init__()
         self.status = status
         self.channel = channel
-        self.device = device
+        self.device = MidiOutput()
         self.led_array = led_array
         self.num_segments = len(led_array)
 
@@ -79,7 +79,7 @@ class LedMeterArray(StateBase):
         for led in led_values:
             led_id = self.led_array[led[0]]
             value = led[1]
-            device.midiOutMsg(self.status,
+            self.device.midiOutMsg(self.status,
                               self.channel, led_id, value)
             
     def display_volume(self, volume: float):